@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+
+class ClientBudget:
+    """One connection's buckets and what it has had dropped"""
+    __slots__ = ('draws', 'draw_bytes', 'chats', 'drops', 'limited', 'window_start', 'window_drops')
+
+    def __init__(self, limits: 'Admission', now: float):
+        self.draws = TokenBucket(limits.draw_rate, limits.draw_burst, now)
+        self.draw_bytes = TokenBucket(limits.byte_rate, limits.byte_burst, now)
+        self.chats = TokenBucket(limits.chat_rate, limits.chat_burst, now)
+        self.drops: Dict[str, int] = {}
+        self.limited = False  # the last chat message was dropped
+        self.window_start = now
+        self.window_drops = 0
+
+
+class Admission:
+    """Per-connection rate and byte budgets for the draw and chat paths
+
+    Every connection gets token buckets for draw events, draw bytes and
+    chat messages. Events over budget are dropped before they reach the
+    batcher or the room, so one flooding client costs the server a dict
+    lookup per event instead of a broadcast to everyone in the room. Drops
+    are counted per connection and per reason.
+
+    Dropping still leaves the cost of receiving and parsing each event, so
+    a connection with more than `kick_after` drops inside `kick_window`
+    seconds is reported as abusive for the caller to disconnect.
+    """
+
+    def __init__(self, draw_rate: float = 120, draw_burst: float = 240,
+                 byte_rate: float = 64 * 1024, byte_burst: float = 128 * 1024,
+                 chat_rate: float = 3, chat_burst: float = 10,
+                 kick_after: int = 2000, kick_window: float = 10,
+                 clock: Callable[[], float] = time.monotonic):
+        self.draw_rate = draw_rate
+        self.draw_burst = draw_burst
+        self.byte_rate = byte_rate
+        self.byte_burst = byte_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.kick_after = kick_after
+        self.kick_window = kick_window
+        self.clock = clock
+        self.totals: Dict[str, int] = {}  # reason -> drops, including closed connections
+        self._clients: Dict[str, ClientBudget] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, sid: str, now: float) -> ClientBudget:
+        client = self._clients.get(sid)
+        if client is None:
+            client = self._clients[sid] = ClientBudget(self, now)
+        return client
+
+    def draw(self, sid: str, nbytes: int) -> Optional[str]:
+        """Admit a draw event of nbytes, or return why it was dropped"""
+        now = self.clock()
+        with self._lock:
+            client = self._client(sid, now)
+            if client.draws.refill(now) < 1:
+                reason = 'rate'
+            elif client.draw_bytes.refill(now) < nbytes:
+                reason = 'bytes'
+            else:
+                client.draws.tokens -= 1
+                client.draw_bytes.tokens -= nbytes
+                return None
+            self._count(client, reason, now)
+        return reason
+
+    def chat(self, sid: str) -> Optional[str]:
+        """Admit a chat message, or return why it was dropped"""
+        now = self.clock()
+        with self._lock:
+            client = self._client(sid, now)
+            if client.chats.refill(now) >= 1:
+                client.chats.tokens -= 1
+                client.limited = False
+                return None
+            self._count(client, 'rate', now)
+        return 'rate'
+
+    def first_drop(self, sid: str) -> bool:
+        """Whether the chat message just dropped starts a run of drops
+
+        So the sender is told to slow down once, not once per message.
+        """
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None or client.limited:
+                return False
+            client.limited = True
+            return True
+
+    def reject(self, sid: str, reason: str):
+        """Count a drop decided by the caller (e.g. not the drawer)"""
+        now = self.clock()
+        with self._lock:
+            self._count(self._client(sid, now), reason, now)
+
+    def _count(self, client: ClientBudget, reason: str, now: float):
+        client.drops[reason] = client.drops.get(reason, 0) + 1
+        self.totals[reason] = self.totals.get(reason, 0) + 1
+        if now - client.window_start > self.kick_window:
+            client.window_start = now
+            client.window_drops = 0
+        client.window_drops += 1
+
+    def abusive(self, sid: str) -> bool:
+        """Whether the connection has had too many events dropped lately"""
+        client = self._clients.get(sid)
+        return client is not None and client.window_drops > self.kick_after
+
+    def forget(self, sid: str):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def top(self, n: int = 10) -> List[Tuple[str, Dict[str, int]]]:
+        """Connections with the most drops: (sid, drops by reason)"""
+        with self._lock:
+            dropping = [(sid, dict(c.drops)) for sid, c in self._clients.items() if c.drops]
+        dropping.sort(key=lambda item: sum(item[1].values()), reverse=True)
+        return dropping[:n]
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+def gate_events(server, admit: Callable[[str, list], bool]) -> bool:
+    """Call admit(sid, [event, *args]) before a python-socketio server
+    schedules an event's handler, and drop the event if it returns False
+
+    The server starts every handler as a background task (an OS thread in
+    threading mode) inside a Flask request context; an event refused here
+    costs neither.
+    """
+    handle_event = getattr(server, '_handle_event', None)
+    manager = getattr(server, 'manager', None)
+    if handle_event is None or manager is None:
+        return False
+
+    def gated(eio_sid, namespace, id, data):
+        sid = manager.sid_from_eio_sid(eio_sid, namespace or '/')
+        if sid is not None and data and not admit(sid, data):
+            return
+        return handle_event(eio_sid, namespace, id, data)
+
+    server._handle_event = gated
+    return True
@@ -1,4 +1,15 @@
-from flask import Flask, render_template, request, jsonify
+import argparse
+import hashlib
+import os
+
+# NEON_ASYNC_MODE=eventlet serves every connection on a green thread instead
+# of an OS thread; patch the stdlib before anything else imports it
+ASYNC_MODE = os.environ.get('NEON_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, url_for
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import uuid
@@ -7,15 +18,547 @@ import threading
 import time
 import webbrowser
 import platform
-import os
+import signal
+import sys
 from game_logic import GameManager
+from room_store import create_room_store
+from word_bank import get_word_bank
+from stroke_batcher import StrokeBatcher
+from round_scheduler import TimerWheel
+import stroke_codec
+import stroke_simplify
+from network_info import PublicIPCache
+from sessions import SessionIndex
+from admission import Admission, gate_events
+from spectators import SpectatorFeed
+from thumbnails import Thumbnailer
+from metrics import FANOUT_BUCKETS, BroadcastMeter, RateMeter, Registry, timed
+import game_recorder as rec
+from game_recorder import GameLog, GameRecorder
+from assets import IMMUTABLE, AssetPipeline, compress, fingerprint, negotiate
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'neon-draw-final-2024'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Set NEON_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) when running several
+# workers so broadcasts reach clients connected to any of them
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=os.environ.get('NEON_MESSAGE_QUEUE'))
 CORS(app)
 
-game_manager = GameManager()
+# Finished drawings are rendered to PNG for the end-of-game gallery in
+# NEON_THUMBNAIL_WORKERS processes (0: one background thread), keeping the
+# most recent NEON_THUMBNAIL_CACHE_MB in memory. Workers are forked when the
+# first drawing finishes and shut down when the server exits.
+thumbnailer = Thumbnailer(workers=int(os.environ.get('NEON_THUMBNAIL_WORKERS', 1)),
+                          max_bytes=int(float(os.environ.get('NEON_THUMBNAIL_CACHE_MB', 16)) * 1024 * 1024))
+
+# NEON_ROOM_STORE: 'memory' (default) or 'sqlite:///path/rooms.db' to share rooms between workers
+game_manager = GameManager(create_room_store(os.environ.get('NEON_ROOM_STORE')))
+
+# Load the shared word bank once, before the first room needs it
+get_word_bank()
+
+# NEON_HEADLESS=1 (or --headless) serves on a fixed port without probing
+# ports, touching the firewall, looking up addresses or opening a browser:
+# for containers and process managers. NEON_PORT (or --port) sets the port.
+HEADLESS = os.environ.get('NEON_HEADLESS', '0') != '0'
+
+# Seconds a disconnected player keeps their seat, and how long rooms may sit
+# idle (or finished) before the reaper frees them
+RECONNECT_GRACE = float(os.environ.get('NEON_RECONNECT_GRACE', 30))
+ROOM_IDLE_TTL = float(os.environ.get('NEON_ROOM_IDLE_TTL', 30 * 60))
+FINISHED_ROOM_TTL = float(os.environ.get('NEON_FINISHED_ROOM_TTL', 5 * 60))
+REAP_INTERVAL = 60
+
+# Stroke points within this many pixels of the simplified line are dropped
+# before relay and storage; 0 relays every point as drawn
+SIMPLIFY_TOLERANCE = float(os.environ.get('NEON_SIMPLIFY_TOLERANCE', 0.5))
+
+# Per-connection budgets: NEON_DRAW_RATE draw events and NEON_DRAW_BYTES
+# bytes per second (bursts of twice that), NEON_CHAT_RATE chat messages per
+# second (bursts of ten). Excess events are dropped and counted; a socket
+# with over NEON_KICK_AFTER drops in 10 seconds is disconnected (0: never).
+DRAW_RATE = float(os.environ.get('NEON_DRAW_RATE', 120))
+DRAW_BYTES = float(os.environ.get('NEON_DRAW_BYTES', 64 * 1024))
+CHAT_RATE = float(os.environ.get('NEON_CHAT_RATE', 3))
+KICK_AFTER = int(os.environ.get('NEON_KICK_AFTER', 2000))
+admission = Admission(draw_rate=DRAW_RATE, draw_burst=2 * DRAW_RATE,
+                      byte_rate=DRAW_BYTES, byte_burst=2 * DRAW_BYTES,
+                      chat_rate=CHAT_RATE, chat_burst=10,
+                      kick_after=KICK_AFTER or float('inf'))
+
+# Every game is logged to NEON_RECORDINGS (a directory, '0' to turn off) so
+# it can be replayed later
+RECORDINGS_DIR = os.environ.get('NEON_RECORDINGS',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings'))
+# Finished logs are kept NEON_RECORDINGS_DAYS days (default 7) and
+# NEON_RECORDINGS_MB in all (default 512), oldest deleted first; 0: no limit
+RECORDINGS_DAYS = float(os.environ.get('NEON_RECORDINGS_DAYS', 7))
+RECORDINGS_MB = float(os.environ.get('NEON_RECORDINGS_MB', 512))
+game_recorder = GameRecorder(None if RECORDINGS_DIR == '0' else RECORDINGS_DIR,
+                             max_age=RECORDINGS_DAYS * 86400 or None,
+                             max_bytes=int(RECORDINGS_MB * 1024 * 1024) or None)
+game_recorder.start()
+MAX_REPLAY_SPEED = 16
+
+# Spectators get each room's strokes and state coalesced into one update
+# every NEON_SPECTATOR_INTERVAL seconds instead of every stroke batch
+SPECTATOR_INTERVAL = float(os.environ.get('NEON_SPECTATOR_INTERVAL', 0.5))
+
+# Room chat is sent as one chat_batch per room every NEON_CHAT_INTERVAL
+# seconds; 0 sends every message as its own chat_message
+CHAT_INTERVAL = float(os.environ.get('NEON_CHAT_INTERVAL', 0.05))
+
+# ========== STROKE RELAY ==========
+def flush_strokes(room_id, chunks, sender_sid):
+    """Store and relay a batch of encoded stroke chunks to the room"""
+    # Records are self-delimiting, so a batch is just the chunks joined
+    packet = b''.join(chunks)
+    if SIMPLIFY_TOLERANCE > 0:
+        packet = stroke_simplify.simplify_buffer(packet, SIMPLIFY_TOLERANCE)
+    with game_manager.room_transaction(room_id) as room:
+        if room is None:
+            return
+        room.canvas_data.append(packet)
+        game_recorder.record(room_id, rec.STROKES, packet)
+        if room.spectators:
+            spectator_feed.strokes(room_id, packet)
+    socketio.emit('draw_batch', packet, room=room_id, skip_sid=sender_sid)
+
+stroke_batcher = StrokeBatcher(flush_strokes)
+stroke_batcher.start()
+
+# ========== CHAT ==========
+# Messages for the whole room go through send_chat: kept in the room's
+# history (replayed to joiners), recorded, and queued for the next
+# chat_batch. Flushing the chat batcher never takes a room lock, so unlike
+# the stroke batcher it may be flushed inside a room transaction.
+def flush_chat(room_id, messages, _sender):
+    socketio.emit('chat_batch', messages, room=room_id)
+
+chat_batcher = StrokeBatcher(flush_chat, interval=CHAT_INTERVAL, max_batch=32, name='chat')
+if CHAT_INTERVAL > 0:
+    chat_batcher.start()
+
+def send_chat(room, chat):
+    """Queue a chat message for everyone in the room"""
+    room.add_chat(chat)
+    game_recorder.record(room.room_id, rec.CHAT, chat)
+    if CHAT_INTERVAL > 0:
+        chat_batcher.add(room.room_id, chat)
+    else:
+        socketio.emit('chat_message', chat, room=room.room_id)
+
+_clock = (0.0, '')  # (when the minute ends, '%H:%M')
+
+def chat_time():
+    """'%H:%M' for chat timestamps, formatted once a minute"""
+    global _clock
+    now = time.time()
+    if now >= _clock[0]:
+        _clock = (now - now % 60 + 60, time.strftime('%H:%M', time.localtime(now)))
+    return _clock[1]
+
+# ========== ROOM STATE SYNC ==========
+def broadcast_room_delta(room, skip_sid=None):
+    """Send only the room fields that changed since the last version"""
+    delta = room.pop_delta()
+    if delta:
+        socketio.emit('room_delta', delta, room=room.room_id, skip_sid=skip_sid)
+        if room.spectators:
+            spectator_feed.state_changed(room.room_id)
+
+def full_room_data(room):
+    """Full snapshot at a fresh version, for messages every client applies"""
+    room.pop_delta()
+    return room.get_room_data()
+
+# ========== ROUND SCHEDULER ==========
+# One timer wheel owns every room's deadline; keys are room ids, so a room
+# has at most one pending timer (round end or next turn). Session and
+# reaper timers use tuple keys.
+round_scheduler = TimerWheel()
+round_scheduler.start()
+
+def schedule_round_end(room):
+    """Arm the timer that ends the current turn when round_time elapses"""
+    room_id, turn_id = room.room_id, room.turn_id
+    # Not get_remaining_time(): it truncates, which would end rounds up to 1s early
+    round_scheduler.schedule(room_id, room.time_left(),
+                             lambda: expire_round(room_id, turn_id))
+
+def expire_round(room_id, turn_id):
+    """Time ran out before anyone guessed the word"""
+    with game_manager.room_transaction(room_id) as room:
+        word = game_manager.expire_turn(room_id, turn_id)
+        if word is not None:
+            finish_turn(room, word, 'timeout')
+
+def finish_turn(room, word, reason):
+    """Announce the end of a turn and queue the next one"""
+    room_id, turn_id = room.room_id, room.turn_id
+    ended = {
+        'word': word,
+        'reason': reason,
+        'intermission': room.intermission
+    }
+    chat_batcher.flush_room(room_id)  # the guesses (and correct guess) go first
+    socketio.emit('round_ended', ended, room=room_id)
+    if room.spectators:
+        spectator_feed.event(room_id, 'round_ended', ended)
+    broadcast_room_delta(room)
+    game_recorder.record(room_id, rec.ROUND_END, ended)
+    game_recorder.record(room_id, rec.SCORES, {'scores': list(room.get_leaderboard())})
+    add_to_gallery(room, word)
+
+    if room.game_state == "finished":
+        round_scheduler.cancel(room_id)
+        socketio.emit('game_gallery', {'drawings': galleries.get(room_id, [])}, room=room_id)
+        game_recorder.end(room_id, {'leaderboard': list(room.get_leaderboard())})
+    else:
+        round_scheduler.schedule(room_id, room.intermission,
+                                 lambda: begin_turn(room_id, turn_id))
+
+def begin_turn(room_id, turn_id):
+    """Start the next drawer's turn after the intermission"""
+    with game_manager.room_transaction(room_id) as room:
+        turn_info = game_manager.advance_turn(room_id, turn_id)
+        if not turn_info:
+            return
+        stroke_batcher.discard(room_id)
+        socketio.emit('turn_started', {
+            **full_room_data(room),
+            **turn_info
+        }, room=room_id)
+        schedule_round_end(room)
+        record_turn(room, turn_info)
+        spectate_turn(room)
+
+def record_turn(room, turn_info):
+    """Log a turn change, with the word the guessers were after"""
+    game_recorder.record(room.room_id, rec.TURN, {
+        **turn_info,
+        'word': room.current_word,
+        'round': room.round,
+        'turn_id': room.turn_id
+    })
+
+# ========== SESSIONS ==========
+# sid -> (room_id, player_id) for every socket that joined a room
+sessions = SessionIndex()
+
+def current_session():
+    """(room_id, player_id) bound to this socket by `join`, else (None, None)
+
+    Player ids are public (every room_update lists them), so ids sent with
+    an event are never trusted: a socket acts only as the seat it joined,
+    and `join` binds a seat only for the holder of its token.
+    """
+    return sessions.get(request.sid) or (None, None)
+
+def remove_player(room_id, player_id):
+    """Take a player out of a room and tell the others"""
+    with game_manager.room_transaction(room_id) as room:
+        if room is None:
+            return
+        player = room.players.get(player_id)
+        was_drawing = room.game_state == "drawing"
+        word = room.current_word
+
+        game_manager.leave_room(room_id, player_id)
+
+        if room_id not in game_manager.rooms:
+            forget_room(room_id)
+            return
+
+        if was_drawing and room.game_state in ("between_rounds", "finished"):
+            # The drawer left mid-turn
+            finish_turn(room, word, 'drawer_left')
+        elif room.game_state == "waiting":
+            round_scheduler.cancel(room_id)
+
+        # Send update to remaining players
+        broadcast_room_delta(room)
+
+        if player:
+            send_chat(room, {
+                'type': 'system',
+                'message': f'{player.username} left the room',
+                'timestamp': chat_time()
+            })
+
+def forget_room(room_id):
+    """Drop the timer, pending strokes and sockets of a deleted room"""
+    round_scheduler.cancel(room_id)
+    stroke_batcher.discard(room_id)
+    chat_batcher.discard(room_id)
+    game_recorder.end(room_id)
+    sessions.drop_room(room_id)
+    socketio.close_room(room_id)
+    close_spectators(room_id)
+    clear_gallery(room_id)
+
+def expire_session(room_id, player_id):
+    """The grace period ran out without the player reconnecting"""
+    if sessions.sid_of(room_id, player_id) is None:
+        remove_player(room_id, player_id)
+
+def reap_rooms():
+    """Evict rooms nobody has touched for a while (runs every REAP_INTERVAL)"""
+    try:
+        for room_id in game_manager.reap_rooms(ROOM_IDLE_TTL, FINISHED_ROOM_TTL):
+            socketio.emit('room_closed', {'room_id': room_id, 'reason': 'idle'}, room=room_id)
+            forget_room(room_id)
+    finally:
+        round_scheduler.schedule(('reap',), REAP_INTERVAL, reap_rooms)
+
+round_scheduler.schedule(('reap',), REAP_INTERVAL, reap_rooms)
+
+# ========== REPLAY ==========
+# sid -> event that stops the replay streaming to that socket
+replays = {}
+
+REPLAY_EVENTS = {
+    rec.STROKES: 'draw_batch',
+    rec.CLEAR: 'canvas_cleared',
+    rec.CHAT: 'chat_message',
+    rec.ROUND_END: 'round_ended',
+}
+
+def stream_replay(path, sid, speed, stop):
+    """Send a recorded game to one socket, paced by its timestamps / speed"""
+    complete = False
+    try:
+        with GameLog(path) as log:
+            start = time.monotonic()
+            for at, kind, payload in log:
+                # Absolute schedule, so slow emits don't add up to drift
+                delay = start + at / speed - time.monotonic()
+                if delay > 0 and stop.wait(delay):
+                    break
+                data = rec.decode(kind, payload)
+                event = REPLAY_EVENTS.get(kind)
+                if event is None:
+                    socketio.emit('replay_event', {'kind': rec.KIND_NAMES[kind], 'at': at, 'data': data}, room=sid)
+                else:
+                    socketio.emit(event, data, room=sid)
+            else:
+                complete = True
+    except (OSError, ValueError) as e:
+        socketio.emit('replay_error', {'message': str(e)}, room=sid)
+    finally:
+        if replays.get(sid) is stop:
+            del replays[sid]
+    socketio.emit('replay_ended', {'complete': complete}, room=sid)
+
+def stop_replay(sid):
+    stop = replays.pop(sid, None)
+    if stop is not None:
+        stop.set()
+
+# ========== SPECTATORS ==========
+# Spectators join '<room_id>:watch' instead of the room itself, so player
+# broadcasts never reach them; the feed sends them coalesced updates.
+# sid -> (room_id, spectator_id)
+spectator_sessions = SessionIndex()
+
+def watch_room(room_id):
+    return f'{room_id}:watch'
+
+def send_to_spectators(room_id, events, strokes, state_changed):
+    """One coalesced update: announcements, then room state, then strokes"""
+    watch = watch_room(room_id)
+    for name, data in events:
+        socketio.emit(name, data, room=watch)
+    if state_changed:
+        # Snapshot under the room lock (a handler may be mid-change); emit outside it
+        with game_manager.room_transaction(room_id) as room:
+            room_data = room.get_room_data() if room is not None else None
+        if room_data is not None:
+            socketio.emit('room_update', room_data, room=watch)
+    if strokes:
+        packet = b''.join(strokes)
+        if SIMPLIFY_TOLERANCE > 0:
+            # Joins strokes split across batches and drops the new in-between points
+            packet = stroke_simplify.simplify_buffer(packet, SIMPLIFY_TOLERANCE)
+        socketio.emit('draw_batch', packet, room=watch)
+
+spectator_feed = SpectatorFeed(send_to_spectators, interval=SPECTATOR_INTERVAL)
+spectator_feed.start()
+
+def spectate_turn(room):
+    """A new turn wiped the canvas and changed the drawer"""
+    if room.spectators:
+        spectator_feed.cleared(room.room_id)
+        spectator_feed.state_changed(room.room_id)
+
+def stop_spectating(sid):
+    """Take a socket out of the room it was watching, if any"""
+    session = spectator_sessions.unbind(sid)
+    if session is None:
+        return
+    room_id, spectator_id = session
+    leave_room(watch_room(room_id), sid=sid)
+    with game_manager.room_transaction(room_id) as room:
+        if room is not None:
+            room.remove_spectator(spectator_id)
+
+def close_spectators(room_id):
+    """The room is gone: tell its spectators and drop their sockets"""
+    spectator_feed.discard(room_id)
+    if spectator_sessions.drop_room(room_id):
+        socketio.emit('room_closed', {'room_id': room_id}, room=watch_room(room_id))
+    socketio.close_room(watch_room(room_id))
+
+# ========== GALLERY ==========
+# room_id -> drawings of the room's current game, oldest first. The PNGs
+# live in the thumbnailer's cache under (room_id, turn_id) and may be
+# evicted before the entry is.
+galleries = {}
+THUMBNAIL_WAIT = 2.0  # seconds a request waits for a drawing still rendering
+
+def add_to_gallery(room, word):
+    """Queue the finished turn's drawing for a thumbnail"""
+    snapshot = room.canvas_data.snapshot()
+    if not snapshot:
+        return
+    drawer = room.players.get(room.current_drawer)
+    thumbnailer.submit((room.room_id, room.turn_id), snapshot)
+    galleries.setdefault(room.room_id, []).append({
+        'turn_id': room.turn_id,
+        'drawer': drawer.username if drawer else None,
+        'word': word,
+        'url': f'/gallery/{room.room_id}/{room.turn_id}.png'
+    })
+
+def clear_gallery(room_id):
+    thumbnailer.discard([(room_id, d['turn_id']) for d in galleries.pop(room_id, ())])
+
+# ========== METRICS ==========
+# Exported in the Prometheus text format on /metrics. NEON_METRICS=0 turns
+# off the per-event timing and emit metering (gauges are still served)
+METRICS_ENABLED = os.environ.get('NEON_METRICS', '1') != '0'
+metrics = Registry()
+EVENT_LATENCY = metrics.histogram('neon_socket_event_seconds', 'Socket.IO handler latency', ['event'])
+HTTP_LATENCY = metrics.histogram('neon_http_request_seconds', 'HTTP request latency',
+                                 ['route', 'method', 'status'])
+EMITTED_BYTES = metrics.counter('neon_emitted_bytes', 'Bytes sent to Socket.IO clients, per recipient')
+DROPPED_EVENTS = metrics.counter('neon_dropped_events', 'Client events dropped by admission control',
+                                 ['event', 'reason'])
+BROADCAST_FANOUT = metrics.histogram('neon_emit_fanout', 'Recipients per emit', buckets=FANOUT_BUCKETS)
+broadcast_meter = BroadcastMeter(EMITTED_BYTES, BROADCAST_FANOUT)
+if METRICS_ENABLED:
+    broadcast_meter.install(socketio.server)
+
+# Room gauges are computed once per scrape by /metrics
+scrape = {'rooms': {}, 'occupancy': {}}
+metrics.gauge('neon_socket_events_per_second', 'Socket.IO events handled per second since the last scrape',
+              RateMeter(EVENT_LATENCY.count))
+metrics.gauge('neon_rooms', 'Rooms by recent activity', lambda: {
+    (state,): scrape['rooms'].get(state, 0) for state in ('live', 'idle')}, ['state'])
+metrics.gauge('neon_rooms_evicted', 'Idle rooms evicted since start', lambda: scrape['rooms'].get('evicted', 0))
+metrics.gauge('neon_players', 'Players seated in rooms', lambda: scrape['occupancy'].get('players', 0))
+metrics.gauge('neon_canvas_batches', 'Stored stroke batches across rooms',
+              lambda: scrape['occupancy'].get('canvas_batches', 0))
+metrics.gauge('neon_canvas_bytes', 'Stored canvas bytes across rooms',
+              lambda: scrape['occupancy'].get('canvas_bytes', 0))
+metrics.gauge('neon_connections', 'Sockets bound to a room', lambda: len(sessions))
+metrics.gauge('neon_spectators', 'Sockets watching a room', lambda: len(spectator_sessions))
+metrics.gauge('neon_pending_strokes', 'Stroke chunks waiting for the next flush', stroke_batcher.pending)
+metrics.gauge('neon_timers', 'Pending round, session and reaper timers', lambda: len(round_scheduler))
+metrics.gauge('neon_recorder_pending', 'Game events waiting to be written to disk', game_recorder.pending)
+metrics.gauge('neon_thumbnails_pending', 'Drawings waiting to be rendered', thumbnailer.pending)
+metrics.gauge('neon_thumbnail_cache_bytes', 'PNG thumbnails held in memory', lambda: thumbnailer.cache.nbytes)
+metrics.gauge('neon_recorded_bytes', 'Bytes of game logs written since start', lambda: game_recorder.bytes_written)
+
+def on_event(event):
+    """socketio.on() that also records the handler's latency"""
+    def decorator(handler):
+        if METRICS_ENABLED:
+            handler = timed(EVENT_LATENCY, event)(handler)
+        return socketio.on(event)(handler)
+    return decorator
+
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+def record_request_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_LATENCY.labels(route, request.method, str(response.status_code)).observe(
+            time.perf_counter() - start)
+    return response
+
+if METRICS_ENABLED:
+    app.before_request(start_request_timer)
+    app.after_request(record_request_latency)
+
+# ========== ADMISSION ==========
+# Draw, clear and chat events are checked against the sender's role and budget
+# before the server schedules their handler, so a flooding client is
+# turned away for the price of a few dict lookups per event
+LEGACY_SEGMENT_BYTES = 12  # about what a dict segment costs once encoded
+
+def admit_event(sid, data):
+    """Whether to run the handler for data = [event, *args] from sid"""
+    event = data[0]
+    if event == 'draw':
+        reason = check_draw(sid, data[1] if len(data) > 1 else None)
+    elif event == 'clear_canvas':
+        reason = check_role(sid, drawer=True)
+    elif event == 'chat_message':
+        reason = check_role(sid) or admission.chat(sid)
+        if reason == 'rate' and admission.first_drop(sid):
+            socketio.emit('chat_message', {
+                'type': 'system',
+                'message': 'You are sending messages too fast',
+                'timestamp': chat_time()
+            }, to=sid)
+    else:
+        return True
+    if reason is None:
+        return True
+    DROPPED_EVENTS.labels(event, reason).inc()
+    if admission.abusive(sid):
+        DROPPED_EVENTS.labels('connection', 'abusive').inc()
+        admission.forget(sid)
+        socketio.server.disconnect(sid)
+    return False
+
+def check_role(sid, drawer=False):
+    """'not_seated' unless sid is bound to a seat in a live room ('not_drawer'
+    unless it is the current drawer's, when drawer is set), else None"""
+    session = sessions.get(sid)
+    room = game_manager.rooms.get(session[0]) if session is not None else None
+    if room is None or session[1] not in room.players:
+        reason = 'not_seated'
+    elif drawer and (room.game_state != "drawing" or room.current_drawer != session[1]):
+        reason = 'not_drawer'
+    else:
+        return None
+    admission.reject(sid, reason)
+    return reason
+
+def check_draw(sid, payload):
+    """Why a draw event must be dropped, or None to let it through"""
+    # Only the socket bound to the drawer's seat may draw, whatever ids it sends
+    reason = check_role(sid, drawer=True)
+    if reason is not None:
+        return reason
+    draw_data = payload.get('data') if isinstance(payload, dict) else None
+    if isinstance(draw_data, (bytes, bytearray)):
+        nbytes = len(draw_data)
+    else:
+        nbytes = LEGACY_SEGMENT_BYTES * (len(draw_data) if isinstance(draw_data, list) else 1)
+    return admission.draw(sid, nbytes)
+
+def drop_event(event, reason):
+    """Count an event a handler turned away"""
+    admission.reject(request.sid, reason)
+    DROPPED_EVENTS.labels(event, reason).inc()
+
+gate_events(socketio.server, admit_event)
 
 # ========== NETWORK FUNCTIONS ==========
 def get_local_ip():
@@ -32,14 +575,17 @@ def get_local_ip():
         except:
             return "localhost"
 
+public_ip_cache = PublicIPCache()
+
 def get_public_ip():
-    """Get public IP (optional)"""
-    try:
-        import requests
-        response = requests.get('https://api.ipify.org?format=json', timeout=3)
-        return response.json()['ip']
-    except:
+    """Get public IP (optional); served from a background-refreshed cache"""
+    if HEADLESS:
         return None
+    return public_ip_cache.get()
+
+def listening_port():
+    """Port this server was started on, or the one the request came in on"""
+    return PORT or int(request.environ.get('SERVER_PORT') or 5000)
 
 def find_available_port(start_port=5000):
     """Find an available port starting from start_port"""
@@ -75,11 +621,66 @@ def setup_firewall(port):
         except:
             print("⚠️  Could not configure firewall automatically")
 
+# ========== STATIC ASSETS ==========
+# Static files are minified, fingerprinted and compressed once at startup and
+# served from /assets/ with immutable cache headers. NEON_ASSETS=0 serves
+# them from /static/ as they are and renders the page on every request.
+ASSETS_ENABLED = os.environ.get('NEON_ASSETS', '1') != '0'
+asset_pipeline = AssetPipeline(app.static_folder).build() if ASSETS_ENABLED else None
+
+# Rendered index page per URL root (it embeds the root); bounded because the
+# root comes from the Host header
+index_pages = {}
+MAX_INDEX_PAGES = 64
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file, fingerprinted when the pipeline built it"""
+    path = asset_pipeline.url_path(filename) if asset_pipeline else None
+    if path is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', path=path)
+
+def encoded_response(variants, content_type, etag, cache_control):
+    """Best encoding the client accepts, or 304 if it already has it"""
+    coding = negotiate(variants, request.accept_encodings)
+    headers = {
+        'ETag': f'"{etag}-{coding}"',
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding'
+    }
+    if request.if_none_match.contains(f'{etag}-{coding}'):
+        return Response(status=304, headers=headers)
+    if coding != 'identity':
+        headers['Content-Encoding'] = coding
+    return Response(variants[coding], content_type=content_type, headers=headers)
+
+def index_page():
+    """The game page, rendered once per URL root"""
+    if not ASSETS_ENABLED:
+        return render_template('index.html')
+    page = index_pages.get(request.url_root)
+    if page is None:
+        body = render_template('index.html').encode('utf-8')
+        page = (fingerprint(body), compress(body))
+        if len(index_pages) < MAX_INDEX_PAGES:
+            index_pages[request.url_root] = page
+    # The page names the current asset URLs, so it is revalidated every load
+    return encoded_response(page[1], 'text/html; charset=utf-8', page[0], 'no-cache')
+
 # ========== ROUTES ==========
 @app.route('/')
 def index():
     """Serve the main game interface"""
-    return render_template('index.html')
+    return index_page()
+
+@app.route('/assets/<path:path>')
+def serve_asset(path):
+    """Fingerprinted static file; its URL changes whenever its content does"""
+    asset = asset_pipeline.get(path) if asset_pipeline else None
+    if asset is None:
+        return "Not found", 404
+    return encoded_response(asset.variants, asset.content_type, asset.etag, IMMUTABLE)
 
 @app.route('/create-room', methods=['POST'])
 def create_room():
@@ -87,17 +688,21 @@ def create_room():
     data = request.get_json()
     username = data.get('username', 'Player')
     max_players = data.get('max_players', 8)
+    category = data.get('category')
+    difficulty = data.get('difficulty')
+    public = bool(data.get('public', False))
     
     # Generate player ID
     player_id = str(uuid.uuid4())
     
     # Create room
-    room_id = game_manager.create_room(player_id, username, max_players)
+    room_id = game_manager.create_room(player_id, username, max_players, category, difficulty, public)
     
     return jsonify({
         'success': True,
         'room_id': room_id,
         'player_id': player_id,
+        'token': game_manager.seat_token(room_id, player_id),
         'username': username
     })
 
@@ -119,6 +724,7 @@ def join_room_endpoint():
             'success': True,
             'room_id': room_id,
             'player_id': player_id,
+            'token': game_manager.seat_token(room_id, player_id),
             'username': username
         })
     else:
@@ -127,29 +733,132 @@ def join_room_endpoint():
             'message': 'Room not found or game already started'
         })
 
+@app.route('/quick-join', methods=['POST'])
+def quick_join():
+    """Join the best open public room, or open a new one if none has space"""
+    data = request.get_json() or {}
+    username = data.get('username', 'Player')
+    player_id = str(uuid.uuid4())
+
+    room_id = game_manager.quick_join(player_id, username)
+    created = room_id is None
+    if created:
+        room_id = game_manager.create_room(player_id, username, public=True)
+
+    return jsonify({
+        'success': True,
+        'room_id': room_id,
+        'player_id': player_id,
+        'token': game_manager.seat_token(room_id, player_id),
+        'username': username,
+        'created': created
+    })
+
+@app.route('/lobby')
+def lobby_listing():
+    """Public rooms, a page at a time (open waiting rooms by default)"""
+    state = request.args.get('state', 'waiting')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    page = game_manager.lobby.page(state, offset, limit, min_free=1 if state == 'waiting' else 0)
+    response = jsonify({'success': True, **page})
+    response.headers['Cache-Control'] = f'public, max-age={int(game_manager.lobby.page_ttl)}'
+    return response
+
 @app.route('/room/<room_id>')
 def room(room_id):
     """Room page"""
     if room_id in game_manager.rooms:
-        return render_template('index.html')
+        return index_page()
     return "Room not found", 404
 
+@app.route('/leaderboard')
+def global_leaderboard():
+    """Top players across all rooms, optionally with one player's rank"""
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    board = game_manager.global_leaderboard
+    result = {
+        'success': True,
+        'leaderboard': board.to_list(limit)
+    }
+    player_id = request.args.get('player_id')
+    if player_id:
+        result['rank'] = board.rank(player_id)
+        result['score'] = board.score(player_id)
+    return jsonify(result)
+
 @app.route('/network-info')
 def network_info():
     """Get network information for sharing"""
     local_ip = get_local_ip()
     public_ip = get_public_ip()
+    port = listening_port()
     
     return jsonify({
         'success': True,
         'local_ip': local_ip,
         'public_ip': public_ip,
-        'local_url': f'http://{local_ip}:{PORT}',
-        'public_url': f'http://{public_ip}:{PORT}' if public_ip else None,
-        'localhost_url': f'http://localhost:{PORT}',
+        'local_url': f'http://{local_ip}:{port}',
+        'public_url': f'http://{public_ip}:{port}' if public_ip else None,
+        'localhost_url': f'http://localhost:{port}',
         'instructions': 'Share the local URL with friends on same WiFi network'
     })
 
+@app.route('/recordings')
+def list_recordings():
+    """Finished recorded games, newest first"""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({
+        'success': True,
+        'recordings': [game for game in game_recorder.games() if listable(game)][:limit]
+    })
+
+def listable(game):
+    """Whether a recording may be listed publicly
+
+    Game ids carry the room code, which is all it takes to join or spectate
+    a private room: games still being played are left out, and so are
+    games of private rooms that are still open.
+    """
+    if game['recording']:
+        return False
+    room = game_manager.rooms.get(game['room_id'])
+    return room is None or room.public
+
+@app.route('/recordings/<game_id>')
+def download_recording(game_id):
+    """Raw log of one recorded game (see game_recorder for the format)"""
+    path = game_recorder.path_of(game_id)
+    # A game still in progress would give away the current word
+    if path is None or not os.path.isfile(path) or game_recorder.recording(game_id):
+        return "Recording not found", 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True)
+
+@app.route('/gallery/<room_id>')
+def room_gallery(room_id):
+    """Finished drawings of the room's current (or last) game"""
+    if room_id not in galleries and room_id not in game_manager.rooms:
+        return "Room not found", 404
+    return jsonify({
+        'success': True,
+        'drawings': galleries.get(room_id, [])
+    })
+
+@app.route('/gallery/<room_id>/<int:turn_id>.png')
+def gallery_thumbnail(room_id, turn_id):
+    """PNG thumbnail of one finished drawing"""
+    png = thumbnailer.get((room_id, turn_id), THUMBNAIL_WAIT)
+    if png is None:
+        return "Thumbnail not found", 404
+    return encoded_response({'identity': png}, 'image/png', fingerprint(png), 'public, max-age=3600')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape target"""
+    scrape['rooms'] = game_manager.room_stats()
+    scrape['occupancy'] = game_manager.occupancy()
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/system-info')
 def system_info():
     """Get system information"""
@@ -157,223 +866,392 @@ def system_info():
     
     return jsonify({
         'local_ip': local_ip,
-        'port': PORT,
+        'port': listening_port(),
         'python_version': platform.python_version(),
         'os': platform.system(),
-        'server_running': True
+        'server_running': True,
+        'rooms': game_manager.room_stats(),
+        'connections': len(sessions),
+        'dropped_events': dict(admission.totals),
+        # Opaque tags only: room and player ids here would point at seats to hijack
+        'throttled_clients': [
+            {'client': client_tag(sid), 'drops': drops} for sid, drops in admission.top(10)
+        ]
     })
 
+_TAG_KEY = os.urandom(16)
+
+def client_tag(sid):
+    """A stable, unguessable stand-in for a socket id in public output"""
+    return hashlib.blake2b(sid.encode(), key=_TAG_KEY, digest_size=6).hexdigest()
+
 # ========== SOCKET.IO EVENTS ==========
-@socketio.on('connect')
-def handle_connect():
+@on_event('connect')
+def handle_connect(auth=None):
     """Handle client connection"""
     emit('connected', {'message': 'Connected to server'})
 
-@socketio.on('join')
+@on_event('join')
 def handle_join(data):
-    """Handle player joining a room via socket"""
+    """Handle player joining a room via socket
+
+    The socket takes the seat only with the seat's token (returned by
+    /create-room, /join-room and /quick-join); player ids are public.
+    """
     room_id = data.get('room_id')
     player_id = data.get('player_id')
     
-    if room_id in game_manager.rooms:
+    # Land pending strokes before taking the room lock (the batcher takes
+    # its flush lock first, then the room's)
+    stroke_batcher.flush_room(room_id)
+
+    with game_manager.room_transaction(room_id) as room:
+        if room is None:
+            return
+        # Queued chat is already in the history the joiner gets below
+        chat_batcher.flush_room(room_id)
         join_room(room_id)
-        room = game_manager.rooms[room_id]
+        player = room.players.get(player_id)
+        if player is not None and player.check_token(data.get('token')):
+            # A reconnect inside the grace period keeps the seat
+            sessions.bind(request.sid, room_id, player_id)
+            round_scheduler.cancel(('grace', room_id, player_id))
+        else:
+            player = None
         
-        # Send room update to all clients
-        emit('room_update', room.get_room_data(), room=room_id)
+        # Others get what changed; the joiner gets the full state
+        broadcast_room_delta(room, skip_sid=request.sid)
+        emit('room_update', room.get_room_data())
+
+        # Catch the joiner up on the drawing so far in one message
+        snapshot = room.canvas_data.snapshot()
+        if snapshot:
+            emit('canvas_snapshot', snapshot)
+        if room.chat_messages:
+            emit('chat_history', list(room.chat_messages))
         
         # Send system message
-        player = room.players.get(player_id)
         if player:
-            emit('chat_message', {
+            send_chat(room, {
                 'type': 'system',
                 'message': f'{player.username} joined the room',
-                'timestamp': time.strftime('%H:%M')
-            }, room=room_id)
+                'timestamp': chat_time()
+            })
 
-@socketio.on('leave')
+@on_event('leave')
 def handle_leave(data):
     """Handle player leaving a room"""
-    room_id = data.get('room_id')
-    player_id = data.get('player_id')
-    
+    room_id, player_id = current_session()
+    if room_id is None:
+        return
+    sessions.unbind(request.sid)
     if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
-        player = room.players.get(player_id)
-        
-        # Remove player
-        game_manager.leave_room(room_id, player_id)
         leave_room(room_id)
-        
-        # Send update to remaining players
-        if room_id in game_manager.rooms:
-            emit('room_update', game_manager.rooms[room_id].get_room_data(), room=room_id)
-            
-            if player:
-                emit('chat_message', {
-                    'type': 'system',
-                    'message': f'{player.username} left the room',
-                    'timestamp': time.strftime('%H:%M')
-                }, room=room_id)
-
-@socketio.on('start_game')
+    remove_player(room_id, player_id)
+
+@on_event('disconnect')
+def handle_disconnect():
+    """Hold the player's seat for RECONNECT_GRACE seconds, then let them go"""
+    stop_replay(request.sid)
+    stop_spectating(request.sid)
+    admission.forget(request.sid)
+    session = sessions.unbind(request.sid)
+    if session is None:
+        return
+    room_id, player_id = session
+    round_scheduler.schedule(('grace', room_id, player_id), RECONNECT_GRACE,
+                             lambda: expire_session(room_id, player_id))
+
+@on_event('start_game')
 def handle_start_game(data):
     """Handle game start"""
-    room_id = data.get('room_id')
+    room_id, _ = current_session()
+    if room_id is None:
+        return
     
-    if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
-        success = room.start_game()
+    with game_manager.room_transaction(room_id) as room:
+        turn_info = game_manager.start_game(room_id)
         
-        if success:
-            turn_info = room.next_turn()
+        if turn_info:
+            clear_gallery(room_id)
+            schedule_round_end(room)
             emit('game_started', {
-                **room.get_room_data(),
+                **full_room_data(room),
                 **turn_info
             }, room=room_id)
+            game_recorder.begin(room_id, {
+                'players': [p.to_dict() for p in room.players.values()],
+                'max_rounds': room.max_rounds,
+                'round_time': room.round_time
+            })
+            record_turn(room, turn_info)
+            spectate_turn(room)
             
-            emit('chat_message', {
+            send_chat(room, {
                 'type': 'system',
                 'message': 'Game started!',
-                'timestamp': time.strftime('%H:%M')
-            }, room=room_id)
+                'timestamp': chat_time()
+            })
 
-@socketio.on('draw')
+@on_event('draw')
 def handle_draw(data):
-    """Handle drawing data"""
-    room_id = data.get('room_id')
+    """Handle drawing data (admit_event already checked role and budget)"""
+    session = sessions.get(request.sid)
     draw_data = data.get('data')
-    
-    if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
-        room.canvas_data.append(draw_data)
-        emit('draw_update', draw_data, room=room_id, include_self=False)
+    if session is None or not draw_data:
+        return
+
+    # Binary stroke buffers are relayed as-is; legacy dict segments get encoded
+    if isinstance(draw_data, (bytes, bytearray)):
+        chunk = bytes(draw_data)
+        if not stroke_codec.is_valid(chunk):
+            drop_event('draw', 'invalid')
+            return
+    else:
+        try:
+            segments = draw_data if isinstance(draw_data, list) else [draw_data]
+            chunk = stroke_codec.encode_segments(segments)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            drop_event('draw', 'invalid')
+            return
+    stroke_batcher.add(session[0], chunk, request.sid)
 
-@socketio.on('clear_canvas')
+@on_event('clear_canvas')
 def handle_clear_canvas(data):
     """Handle canvas clear"""
-    room_id = data.get('room_id')
-    if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
-        room.canvas_data = []
+    room_id, player_id = current_session()
+    if room_id is None:
+        return
+    with game_manager.room_transaction(room_id) as room:
+        if room is None or room.current_drawer != player_id:
+            return
+        stroke_batcher.discard(room_id)
+        room.canvas_data.clear()
         emit('canvas_cleared', {}, room=room_id)
+        game_recorder.record(room_id, rec.CLEAR, {})
+        if room.spectators:
+            spectator_feed.cleared(room_id)
 
-@socketio.on('chat_message')
+@on_event('chat_message')
 def handle_chat_message(data):
     """Handle chat messages"""
-    room_id = data.get('room_id')
-    player_id = data.get('player_id')
+    room_id, player_id = current_session()
     message = data.get('message')
+    if room_id is None or not isinstance(message, str):
+        return
     
-    if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
+    with game_manager.room_transaction(room_id) as room:
+        if room is None:
+            return
         player = room.players.get(player_id)
         
         if player and message.strip():
             # Check if it's a guess
-            if room.game_state == "drawing" and player_id != room.current_drawer:
-                guess_result = room.submit_guess(player_id, message)
-                
+            guess_result = game_manager.submit_guess(room_id, player_id, message)
+            if guess_result is not None:
                 if guess_result['correct']:
-                    emit('chat_message', {
+                    chat = {
                         'type': 'correct_guess',
                         'player': player.username,
                         'message': f'guessed the word: {guess_result["word"]}! +{guess_result["score"]} points',
-                        'timestamp': time.strftime('%H:%M')
-                    }, room=room_id)
+                        'timestamp': chat_time()
+                    }
+                    send_chat(room, chat)
+                    if room.spectators:
+                        spectator_feed.event(room_id, 'chat_message', chat)
                     
-                    emit('room_update', room.get_room_data(), room=room_id)
+                    finish_turn(room, guess_result['word'], 'guessed')
                 else:
-                    emit('chat_message', {
+                    chat = {
                         'type': 'guess',
                         'player': player.username,
                         'message': message,
-                        'timestamp': time.strftime('%H:%M')
-                    }, room=room_id)
+                        'timestamp': chat_time()
+                    }
+                    send_chat(room, chat)
+
+                    # Only the guesser learns they were close; their guess shows first
+                    if guess_result['close']:
+                        chat_batcher.flush_room(room_id)
+                        emit('chat_message', {
+                            'type': 'system',
+                            'message': f'"{message}" is close!',
+                            'timestamp': chat_time()
+                        })
             else:
-                emit('chat_message', {
+                chat = {
                     'type': 'message',
                     'player': player.username,
                     'message': message,
-                    'timestamp': time.strftime('%H:%M')
-                }, room=room_id)
+                    'timestamp': chat_time()
+                }
+                send_chat(room, chat)
 
-@socketio.on('get_room_data')
+@on_event('get_room_data')
 def handle_get_room_data(data):
-    """Send room data to requesting client"""
+    """Send full room data to requesting client (also used to resync after a version gap)"""
     room_id = data.get('room_id')
-    if room_id in game_manager.rooms:
-        room = game_manager.rooms[room_id]
+    room = game_manager.rooms.get(room_id)
+    if room is not None:
+        emit('room_update', room.get_room_data())
+
+@on_event('spectate')
+def handle_spectate(data):
+    """Watch a room without a seat: no guessing, no score, coalesced updates"""
+    room_id = data.get('room_id')
+    username = str(data.get('username') or 'Spectator')[:20]
+    spectator_id = str(uuid.uuid4())
+    stop_spectating(request.sid)
+    stroke_batcher.flush_room(room_id)
+
+    with game_manager.room_transaction(room_id) as room:
+        if room is None or not room.add_spectator(spectator_id, username):
+            emit('spectate_failed', {'message': 'Room not found or no spectator places left'})
+            return
+        spectator_sessions.bind(request.sid, room_id, spectator_id)
+        join_room(watch_room(room_id))
         emit('room_update', room.get_room_data())
+        snapshot = room.canvas_data.snapshot()
+        if snapshot:
+            emit('canvas_snapshot', snapshot)
+
+@on_event('stop_spectating')
+def handle_stop_spectating(data=None):
+    """Stop watching the room"""
+    stop_spectating(request.sid)
+
+@on_event('replay')
+def handle_replay(data):
+    """Stream a recorded game to this socket at 1x or faster"""
+    game_id = data.get('game_id')
+    path = game_recorder.path_of(game_id)
+    if path is None or not os.path.isfile(path):
+        emit('replay_error', {'message': 'Recording not found'})
+        return
+    if game_recorder.recording(game_id):
+        emit('replay_error', {'message': 'That game is still being played'})
+        return
+    try:
+        speed = min(max(float(data.get('speed', 1)), 1), MAX_REPLAY_SPEED)
+    except (TypeError, ValueError):
+        speed = 1
+    stop_replay(request.sid)
+    stop = replays[request.sid] = threading.Event()
+    socketio.start_background_task(stream_replay, path, request.sid, speed, stop)
+
+@on_event('stop_replay')
+def handle_stop_replay(data=None):
+    """Stop the replay streaming to this socket"""
+    stop_replay(request.sid)
+
+# ========== SERVER ==========
+def run_server(port):
+    """Serve on the configured async mode"""
+    if ASYNC_MODE == 'threading':
+        # Werkzeug dev server, one OS thread per connection
+        socketio.run(app, 
+                    host='0.0.0.0', 
+                    port=port, 
+                    debug=False, 
+                    allow_unsafe_werkzeug=True,
+                    use_reloader=False,
+                    log_output=True)
+    else:
+        # eventlet.wsgi: one green thread per connection
+        socketio.run(app,
+                    host='0.0.0.0',
+                    port=port,
+                    debug=False,
+                    use_reloader=False,
+                    log_output=True)
 
 # ========== GLOBAL PORT VARIABLE ==========
+# Set when app.py is the entry point; under gunicorn see listening_port()
 PORT = None
 
-# ========== MAIN ENTRY POINT ==========
-if __name__ == '__main__':
-    # Find available port
-    PORT = find_available_port(5000)
-    
-    # Setup firewall for the found port
-    setup_firewall(PORT)
-    
-    # Get IP addresses
+# ========== STARTUP ==========
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Neon Draw & Guess server')
+    parser.add_argument('--headless', action='store_true', default=HEADLESS,
+                        help='fixed port; no browser, firewall setup or network discovery (NEON_HEADLESS=1)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('NEON_PORT') or 0) or None,
+                        help='port to serve on (NEON_PORT); by default 5000, or the first free port '
+                             'from 5000 when not headless')
+    return parser.parse_args(argv)
+
+def wait_until_listening(port, timeout=10):
+    """Poll until the server accepts connections on port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def announce(port):
+    """Set up the firewall, look up addresses, print them and open the browser
+
+    Runs on its own thread while the server starts, so neither a slow
+    network nor the browser delays the first accepted connection.
+    """
+    setup_firewall(port)
     local_ip = get_local_ip()
-    public_ip = get_public_ip()
+    public_ip = public_ip_cache.refresh()
     
     # Display beautiful interface
     print("\n" + "═" * 60)
     print("🎮" + " " * 10 + "NEON DRAW & GUESS" + " " * 10 + "🎨")
     print("═" * 60)
-    print(f"\n🚀 SERVER STARTED ON PORT: {PORT}")
+    print(f"\n🚀 SERVER STARTED ON PORT: {port}")
     print("─" * 40)
-    print(f"   🌐 Local Host:  http://localhost:{PORT}")
-    print(f"   📶 Local IP:    http://{local_ip}:{PORT}")
+    print(f"   🌐 Local Host:  http://localhost:{port}")
+    print(f"   📶 Local IP:    http://{local_ip}:{port}")
     if public_ip:
-        print(f"   🌍 Public IP:   http://{public_ip}:{PORT}")
+        print(f"   🌍 Public IP:   http://{public_ip}:{port}")
     
     print("\n📢 HOW TO CONNECT:")
     print("─" * 40)
-    print(f"   1. Open http://localhost:{PORT} on this device")
-    print(f"   2. Share http://{local_ip}:{PORT} with friends on same WiFi")
+    print(f"   1. Open http://localhost:{port} on this device")
+    print(f"   2. Share http://{local_ip}:{port} with friends on same WiFi")
     if public_ip:
-        print(f"   3. Share http://{public_ip}:{PORT} for internet access")
+        print(f"   3. Share http://{public_ip}:{port} for internet access")
     
     print("\n🔧 STATUS: ✅ Server is ready")
     print("═" * 60)
     print("\n⏳ Opening browser... (Press Ctrl+C to stop)\n")
     
-    # Open browser automatically after a delay
-    def open_browser_with_port():
-        time.sleep(2)
-        webbrowser.open(f"http://localhost:{PORT}")
-    
-    browser_thread = threading.Thread(target=open_browser_with_port, daemon=True)
-    browser_thread.start()
-    
-    # Start server with dynamic port
-    try:
-        socketio.run(app, 
-                    host='0.0.0.0', 
-                    port=PORT, 
-                    debug=False, 
-                    allow_unsafe_werkzeug=True,
-                    use_reloader=False,
-                    log_output=True)
-    except KeyboardInterrupt:
-        print("\n\n✅ Server stopped gracefully")
-    except Exception as e:
-        print(f"\n❌ Server error: {e}")
-        # Try alternative port if first fails
-        alt_port = find_available_port(PORT + 1)
-        print(f"💡 Trying alternative port {alt_port}...")
+    if wait_until_listening(port):
+        webbrowser.open(f"http://localhost:{port}")
+
+# ========== MAIN ENTRY POINT ==========
+if __name__ == '__main__':
+    args = parse_args()
+    # Exit through atexit on SIGTERM too, so the thumbnail workers are shut down
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    if args.headless:
+        # No probing and no fallback port: a supervisor should see a bind failure
+        PORT = args.port or 5000
+        print(f"🚀 Serving on port {PORT} (headless)")
+        run_server(PORT)
+    else:
+        PORT = args.port or find_available_port(5000)
+        threading.Thread(target=announce, args=(PORT,), name='announce', daemon=True).start()
+        
+        # Start server with dynamic port
         try:
-            PORT = alt_port
-            socketio.run(app, 
-                        host='0.0.0.0', 
-                        port=PORT, 
-                        debug=False, 
-                        allow_unsafe_werkzeug=True,
-                        use_reloader=False)
-        except Exception as e2:
-            print(f"❌ Failed to start server: {e2}")
\ No newline at end of file
+            run_server(PORT)
+        except KeyboardInterrupt:
+            print("\n\n✅ Server stopped gracefully")
+        except Exception as e:
+            print(f"\n❌ Server error: {e}")
+            # Try alternative port if first fails
+            alt_port = find_available_port(PORT + 1)
+            print(f"💡 Trying alternative port {alt_port}...")
+            try:
+                PORT = alt_port
+                run_server(PORT)
+            except Exception as e2:
+                print(f"❌ Failed to start server: {e2}")
\ No newline at end of file
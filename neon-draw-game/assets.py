@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import os
+import re
+from typing import Dict, NamedTuple, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants are always built
+    brotli = None
+
+MINIFIERS = {}  # extension -> minify(text) -> text
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class Asset(NamedTuple):
+    path: str  # fingerprinted path, e.g. js/game.3f2a9c1b0d4e.js
+    content_type: str
+    etag: str
+    variants: Dict[str, bytes]  # content-coding ('identity', 'gzip', 'br') -> body
+
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    """identity, gzip and (if available) brotli encodings of a body
+
+    A compressed variant is only kept when it is actually smaller.
+    """
+    variants = {'identity': body}
+    packed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(packed) < len(body):
+        variants['gzip'] = packed
+    if brotli is not None:
+        packed = brotli.compress(body, quality=11)
+        if len(packed) < len(body):
+            variants['br'] = packed
+    return variants
+
+
+def negotiate(variants: Dict[str, bytes], accept_encoding) -> str:
+    """Best content-coding the client accepts (werkzeug Accept object)"""
+    for coding in ('br', 'gzip'):
+        if coding in variants and accept_encoding[coding]:
+            return coding
+    return 'identity'
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:12]
+
+
+class AssetPipeline:
+    """Static files minified, fingerprinted and precompressed once at startup
+
+    Each file under the static folder is served at a path carrying a hash
+    of its content, so it can be cached forever: a change produces a new
+    URL. Lookups afterwards are a dict access; nothing is read, minified or
+    compressed per request.
+    """
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+        self.manifest: Dict[str, str] = {}  # source path -> fingerprinted path
+        self.assets: Dict[str, Asset] = {}  # fingerprinted path -> asset
+        self.source_bytes = 0
+
+    def build(self) -> 'AssetPipeline':
+        for root, _, files in os.walk(self.static_dir):
+            for filename in sorted(files):
+                full = os.path.join(root, filename)
+                source = os.path.relpath(full, self.static_dir).replace(os.sep, '/')
+                with open(full, 'rb') as f:
+                    body = f.read()
+                self.source_bytes += len(body)
+                stem, ext = os.path.splitext(source)
+                minify = MINIFIERS.get(ext)
+                if minify is not None:
+                    body = minify(body.decode('utf-8')).encode('utf-8')
+                digest = fingerprint(body)
+                path = f'{stem}.{digest}{ext}'
+                self.manifest[source] = path
+                self.assets[path] = Asset(path, CONTENT_TYPES.get(ext, 'application/octet-stream'),
+                                          digest, compress(body))
+        return self
+
+    def url_path(self, source: str) -> Optional[str]:
+        """Fingerprinted path for a static file, or None if it isn't built"""
+        return self.manifest.get(source)
+
+    def get(self, path: str) -> Optional[Asset]:
+        return self.assets.get(path)
+
+
+# ========== MINIFIERS ==========
+# Conservative: comments and indentation go, line breaks stay (so automatic
+# semicolon insertion still sees them), and string, template and regex
+# literals are copied untouched.
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/|\s+', re.S)
+_CSS_PUNCT = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(text: str) -> str:
+    def token(match):
+        if match.group(1):
+            return match.group(1)
+        return '' if match.group(0).startswith('/*') else ' '
+
+    out = []
+    for i, part in enumerate(re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')', _CSS_TOKENS.sub(token, text))):
+        # Odd parts are string literals
+        out.append(part if i % 2 else _CSS_PUNCT.sub(r'\1', part).replace(';}', '}'))
+    return ''.join(out).strip()
+
+
+_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw')
+
+
+def _regex_allowed(out) -> bool:
+    """Whether a '/' after the output so far starts a regex literal"""
+    text = ''.join(out[-12:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_AFTER:
+        return True
+    word = re.search(r'[A-Za-z_$]+$', text)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+
+def minify_js(text: str) -> str:
+    out = []
+    i, n = 0, len(text)
+    braces = []  # open template ${ } expressions: brace depth inside each
+    pending_space = False
+    while i < n:
+        c = text[i]
+        if c in ' \t\r':
+            pending_space = True
+            i += 1
+            continue
+        if c == '\n':
+            if out and out[-1] != '\n':
+                out.append('\n')
+            pending_space = False
+            i += 1
+            continue
+        if c == '/' and text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if c == '/' and text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            pending_space = True
+            continue
+        if pending_space and out and out[-1] != '\n':
+            if (out[-1][-1:].isalnum() or out[-1][-1:] in '_$') and (c.isalnum() or c in '_$\\'):
+                out.append(' ')
+            elif out[-1][-1:] in '+-' and c == out[-1][-1:]:
+                out.append(' ')  # keep `a + +b` and `a - -b` apart
+        pending_space = False
+
+        if c in '\'"':
+            start = i
+            i += 1
+            while i < n and text[i] != c:
+                i += 2 if text[i] == '\\' else 1
+            i += 1
+            out.append(text[start:i])
+        elif c == '`' or (c == '}' and braces and braces[-1] == 0):
+            # Template literal, or its text resuming after a ${ } expression
+            if c == '}':
+                braces.pop()
+            start = i
+            i += 1
+            while i < n and text[i] != '`':
+                if text[i] == '\\':
+                    i += 2
+                elif text.startswith('${', i):
+                    break
+                else:
+                    i += 1
+            if i < n and text[i] == '`':
+                i += 1
+            else:
+                i += 2
+                braces.append(0)
+            out.append(text[start:i])
+        elif c == '/' and _regex_allowed(out):
+            start = i
+            i += 1
+            in_class = False
+            while i < n and (in_class or text[i] != '/'):
+                if text[i] == '\\':
+                    i += 1
+                elif text[i] == '[':
+                    in_class = True
+                elif text[i] == ']':
+                    in_class = False
+                i += 1
+            i += 1
+            while i < n and text[i].isalpha():  # flags
+                i += 1
+            out.append(text[start:i])
+        else:
+            if braces:
+                if c == '{':
+                    braces[-1] += 1
+                elif c == '}':
+                    braces[-1] -= 1
+            out.append(c)
+            i += 1
+    return ''.join(out).strip()
+
+
+MINIFIERS['.css'] = minify_css
+MINIFIERS['.js'] = minify_js
@@ -0,0 +1,148 @@
+"""
+First-load and repeat-visit cost of the game page, with and without the
+asset pipeline
+
+Starts the server with NEON_ASSETS=0 (page rendered per request, static
+files served as-is) and NEON_ASSETS=1 (minified, fingerprinted,
+precompressed, cached) and loads the page like a browser: the HTML, then
+every local stylesheet and script it references. Third-party CDN files
+are the same either way and left out.
+
+A repeat visit replays the cache validators from the first load. Files
+with an immutable cache lifetime are not requested at all.
+
+Time-to-interactive is modelled for a weak Wi-Fi link (LINK_KBPS, RTT
+seconds): one round trip plus transfer for the HTML, then one more round
+trip plus transfer for the assets, fetched in parallel. The measured
+server time is added on top.
+
+    python benchmarks/bench_assets.py [loads]
+"""
+import gzip
+import os
+import re
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_connections import free_port, start_server
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LINK_KBPS = 1000  # kilobits per second
+RTT = 0.2  # seconds
+ACCEPT = {'Accept-Encoding': 'gzip, br' if brotli else 'gzip'}
+LOCAL_ASSET = re.compile(rb'(?:src|href)="(/(?:static|assets)/[^"]+)"')
+
+
+def fetch(port, path, headers):
+    """(status, wire bytes, response headers, body, seconds)"""
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=10) as r:
+            body = r.read()
+            status, info = r.status, r.headers
+    except urllib.error.HTTPError as e:
+        body, status, info = e.read(), e.code, e.headers
+    elapsed = time.perf_counter() - start
+    return status, len(body) + len(str(info)), info, body, elapsed
+
+
+def html_of(body, info):
+    if info.get('Content-Encoding') == 'gzip':
+        return gzip.decompress(body)
+    if info.get('Content-Encoding') == 'br':
+        return brotli.decompress(body)
+    return body
+
+
+def cacheable_forever(info):
+    return 'immutable' in (info.get('Cache-Control') or '')
+
+
+def validators(info):
+    headers = dict(ACCEPT)
+    if info.get('ETag'):
+        headers['If-None-Match'] = info['ETag']
+    if info.get('Last-Modified'):
+        headers['If-Modified-Since'] = info['Last-Modified']
+    return headers
+
+
+def visit(port):
+    """One first load and one repeat visit: (first, repeat) dicts"""
+    status, page_bytes, info, body, page_time = fetch(port, '/', ACCEPT)
+    assert status == 200
+    urls = [u.decode() for u in LOCAL_ASSET.findall(html_of(body, info))]
+    assets = [fetch(port, url, ACCEPT) for url in urls]
+    first = {
+        'requests': 1 + len(assets),
+        'page_bytes': page_bytes,
+        'asset_bytes': sum(a[1] for a in assets),
+        'server': page_time + max((a[4] for a in assets), default=0),
+    }
+
+    # Repeat visit: revalidate the page and anything not cached forever
+    _, r_bytes, _, _, r_time = fetch(port, '/', validators(info))
+    revalidated = [fetch(port, url, validators(a[2])) for url, a in zip(urls, assets)
+                   if not cacheable_forever(a[2])]
+    repeat = {
+        'requests': 1 + len(revalidated),
+        'page_bytes': r_bytes,
+        'asset_bytes': sum(a[1] for a in revalidated),
+        'server': r_time + max((a[4] for a in revalidated), default=0),
+    }
+    return first, repeat
+
+
+def tti(load):
+    """Modelled seconds until the page's scripts have run on the weak link"""
+    rate = LINK_KBPS * 1000 / 8
+    assets = RTT + load['asset_bytes'] / rate if load['requests'] > 1 else 0
+    return RTT + load['page_bytes'] / rate + assets + load['server']
+
+
+def measure(enabled, loads):
+    port = free_port()
+    os.environ['NEON_ASSETS'] = '1' if enabled else '0'
+    proc = start_server('threading', port)
+    try:
+        fetch(port, '/', ACCEPT)  # warm up
+        runs = [visit(port) for _ in range(loads)]
+    finally:
+        proc.kill()
+        proc.wait()
+
+    def summary(visits):
+        return {key: statistics.median(v[key] for v in visits)
+                for key in ('requests', 'page_bytes', 'asset_bytes', 'server')}
+    first, repeat = summary([r[0] for r in runs]), summary([r[1] for r in runs])
+    first['tti'], repeat['tti'] = tti(first), tti(repeat)
+    return first, repeat
+
+
+def main():
+    loads = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    results = {enabled: measure(enabled, loads) for enabled in (False, True)}
+    print(f"game page, local files only, median of {loads} loads; "
+          f"TTI modelled at {LINK_KBPS} kbit/s, {RTT * 1000:.0f}ms RTT")
+    print(f"  {'':<24}{'requests':>9}{'bytes':>10}{'server':>10}{'TTI':>9}")
+    for visit_index, label in ((0, 'first load'), (1, 'repeat visit')):
+        for enabled in (False, True):
+            load = results[enabled][visit_index]
+            name = f"{label} ({'pipeline' if enabled else 'before'})"
+            print(f"  {name:<24}{load['requests']:>9.0f}{load['page_bytes'] + load['asset_bytes']:>10,.0f}"
+                  f"{load['server'] * 1000:>8.1f}ms{load['tti']:>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
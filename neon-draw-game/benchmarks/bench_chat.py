@@ -0,0 +1,124 @@
+"""
+Chat throughput: messages per second through one busy room
+
+Starts the server, seats a drawer and N guessers in one room, starts the
+game and, during the drawing turn, has every guesser spam wrong guesses at
+a rising total rate. For each rate it reports the messages that reached
+the drawer per second, the socket events that carried them, delivery
+latency (p50/p99), server CPU and the messages still undelivered a second
+after the guessers stop (late). Runs once with chat sent message by
+message (NEON_CHAT_INTERVAL=0) and once batched at the default interval.
+Admission limits are lifted so every message is relayed.
+
+    python benchmarks/bench_chat.py [--guessers 8] [--rates 200,400,800,1600]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_connections import cpu_seconds, free_port, start_server
+from eio_client import SocketIOClient
+from loadtest import http_post, percentiles
+
+
+class Receiver:
+    """What the drawer's socket got: spam messages, events, latency"""
+
+    def __init__(self, client, sent):
+        self.sent = sent
+        self.messages = 0
+        self.events = 0
+        self.latency = []
+        client.on('chat_message', lambda at, data, *_: self.got(at, [data]))
+        client.on('chat_batch', lambda at, batch, *_: self.got(at, batch))
+
+    def got(self, at, messages):
+        self.events += 1
+        for chat in messages:
+            sent_at = self.sent.get(chat.get('message'))
+            if sent_at is not None:
+                self.messages += 1
+                self.latency.append(at - sent_at)
+
+
+async def spam(client, room_id, name, rate, duration, sent):
+    seq = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        text = f'spam {name} {seq}'
+        sent[text] = time.perf_counter()
+        client.emit('chat_message', {'room_id': room_id, 'message': text})
+        await client.drain()
+        seq += 1
+        await asyncio.sleep(max(0.0, start + seq / rate - time.perf_counter()))
+
+
+async def run(interval, guessers, rates, duration):
+    env = {'NEON_CHAT_INTERVAL': str(interval), 'NEON_CHAT_RATE': '1000000',
+           'NEON_KICK_AFTER': '0', 'NEON_RECORDINGS': '0'}
+    os.environ.update(env)
+    port = free_port()
+    proc = start_server('threading', port)
+    base = f'http://127.0.0.1:{port}'
+    clients = {}
+    try:
+        created = http_post(base, '/create-room', {'username': 'p0', 'max_players': guessers + 1})
+        room_id = created['room_id']
+        seats = {'p0': created}
+        for i in range(1, guessers + 1):
+            seats[f'p{i}'] = http_post(base, '/join-room', {'room_id': room_id, 'username': f'p{i}'})
+        started = asyncio.get_running_loop().create_future()
+        for name, seat in seats.items():
+            client = clients[name] = SocketIOClient('127.0.0.1', port)
+            await client.connect()
+            client.emit('join', {'room_id': room_id, 'player_id': seat['player_id'], 'token': seat['token']})
+        clients['p0'].on('game_started', lambda at, data, *_: started.done() or started.set_result(data))
+        await asyncio.sleep(0.5)
+        clients['p0'].emit('start_game', {'room_id': room_id})
+        drawer = (await asyncio.wait_for(started, 10))['current_drawer']
+
+        label = 'per message' if interval == 0 else f'batched {interval * 1000:.0f}ms'
+        for rate in rates:
+            sent = {}
+            receiver = Receiver(clients[drawer], sent)
+            cpu = cpu_seconds(proc.pid)
+            await asyncio.gather(*(spam(client, room_id, name, rate / guessers, duration, sent)
+                                   for name, client in clients.items() if name != drawer))
+            await asyncio.sleep(1)  # let the tail land
+            cpu = cpu_seconds(proc.pid) - cpu
+            lat = percentiles(receiver.latency)
+            print(f"  {label:<14}{len(sent) / duration:>8.0f}/s{receiver.messages / duration:>10.0f}/s"
+                  f"{receiver.events / duration:>9.0f}/s{lat['p50_ms'] or 0:>9.1f}ms"
+                  f"{lat['p99_ms'] or 0:>9.1f}ms{cpu / (duration + 1) * 100:>7.0f}%"
+                  f"{len(sent) - receiver.messages:>7}")
+    finally:
+        for client in clients.values():
+            await client.close()
+        proc.kill()
+        proc.wait()
+        for key in env:
+            os.environ.pop(key, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--guessers', type=int, default=8)
+    parser.add_argument('--rates', default='200,400,800,1600', help='total messages/s to offer')
+    parser.add_argument('--duration', type=float, default=5, help='seconds per rate')
+    parser.add_argument('--interval', type=float, default=0.05, help='NEON_CHAT_INTERVAL to compare')
+    args = parser.parse_args()
+    rates = [int(r) for r in args.rates.split(',')]
+
+    print(f"1 room, 1 drawer + {args.guessers} guessers, {args.duration:g}s per rate")
+    print(f"  {'':<14}{'sent':>10}{'received':>11}{'events':>11}{'p50':>11}{'p99':>11}{'cpu':>8}{'late':>7}")
+    for interval in (0, args.interval):
+        asyncio.run(run(interval, args.guessers, rates, args.duration))
+
+
+if __name__ == '__main__':
+    main()
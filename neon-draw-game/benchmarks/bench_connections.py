@@ -0,0 +1,158 @@
+"""
+Connection scaling benchmark: threading vs eventlet serving modes
+
+For each NEON_ASYNC_MODE, starts the server in a subprocess and ramps up
+concurrent Socket.IO websocket clients. At every step all clients send a
+get_room_data request; a step passes when at least 99% answer within the
+timeout. Reports the largest passing step, p50/p99 response latency and
+server RSS.
+
+    python benchmarks/bench_connections.py [max_clients] [modes...]
+"""
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, HERE)
+
+from eio_client import SocketIOClient
+
+STEPS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+TIMEOUT = 10
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port):
+    env = dict(os.environ, NEON_ASYNC_MODE=mode)
+    proc = subprocess.Popen(
+        [sys.executable, '-c', f'import app; app.run_server({port})'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError(f"server ({mode}) did not start")
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def cpu_seconds(pid):
+    """User + system CPU time the process has used so far"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def create_room(port):
+    req = urllib.request.Request(
+        f'http://127.0.0.1:{port}/create-room',
+        data=json.dumps({'username': 'bench'}).encode(),
+        headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
+        return json.loads(r.read())['room_id']
+
+
+async def open_clients(port, count, clients):
+    gate = asyncio.Semaphore(100)  # concurrent handshakes
+
+    async def one():
+        client = SocketIOClient('127.0.0.1', port)
+        async with gate:
+            try:
+                await client.connect(TIMEOUT)
+                clients.append(client)
+            except Exception:
+                await client.close()
+
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def probe(clients, room_id):
+    """Everyone asks for room data at once; returns latencies of answers"""
+    latencies = []
+    done = asyncio.Event()
+    start = time.perf_counter()
+
+    def answered(at, *_):
+        latencies.append(at - start)
+        if len(latencies) == len(clients):
+            done.set()
+
+    for client in clients:
+        client.on('room_update', answered)
+        client.emit('get_room_data', {'room_id': room_id})
+    try:
+        await asyncio.wait_for(done.wait(), TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    return sorted(latencies)
+
+
+async def run_mode(mode, max_clients):
+    port = free_port()
+    proc = start_server(mode, port)
+    clients = []
+    best = None
+    try:
+        room_id = create_room(port)
+        for step in STEPS:
+            if step > max_clients:
+                break
+            await open_clients(port, step - len(clients), clients)
+            lat = await probe(clients, room_id)
+            ok = len(lat) >= 0.99 * step
+            p50 = lat[len(lat) // 2] * 1000 if lat else float('nan')
+            p99 = lat[int(len(lat) * 0.99) - 1] * 1000 if lat else float('nan')
+            print(f"  {mode:<10}{step:>7} clients  connected={len(clients):>6}"
+                  f"  answered={len(lat):>6}  p50={p50:8.1f}ms  p99={p99:8.1f}ms"
+                  f"  rss={rss_mb(proc.pid):7.1f}MB  {'ok' if ok else 'FAIL'}")
+            if not ok:
+                break
+            best = step
+    finally:
+        for client in clients:
+            await client.close()
+        proc.kill()
+        proc.wait()
+    return best
+
+
+def main():
+    max_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    modes = sys.argv[2:] or ['threading', 'eventlet']
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    results = {}
+    for mode in modes:
+        results[mode] = asyncio.run(run_mode(mode, max_clients))
+    print("max concurrent clients sustained:")
+    for mode, best in results.items():
+        print(f"  {mode:<10}{best or 0:>7}")
+
+
+if __name__ == '__main__':
+    main()
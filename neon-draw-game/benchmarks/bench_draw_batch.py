@@ -0,0 +1,82 @@
+"""
+Draw relay benchmark: per-segment emits vs StrokeBatcher
+
+Simulates one drawer streaming segments to a full room of 8 players and
+reports broadcasts/sec and CPU time spent relaying one second of drawing.
+
+    python benchmarks/bench_draw_batch.py [segments_per_sec]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stroke_batcher import StrokeBatcher
+
+PLAYERS = 8
+TICK = 0.033
+
+
+def make_segments(count):
+    return [
+        {'x0': i % 800, 'y0': (i * 7) % 600, 'x1': (i + 1) % 800, 'y1': (i * 7 + 3) % 600,
+         'color': '#FF6B6B', 'width': 4}
+        for i in range(count)
+    ]
+
+
+def fan_out(event, payload, stats):
+    """Stand-in for a Socket.IO room broadcast: encode once, send to everyone but the drawer"""
+    packet = json.dumps([event, payload])
+    stats['broadcasts'] += 1
+    stats['bytes'] += len(packet) * (PLAYERS - 1)
+
+
+def run_direct(segments):
+    stats = {'broadcasts': 0, 'bytes': 0}
+    canvas = []
+    start = time.process_time()
+    for seg in segments:
+        canvas.append(seg)
+        fan_out('draw_update', seg, stats)
+    stats['cpu'] = time.process_time() - start
+    return stats
+
+
+def run_batched(segments, rate):
+    stats = {'broadcasts': 0, 'bytes': 0}
+    canvas = []
+
+    def flush(room_id, batch, sender):
+        canvas.extend(batch)
+        fan_out('draw_batch', batch, stats)
+
+    batcher = StrokeBatcher(flush, interval=TICK)
+    per_tick = max(1, int(rate * TICK))
+    start = time.process_time()
+    for i, seg in enumerate(segments, 1):
+        batcher.add('ROOM01', seg, 'drawer-sid')
+        if i % per_tick == 0:
+            batcher.flush_all()
+    batcher.flush_all()
+    stats['cpu'] = time.process_time() - start
+    return stats
+
+
+def main():
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    segments = make_segments(rate)
+
+    direct = run_direct(segments)
+    batched = run_batched(segments, rate)
+
+    print(f"{PLAYERS} players, {rate} segments/sec from one drawer")
+    print(f"{'mode':<10}{'broadcasts/s':>14}{'KB/s out':>12}{'CPU ms/s':>12}")
+    for name, s in (('direct', direct), ('batched', batched)):
+        print(f"{name:<10}{s['broadcasts']:>14}{s['bytes'] / 1024:>12.1f}{s['cpu'] * 1000:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
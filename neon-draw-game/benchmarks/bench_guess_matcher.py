@@ -0,0 +1,75 @@
+"""
+Guess matching micro-benchmark
+
+Feeds a flood of chat guesses (exact words, diacritic/hamza variants,
+typos and unrelated words) through the old strip().lower() comparison and
+the normalized matcher, reporting guesses/sec and how many correct and
+close guesses each one recognizes.
+
+    python benchmarks/bench_guess_matcher.py [guesses]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from guess_matcher import compile_words, match_guess
+
+VARIANTS = {'ا': 'أ', 'ه': 'ة', 'ي': 'ى'}
+
+
+def make_guesses(words, count, seed=3):
+    """(target word, guess) pairs"""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        word = rng.choice(words)
+        kind = rng.random()
+        if kind < 0.25:
+            guess = word
+        elif kind < 0.45:  # tashkeel, tatweel and letter variants
+            guess = ''.join(VARIANTS.get(ch, ch) + ('\u064e' if rng.random() < 0.3 else '') for ch in word)
+        elif kind < 0.65 and len(word) > 2:  # one typo
+            i = rng.randrange(len(word))
+            guess = word[:i] + word[i + 1:]
+        else:
+            guess = rng.choice(words) + ' ' + rng.choice(words)
+        pairs.append((word, guess))
+    return pairs
+
+
+def run(label, pairs, check):
+    start = time.perf_counter()
+    verdicts = [check(word, guess) for word, guess in pairs]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<20}{len(pairs) / elapsed:12,.0f} guesses/sec"
+          f"  correct={verdicts.count('correct')} close={verdicts.count('close')}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with open(os.path.join(ROOT, 'arabic_words.json'), encoding='utf-8') as f:
+        words = json.load(f)['words']
+    keys = compile_words(words)
+    pairs = make_guesses(words, count)
+    rng = random.Random(1)
+    flood = [(rng.choice(words), guess) for _, guess in pairs]
+
+    old = lambda word, guess: 'correct' if guess.strip().lower() == word.lower() else None
+    new = lambda word, guess: match_guess(keys[word], guess)
+
+    print(f"{count} guesses, {len(words)} words")
+    print(" aimed at their own word:")
+    run('strip().lower()', pairs, old)
+    run('normalized match', pairs, new)
+    print(" chat flood against a random word:")
+    run('strip().lower()', flood, old)
+    run('normalized match', flood, new)
+
+
+if __name__ == '__main__':
+    main()
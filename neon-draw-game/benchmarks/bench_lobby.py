@@ -0,0 +1,99 @@
+"""
+Lobby index at scale
+
+Fills a GameManager with public rooms (a mix of waiting rooms with and
+without free seats and rooms mid-game), then compares finding the best
+open room and serving a listing page through the lobby index against
+scanning every room, and times the incremental index update a join costs.
+
+    python benchmarks/bench_lobby.py [rooms]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from game_logic import GameManager
+
+
+def populate(manager, rooms):
+    rng = random.Random(1)
+    for i in range(rooms):
+        room_id = manager.create_room(f'h{i}', f'host{i}', max_players=8, public=True)
+        for n in range(rng.randrange(0, 8)):
+            manager.join_room(room_id, f'p{i}-{n}', f'p{n}')
+        if i % 3 == 0 and len(manager.rooms[room_id].players) > 1:
+            manager.start_game(room_id)
+
+
+def scan_best(manager):
+    best = None
+    for room in manager.rooms.values():
+        if room.public and room.game_state == "waiting" and len(room.players) < room.max_players:
+            key = room.max_players - len(room.players)
+            if best is None or key < best[0]:
+                best = (key, room.room_id)
+    return best[1] if best else None
+
+
+def scan_page(manager, offset, limit):
+    rooms = [room for room in manager.rooms.values()
+             if room.public and room.game_state == "waiting" and len(room.players) < room.max_players]
+    rooms.sort(key=lambda r: r.max_players - len(r.players))
+    return [r.room_id for r in rooms[offset:offset + limit]]
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    manager = GameManager()
+    start = time.perf_counter()
+    populate(manager, rooms)
+    print(f"{rooms:,} public rooms, {len(manager.lobby):,} indexed "
+          f"(built in {time.perf_counter() - start:.1f}s)")
+
+    lobby = manager.lobby
+    assert manager.rooms[lobby.best()].game_state == "waiting"
+    offsets = [n * 20 for n in range(50)]
+
+    def fresh_page():
+        lobby.page_ttl, lobby.version = 0, lobby.version + 1  # force a miss
+        return lobby.page('waiting', random.choice(offsets), 20, 1)
+
+    results = [
+        ('best open room', lobby.best, lambda: scan_best(manager), 2000, 3),
+        ('listing page (uncached)', fresh_page, lambda: scan_page(manager, random.choice(offsets), 20), 2000, 3),
+        ('listing page (cached)', lambda: lobby.page('waiting', 0, 20, 1), None, 20000, 0),
+    ]
+    print(f"  {'operation':<24}  {'index':>10}  {'scan':>10}")
+    for label, indexed, scanned, repeat, scan_repeat in results:
+        lobby.page_ttl = 1.0
+        fast = per_call(indexed, repeat)
+        slow = f'{per_call(scanned, scan_repeat) * 1e6:8,.0f}µs' if scanned else f"{'-':>10}"
+        print(f"  {label:<24}  {fast * 1e6:8.1f}µs  {slow}")
+
+    # What a join adds: one index update under the room's lock
+    room_ids = list(manager.rooms)[:2000]
+    joined = [0]
+
+    def join_and_leave():
+        room_id = room_ids[joined[0] % len(room_ids)]
+        joined[0] += 1
+        room = manager.rooms[room_id]
+        if room.game_state == "waiting" and manager.join_room(room_id, 'bench', 'bench'):
+            room.remove_player('bench')
+
+    print(f"  {'join + leave':<24}  {per_call(join_and_leave, 2000) * 1e6:8.1f}µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Instrumentation overhead on the draw path
+
+Starts the server with NEON_METRICS=0 and =1 in turn, seats 8 websocket
+clients in one room, starts the game and has the drawer stream binary draw
+events while the other 7 receive the batched broadcasts. Admission limits
+are lifted so every event takes the draw path rather than the drop path.
+Reports server CPU time per draw event (from /proc, so client work on the
+same machine doesn't count), median over alternating runs.
+
+    python benchmarks/bench_metrics_overhead.py [draw_events] [runs]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from bench_connections import free_port, start_server
+from eio_client import SocketIOClient
+import stroke_codec
+
+PLAYERS = 8
+BURST = 20  # draw events between yields (~ a fast drawer's pointer rate)
+
+
+def post(port, path, body):
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=json.dumps(body).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=10) as r:
+        return json.loads(r.read())
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+async def run(metrics_on, events):
+    env = {'NEON_METRICS': '1' if metrics_on else '0', 'NEON_DRAW_RATE': '1000000',
+           'NEON_DRAW_BYTES': '1000000000', 'NEON_KICK_AFTER': '0'}
+    os.environ.update(env)
+    port = free_port()
+    proc = start_server('threading', port)
+    clients = {}
+    try:
+        created = post(port, '/create-room', {'username': 'p0'})
+        room_id, players = created['room_id'], [(created['player_id'], created['token'])]
+        for i in range(1, PLAYERS):
+            joined = post(port, '/join-room', {'room_id': room_id, 'username': f'p{i}'})
+            players.append((joined['player_id'], joined['token']))
+
+        received = [0]
+        started = asyncio.get_running_loop().create_future()
+        for i, (player_id, token) in enumerate(players):
+            client = clients[f'p{i}'] = SocketIOClient('127.0.0.1', port)
+            client.on('draw_batch', lambda at, packet: received.__setitem__(0, received[0] + len(packet)))
+            await client.connect()
+            client.emit('join', {'room_id': room_id, 'player_id': player_id, 'token': token})
+        clients['p0'].on('game_started', lambda at, data, *_: started.done() or started.set_result(data))
+        await asyncio.sleep(0.5)
+        clients['p0'].emit('start_game', {'room_id': room_id})
+        drawer = clients[(await asyncio.wait_for(started, 10))['current_drawer']]
+        await asyncio.sleep(0.2)
+
+        chunk = stroke_codec.encode_segments([
+            {'x0': 10, 'y0': 20, 'x1': 30, 'y1': 40, 'color': '#FF6B6B', 'width': 4}])
+        expected = len(chunk) * events * (PLAYERS - 1)
+        before = cpu_seconds(proc.pid)
+        for i in range(events):
+            drawer.emit('draw', {'room_id': room_id}, binary=chunk)
+            if i % BURST == BURST - 1:
+                await drawer.drain()
+                await asyncio.sleep(0)
+        deadline = time.time() + 60
+        while received[0] < expected and time.time() < deadline:
+            await asyncio.sleep(0.05)
+        used = cpu_seconds(proc.pid) - before
+        if received[0] < expected:
+            print(f"  warning: only {received[0] / expected:.0%} of strokes arrived")
+        return used / events
+    finally:
+        for client in clients.values():
+            await client.close()
+        proc.kill()
+        proc.wait()
+        for key in env:
+            os.environ.pop(key, None)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    results = {False: [], True: []}
+    for _ in range(runs):
+        for metrics_on in (False, True):
+            results[metrics_on].append(asyncio.run(run(metrics_on, events)))
+
+    off, on = statistics.median(results[False]), statistics.median(results[True])
+    print(f"draw path, {events:,} events to {PLAYERS - 1} watchers, server CPU (median of {runs}):")
+    for label, flag, value in (('NEON_METRICS=0', False, off), ('NEON_METRICS=1', True, on)):
+        spread = ', '.join(f'{v * 1e6:.0f}' for v in results[flag])
+        print(f"  {label}  {value * 1e6:7.1f} µs/event   runs: {spread}")
+    print(f"  overhead        {(on - off) * 1e6:7.1f} µs/event ({(on / off - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
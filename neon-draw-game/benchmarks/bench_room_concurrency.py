@@ -0,0 +1,148 @@
+"""
+Room concurrency stress test
+
+Correctness: many threads fire the correct word at the same room at the
+same instant, turn after turn; exactly one guess per turn may score and the
+scores must add up. Threads also create rooms against a tiny code space to
+force collisions; every room must get a distinct code.
+
+Throughput: each thread plays guesses on rooms of its own while holding the
+room transaction for a simulated emit (socket writes release the GIL, like
+the real handlers). Compares striped per-room locks with a single global
+lock as the thread count grows.
+
+    python benchmarks/bench_room_concurrency.py [threads] [seconds]
+"""
+import os
+import random
+import string
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from game_logic import GameManager
+from room_store import InMemoryRoomStore
+
+EMIT_TIME = 0.0001  # seconds a handler spends emitting inside the transaction
+
+
+def new_game(manager, players):
+    room_id = manager.create_room('p0', 'p0', max_players=players)
+    for i in range(1, players):
+        manager.join_room(room_id, f'p{i}', f'p{i}')
+    manager.start_game(room_id)
+    with manager.room_transaction(room_id) as room:
+        room.max_rounds = 10 ** 9
+    return room_id
+
+
+def check_guess_race(threads, turns=200):
+    manager = GameManager()
+    room_id = new_game(manager, threads + 1)
+    room = manager.rooms[room_id]
+    barrier = threading.Barrier(threads)
+    winners = []
+
+    def guesser(i):
+        for _ in range(turns):
+            barrier.wait()
+            word = room.current_word
+            barrier.wait()
+            # The drawer's own guess is rejected; everyone else races
+            result = manager.submit_guess(room_id, f'p{i}', word)
+            if result and result['correct']:
+                winners.append(room.turn_id)
+            if barrier.wait() == 0:
+                manager.advance_turn(room_id, room.turn_id)
+
+    workers = [threading.Thread(target=guesser, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    per_turn = {}
+    for turn in winners:
+        per_turn[turn] = per_turn.get(turn, 0) + 1
+    doubles = sum(1 for n in per_turn.values() if n > 1)
+    total = sum(room.scores.values())
+    board = sum(score for _, score in room.leaderboard.top())
+    ok = doubles == 0 and total == board
+    print(f"  guess race: {len(winners)} scoring guesses over {turns} turns, "
+          f"{doubles} turns scored twice, scores {total} vs leaderboard {board}"
+          f"  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def check_create_race(threads, per_thread=200):
+    manager = GameManager()
+    space = string.ascii_uppercase[:4]
+    manager.generate_room_code = lambda: ''.join(random.choices(space, k=6))  # 4096 codes
+    created = []
+
+    def creator(i):
+        for n in range(per_thread):
+            created.append(manager.create_room(f'h{i}-{n}', 'host'))
+
+    workers = [threading.Thread(target=creator, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    ok = len(set(created)) == len(created) == len(manager.rooms)
+    print(f"  create race: {len(created)} rooms, {len(set(created))} distinct codes, "
+          f"{len(manager.rooms)} stored  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def throughput(stripes, threads, seconds):
+    manager = GameManager(InMemoryRoomStore(stripes=stripes))
+    rooms = [[new_game(manager, 4) for _ in range(8)] for _ in range(threads)]
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def worker(i):
+        mine = rooms[i]
+        n = 0
+        while not stop.is_set():
+            room_id = mine[n % len(mine)]
+            with manager.room_transaction(room_id) as room:
+                guesser = 'p2' if room.current_drawer != 'p2' else 'p3'
+                manager.submit_guess(room_id, guesser, 'nope')
+                time.sleep(EMIT_TIME)
+            n += 1
+        counts[i] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main():
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    print("correctness:")
+    ok = check_guess_race(min(max_threads, 16)) & check_create_race(max_threads)
+
+    print(f"throughput (guesses/sec, {EMIT_TIME * 1e6:.0f}µs emit inside each transaction):")
+    print(f"  {'threads':>7}  {'global lock':>12}  {'striped':>12}")
+    threads = 1
+    while threads <= max_threads:
+        single = throughput(1, threads, seconds)
+        striped = throughput(256, threads, seconds)
+        print(f"  {threads:>7}  {single:>12,.0f}  {striped:>12,.0f}")
+        threads *= 2
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Room sync benchmark: full get_room_data snapshots vs versioned deltas
+
+Replays common events in an 8-player room (score change, player join,
+new drawer) and reports JSON bytes on the wire and CPU per event for a
+full room_update vs a room_delta.
+
+    python benchmarks/bench_room_delta.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from game_logic import GameRoom
+
+PLAYERS = 8
+REPEAT = 5000
+
+
+def make_room():
+    room = GameRoom('BENCH1', 'p0', max_players=PLAYERS + 1)
+    for i in range(PLAYERS):
+        room.add_player(f'p{i}', f'player{i}', '#FF6B6B')
+    room.start_game()
+    room.pop_delta()
+    return room
+
+
+def score_change(room):
+    guesser = next(pid for pid in room.players if pid != room.current_drawer)
+    room.add_score(guesser, 150)
+
+
+def player_join(room):
+    room.remove_player('late')
+    room.pop_delta()
+    room.add_player('late', 'latecomer', '#4ECDC4')
+
+
+def new_drawer(room):
+    room.next_turn()
+
+
+def measure(event, publish):
+    room = make_room()
+    size = 0
+    elapsed = 0.0
+    for _ in range(REPEAT):
+        event(room)
+        start = time.perf_counter()
+        payload = json.dumps(publish(room))
+        elapsed += time.perf_counter() - start
+        size = len(payload)
+    return size, elapsed / REPEAT
+
+
+def main():
+    full = lambda room: (room.pop_delta(), room.get_room_data())[1]
+    delta = lambda room: room.pop_delta()
+
+    print(f"{PLAYERS}-player room, JSON bytes and CPU per broadcast")
+    print(f"{'event':<14}{'full B':>9}{'delta B':>9}{'full us':>10}{'delta us':>10}")
+    for name, event in (('score change', score_change), ('player join', player_join),
+                        ('new drawer', new_drawer)):
+        full_size, full_cpu = measure(event, full)
+        delta_size, delta_cpu = measure(event, delta)
+        print(f"{name:<14}{full_size:>9}{delta_size:>9}{full_cpu * 1e6:>10.1f}{delta_cpu * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Room memory: bytes per room held by GameManager, measured with tracemalloc
+
+Builds N rooms of one kind through the GameManager API and reports the
+memory they hold (traced allocations after building minus before,
+divided by N):
+  - empty: a room in the store with no players yet
+  - waiting: 4 players in the lobby
+  - active: 8 players mid-turn, with a few points scored
+Player ids and names are made before tracing starts, since they cost the
+same in any representation; stroke data and chat are left out.
+
+    python benchmarks/bench_room_memory.py [sizes...]     (default 1000 10000 100000)
+"""
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from game_logic import GameManager, GameRoom
+from word_bank import get_word_bank
+
+KINDS = {'empty': 0, 'waiting': 4, 'active': 8}
+
+
+def seats(count, players):
+    return [[(str(uuid.uuid4()), f'player{r}-{p}') for p in range(players)] for r in range(count)]
+
+
+def build(manager, kind, people):
+    for i, room_seats in enumerate(people):
+        if kind == 'empty':
+            manager.rooms.add(GameRoom(f'E{i:07d}', 'host', 8))
+            continue
+        (host_id, host_name), *others = room_seats
+        room_id = manager.create_room(host_id, host_name, max_players=8)
+        for player_id, username in others:
+            manager.join_room(room_id, player_id, username)
+        if kind == 'active':
+            manager.start_game(room_id)
+            with manager.room_transaction(room_id) as room:
+                for player_id, _ in others[:3]:
+                    room.add_score(player_id, 150)
+                room.pop_delta()
+
+
+def measure(kind, count):
+    people = seats(count, KINDS[kind])
+    manager = GameManager()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    build(manager, kind, people)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(manager.rooms) == count
+    return held / count
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    get_word_bank()  # shared by every room, loaded once
+    print(f"bytes per room ({sys.implementation.name} {sys.version.split()[0]})")
+    print(f"  {'rooms':>8}" + ''.join(f"{kind:>10}" for kind in KINDS))
+    for count in sizes:
+        row = [measure(kind, count) for kind in KINDS]
+        print(f"  {count:>8,}" + ''.join(f"{b:>10,.0f}" for b in row))
+
+
+if __name__ == '__main__':
+    main()
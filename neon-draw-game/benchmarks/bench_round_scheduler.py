@@ -0,0 +1,102 @@
+"""
+Round scheduler load test on a fake clock
+
+Starts thousands of two-player games, lets every turn time out and drives
+the TimerWheel tick by tick until all games finish. Timers are armed and
+handled the way app.py does it (room.time_left(), expire_turn and
+advance_turn), with the rooms reading the same fake clock as the wheel.
+Reports timers fired, wall time per tick and checks that no turn ended
+early or late.
+
+    python benchmarks/bench_round_scheduler.py [rooms]
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import game_logic
+from game_logic import GameManager
+from round_scheduler import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    clock = FakeClock()
+    game_logic.time = SimpleNamespace(time=clock)  # round_start_time on the fake clock
+    wheel = TimerWheel(tick=0.25, clock=clock)
+    manager = GameManager()
+    fired = {'round_end': 0, 'next_turn': 0}
+    lateness = []
+
+    # Mirrors schedule_round_end, expire_round and begin_turn in app.py
+    def arm_round_end(room):
+        room_id, turn_id = room.room_id, room.turn_id
+        wheel.schedule(room_id, room.time_left(), lambda: expire(room_id, turn_id))
+
+    def expire(room_id, turn_id):
+        room = manager.rooms[room_id]
+        deadline = room.round_start_time + room.round_time
+        if manager.expire_turn(room_id, turn_id) is None:
+            return
+        lateness.append(clock.now - deadline)
+        fired['round_end'] += 1
+        if room.game_state != "finished":
+            wheel.schedule(room_id, room.intermission, lambda: begin(room_id, turn_id))
+
+    def begin(room_id, turn_id):
+        if manager.advance_turn(room_id, turn_id) is None:
+            return
+        fired['next_turn'] += 1
+        arm_round_end(manager.rooms[room_id])
+
+    for i in range(rooms):
+        room_id = manager.create_room(f'host{i}', 'host')
+        manager.join_room(room_id, f'guest{i}', 'guest')
+        room = manager.rooms[room_id]
+        room.start_game()
+        arm_round_end(room)
+        clock.now += 0.001  # stagger starts a little
+
+    ticks = 0
+    busiest = 0.0
+    start = time.perf_counter()
+    while len(wheel):
+        clock.now += wheel.tick
+        t = time.perf_counter()
+        wheel.advance()
+        busiest = max(busiest, time.perf_counter() - t)
+        ticks += 1
+    elapsed = time.perf_counter() - start
+
+    finished = sum(1 for r in manager.rooms.values() if r.game_state == "finished")
+    print(f"{rooms} rooms, {ticks} ticks ({ticks * wheel.tick:.0f}s simulated) in {elapsed:.2f}s wall")
+    print(f"  timers fired: {fired['round_end']} round ends, {fired['next_turn']} turn starts")
+    print(f"  mean tick {elapsed / ticks * 1e6:.1f} us, busiest tick {busiest * 1e3:.2f} ms")
+    print(f"  lateness: min {min(lateness):.3f}s max {max(lateness):.3f}s (never early: {min(lateness) >= 0})")
+    print(f"  games finished: {finished}/{rooms}")
+
+    # Idle tick cost should not depend on how many timers are pending
+    for n in (1000, 10000, 100000):
+        idle = TimerWheel(tick=0.25, clock=clock)
+        for i in range(n):
+            idle.schedule(i, 3600 + (i % 60), lambda: None)
+        t = time.perf_counter()
+        for _ in range(100):
+            clock.now += idle.tick
+            idle.advance()
+        print(f"  {n:>6} pending timers: {(time.perf_counter() - t) / 100 * 1e6:.1f} us per idle tick")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Stroke simplification: points kept, bytes saved, CPU per 1,000 points
+
+Synthesizes pointer streams like a drawer's (a few pixels per pointer
+event, gently curving, with hand jitter), sends them as draw events of a
+few points each and batches them the way the stroke batcher does. Each
+batch goes through simplify_buffer at several tolerances, with NumPy and
+with the pure Python fallback, and the worst deviation of any dropped
+point from the simplified line is checked against the tolerance. A second
+table shows where NumPy starts paying off as batches grow.
+
+    python benchmarks/bench_simplify.py [points]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import stroke_codec
+import stroke_simplify
+from stroke_codec import SCALE, Stroke
+
+POINTS_PER_EVENT = 6  # pointer samples per draw event
+EVENTS_PER_BATCH = 32  # draw events per relayed batch
+TOLERANCES = (0.25, 0.5, 1.0, 2.0)  # pixels
+
+
+def pointer_stream(rng, length):
+    """One stroke: ~3px steps, slowly turning, with sub-pixel jitter"""
+    x, y, heading = rng.uniform(100, 700), rng.uniform(100, 500), rng.uniform(0, 2 * math.pi)
+    turn = rng.gauss(0, 0.05)
+    points = []
+    for _ in range(length):
+        turn = 0.9 * turn + rng.gauss(0, 0.03)
+        heading += turn
+        x += 3 * math.cos(heading) + rng.gauss(0, 0.3)
+        y += 3 * math.sin(heading) + rng.gauss(0, 0.3)
+        points.append((stroke_codec.quantize(x), stroke_codec.quantize(y)))
+    return points
+
+
+def batches(total, per_batch=EVENTS_PER_BATCH, seed=7):
+    """Encoded batches, each the join of per_batch draw events"""
+    rng = random.Random(seed)
+    events = []
+    while total > 0:
+        points = pointer_stream(rng, rng.randrange(20, 400))
+        color = rng.choice(stroke_codec.PALETTE)
+        # Consecutive events share their boundary point, like the client's
+        for i in range(0, len(points) - 1, POINTS_PER_EVENT):
+            events.append(stroke_codec.encode_strokes(
+                [Stroke(color, 4, points[i:i + POINTS_PER_EVENT + 1])]))
+        total -= len(points)
+    return [b''.join(events[i:i + per_batch]) for i in range(0, len(events), per_batch)]
+
+
+def count_points(buf):
+    return sum(count for _, _, count, _, _ in stroke_codec.iter_records(buf))
+
+
+def deviation(original, simplified):
+    """Worst distance (pixels) of an original point from the simplified polyline"""
+    worst = 0.0
+    lines = stroke_codec.merge_strokes(stroke_codec.decode_strokes(original))
+    kept = stroke_codec.merge_strokes(stroke_codec.decode_strokes(simplified))
+    for line, short in zip(lines, kept):
+        j = 0
+        for x, y in line.points:
+            while j + 1 < len(short.points) - 1 and (x, y) == short.points[j + 1]:
+                j += 1
+            (ax, ay), (bx, by) = short.points[j], short.points[min(j + 1, len(short.points) - 1)]
+            dx, dy = bx - ax, by - ay
+            norm = math.hypot(dx, dy)
+            d = abs(dx * (y - ay) - dy * (x - ax)) / norm if norm else math.hypot(x - ax, y - ay)
+            worst = max(worst, d / SCALE)
+    return worst
+
+
+def run(packets, tolerance, use_numpy):
+    """Simplified batches and CPU seconds, forcing one path regardless of size"""
+    saved = stroke_simplify.np, stroke_simplify.NUMPY_MIN_BYTES
+    if use_numpy:
+        stroke_simplify.NUMPY_MIN_BYTES = 0
+    else:
+        stroke_simplify.np = None
+    try:
+        start = time.process_time()
+        out = [stroke_simplify.simplify_buffer(p, tolerance) for p in packets]
+        return out, time.process_time() - start
+    finally:
+        stroke_simplify.np, stroke_simplify.NUMPY_MIN_BYTES = saved
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    packets = batches(total)
+    points = sum(count_points(p) for p in packets)
+    nbytes = sum(len(p) for p in packets)
+    print(f"{points:,} points in {len(packets):,} batches ({nbytes:,} bytes), "
+          f"{POINTS_PER_EVENT} points/event, {EVENTS_PER_BATCH} events/batch")
+
+    variants = [True, False] if stroke_simplify.np is not None else [False]
+    if stroke_simplify.np is None:
+        print("  (NumPy not installed: pure Python only)")
+    print(f"  {'tolerance':>9}  {'points kept':>11}  {'bytes saved':>11}  {'max error':>9}  "
+          + '  '.join(f"{'numpy' if v else 'python':>10}" for v in variants))
+    for tolerance in TOLERANCES:
+        costs = []
+        for use_numpy in variants:
+            out, seconds = run(packets, tolerance, use_numpy)
+            costs.append(seconds / points * 1000)
+        kept = sum(count_points(p) for p in out)
+        saved = 1 - sum(len(p) for p in out) / nbytes
+        error = max(deviation(a, b) for a, b in zip(packets[:200], out[:200]))
+        print(f"  {tolerance:>7.2f}px  {kept / points:>11.1%}  {saved:>11.1%}  {error:>7.2f}px  "
+              + '  '.join(f"{c * 1e6:>7.0f}µs" for c in costs))
+    print("  (CPU columns: time per 1,000 input points, decode + simplify + encode)")
+
+    if stroke_simplify.np is None:
+        return
+    print(f"CPU per 1,000 points by batch size at 0.5px "
+          f"(NumPy used from {stroke_simplify.NUMPY_MIN_BYTES:,} bytes):")
+    print(f"  {'events':>6}  {'bytes':>7}  {'numpy':>8}  {'python':>8}")
+    for per_batch in (4, 16, 64, 256, 1024):
+        sized = batches(min(total, 100_000), per_batch)
+        n = sum(count_points(p) for p in sized)
+        costs = [run(sized, 0.5, use_numpy)[1] / n * 1000 for use_numpy in (True, False)]
+        size = sum(len(p) for p in sized) // len(sized)
+        print(f"  {per_batch:>6}  {size:>7,}  " + '  '.join(f"{c * 1e6:>6.0f}µs" for c in costs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Startup time: process launch to first accepted connection and first page
+
+Launches `python app.py` the way a user (interactive) or a container
+(--headless) would and polls until the port accepts a TCP connection,
+then until GET / answers. Each mode also runs with outbound HTTP(S)
+sent to a proxy that accepts connections and never answers, so lookups
+hang until their timeout, like a box whose network drops packets.
+
+    python benchmarks/bench_startup.py [--runs 5] [--root DIR]
+
+--root runs the app.py of another checkout (e.g. a git worktree of an
+older commit) for comparison; modes it doesn't support are skipped.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_connections import ROOT, free_port
+
+
+def tarpit():
+    """A listening socket nobody reads: connections succeed, requests hang"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(128)
+    return sock
+
+
+def first_free_port(start=5000):
+    """The port app.py picks when probing from 5000"""
+    for port in range(start, start + 50):
+        with socket.socket() as s:
+            try:
+                s.bind(('0.0.0.0', port))
+                return port
+            except OSError:
+                pass
+    raise RuntimeError('no free port from 5000')
+
+
+def accepts(port):
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def launch(root, headless, proxy=None, timeout=30):
+    """(seconds to first accepted connection, seconds to first page)"""
+    env = dict(os.environ, BROWSER='true', NEON_RECORDINGS='0')  # 'true': a browser that exits at once
+    if proxy is not None:
+        env['https_proxy'] = env['http_proxy'] = f'http://127.0.0.1:{proxy.getsockname()[1]}'
+    if headless:
+        port = free_port()
+        cmd = [sys.executable, 'app.py', '--headless', '--port', str(port)]
+    else:
+        port = first_free_port()
+        cmd = [sys.executable, 'app.py']
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        while not accepts(port):
+            if proc.poll() is not None or time.perf_counter() > deadline:
+                raise RuntimeError(f"server did not start: {' '.join(cmd[1:])}")
+            time.sleep(0.005)
+        accepted = time.perf_counter() - start
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5) as r:
+                    r.read()
+                break
+            except OSError:
+                time.sleep(0.005)
+        return accepted, time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--root', default=ROOT, help='directory holding the app.py to start')
+    args = parser.parse_args()
+    with open(os.path.join(args.root, 'app.py'), encoding='utf-8') as f:
+        has_headless = '--headless' in f.read()
+
+    print(f"median of {args.runs} launches of {os.path.abspath(os.path.join(args.root, 'app.py'))}")
+    print(f"  {'':<28}{'accepting':>10}{'first page':>12}")
+    hole = tarpit()
+    for headless in (False, True):
+        if headless and not has_headless:
+            continue
+        for proxy in (None, hole):
+            runs = [launch(args.root, headless, proxy) for _ in range(args.runs)]
+            label = f"{'headless' if headless else 'interactive'}, {'network' if proxy is None else 'dead network'}"
+            print(f"  {label:<28}{statistics.median(r[0] for r in runs):>9.2f}s"
+                  f"{statistics.median(r[1] for r in runs):>11.2f}s")
+
+
+if __name__ == '__main__':
+    main()
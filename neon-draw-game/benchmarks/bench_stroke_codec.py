@@ -0,0 +1,81 @@
+"""
+Stroke encoding benchmark: JSON dicts vs the binary stroke format
+
+Generates random-walk pen strokes and reports wire size, stored size and
+encode/decode throughput for both representations.
+
+    python benchmarks/bench_stroke_codec.py [segments]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import stroke_codec
+
+
+def make_segments(count, seed=7):
+    rng = random.Random(seed)
+    segments = []
+    x, y = 400.0, 300.0
+    color, width = '#FF6B6B', 4
+    for i in range(count):
+        if i % 60 == 0:  # pen lifted: new stroke somewhere else
+            x, y = rng.uniform(0, 800), rng.uniform(0, 600)
+            color = rng.choice(stroke_codec.PALETTE)
+            width = rng.choice((2, 4, 8))
+        nx = min(800.0, max(0.0, x + rng.uniform(-6, 6)))
+        ny = min(600.0, max(0.0, y + rng.uniform(-6, 6)))
+        segments.append({'x0': x, 'y0': y, 'x1': nx, 'y1': ny, 'color': color, 'width': width})
+        x, y = nx, ny
+    return segments
+
+
+def deep_size(segments):
+    total = sys.getsizeof(segments)
+    for seg in segments:
+        total += sys.getsizeof(seg) + sum(sys.getsizeof(v) for v in seg.values())
+    return total
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    segments = make_segments(count)
+
+    json_per_segment = sum(len(json.dumps(s)) for s in segments)
+    json_blob = json.dumps(segments)
+    binary = stroke_codec.encode_segments(segments)
+
+    t_json_enc = timed(lambda: json.dumps(segments))
+    t_json_dec = timed(lambda: json.loads(json_blob))
+    t_bin_enc = timed(lambda: stroke_codec.encode_segments(segments))
+    t_bin_dec = timed(lambda: stroke_codec.decode_strokes(binary))
+    t_bin_check = timed(lambda: stroke_codec.is_valid(binary))
+
+    print(f"{count} segments")
+    print(f"  JSON, one message per segment: {json_per_segment / 1024:10.1f} KB")
+    print(f"  JSON, batched list:            {len(json_blob) / 1024:10.1f} KB")
+    print(f"  binary strokes:                {len(binary) / 1024:10.1f} KB"
+          f"  ({len(json_blob) / len(binary):.1f}x smaller)")
+    print(f"  stored in canvas_data: dicts {deep_size(segments) / 1024:.1f} KB"
+          f" vs bytes {sys.getsizeof(binary) / 1024:.1f} KB")
+    print("throughput (segments/sec)")
+    print(f"  json encode {count / t_json_enc:12,.0f}   decode {count / t_json_dec:12,.0f}")
+    print(f"  bin  encode {count / t_bin_enc:12,.0f}   decode {count / t_bin_dec:12,.0f}"
+          f"   validate {count / t_bin_check:12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
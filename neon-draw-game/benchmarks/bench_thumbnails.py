@@ -0,0 +1,100 @@
+"""
+Round thumbnails: drawings rendered per second, and what ending a turn costs
+
+Builds finished-turn canvases the way the server does (draw events
+batched, simplified and folded into a CanvasLog) and renders each to a
+PNG thumbnail:
+  - in this process with NumPy and with the pure Python fallback
+  - through a Thumbnailer with 1..N worker processes, end to end (submit
+    every drawing, wait for the last PNG to land in the cache)
+and reports the time submit() takes on the caller's thread, which is all
+a turn ending pays, plus the PNG size and how many fit in the cache.
+
+    python benchmarks/bench_thumbnails.py [drawings] [points per drawing]
+"""
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import thumbnails
+import stroke_simplify
+from bench_simplify import batches
+from canvas_snapshot import CanvasLog
+from thumbnails import Thumbnailer, render_png
+
+
+def drawings(count, points):
+    """Finished-turn canvases of about `points` pointer samples each"""
+    out = []
+    for seed in range(count):
+        log = CanvasLog()
+        for packet in batches(points, seed=seed):
+            log.append(stroke_simplify.simplify_buffer(packet, 0.5))
+        out.append(log.snapshot())
+    return out
+
+
+def inline(canvases, use_numpy):
+    saved = thumbnails.np
+    if not use_numpy:
+        thumbnails.np = None
+    try:
+        start = time.perf_counter()
+        pngs = [render_png(c) for c in canvases]
+        return pngs, time.perf_counter() - start
+    finally:
+        thumbnails.np = saved
+
+
+def pooled(canvases, workers):
+    """(seconds until every PNG is cached, submit() seconds per drawing)"""
+    thumbnailer = Thumbnailer(workers=workers, max_bytes=1 << 30)
+    thumbnailer.start()
+    try:
+        submits = []
+        start = time.perf_counter()
+        for i, canvas in enumerate(canvases):
+            t = time.perf_counter()
+            thumbnailer.submit(i, canvas)
+            submits.append(time.perf_counter() - t)
+        while len(thumbnailer.cache) < len(canvases):
+            time.sleep(0.001)
+        return time.perf_counter() - start, submits
+    finally:
+        thumbnailer.stop()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    canvases = drawings(count, points)
+    size = statistics.mean(len(c) for c in canvases)
+    print(f"{count} drawings of ~{points:,} points ({size / 1024:.1f}KB encoded), "
+          f"{thumbnails.WIDTH}x{thumbnails.HEIGHT} PNG, {os.cpu_count()} CPUs")
+
+    print(f"  {'':<24}{'thumbs/s':>10}{'per thumb':>11}")
+    paths = [True, False] if thumbnails.np is not None else [False]
+    for use_numpy in paths:
+        pngs, seconds = inline(canvases, use_numpy)
+        label = f"inline ({'numpy' if use_numpy else 'python'})"
+        print(f"  {label:<24}{count / seconds:>10.0f}{seconds / count * 1000:>9.2f}ms")
+
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        seconds, submits = pooled(canvases, workers)
+        label = f"pool, {workers} worker{'s' if workers > 1 else ''}"
+        print(f"  {label:<24}{count / seconds:>10.0f}{seconds / count * 1000:>9.2f}ms"
+              f"   submit p50 {statistics.median(submits) * 1e6:.0f}µs,"
+              f" max {max(submits) * 1e6:.0f}µs")
+
+    png = statistics.mean(len(p) for p in pngs)
+    print(f"  PNG {png / 1024:.1f}KB on average: "
+          f"{16 * 1024 * 1024 // png:,.0f} thumbnails in the default 16MB cache")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Room creation benchmark with the shared word bank
+
+Compares rooms created per second when every room parses the word file
+itself (the old load_arabic_words path) against rooms that sample from
+the process-wide WordBank, for the shipped list and a synthetic 50k list.
+
+    python benchmarks/bench_word_bank.py [rooms]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import word_bank
+from game_logic import GameRoom
+from guess_matcher import compile_words
+from word_bank import WordBank, WordSampler
+
+
+def per_room_parse(path):
+    """What every GameRoom used to do in __init__"""
+    with open(path, 'r', encoding='utf-8') as f:
+        words = json.load(f)['words']
+    return words, compile_words(words)
+
+
+def rate(fn, rooms):
+    start = time.perf_counter()
+    for i in range(rooms):
+        fn(i)
+    return rooms / (time.perf_counter() - start)
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    shipped = word_bank.WORDS_PATH
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump({'words': [f'كلمة{i}' for i in range(50000)]}, f, ensure_ascii=False)
+        large = f.name
+
+    try:
+        print(f"{rooms} rooms")
+        for label, path in (('shipped list', shipped), ('50k words', large)):
+            bank = WordBank.from_json(path)
+            word_bank._bank = bank
+            old = rate(lambda i: per_room_parse(path), max(rooms // 20, 10))
+            new = rate(lambda i: GameRoom(f'R{i}', 'host'), rooms)
+            sampler = WordSampler(bank)
+            draw = rate(lambda i: sampler.next_word(), rooms * 10)
+            print(f"  {label:<13} ({len(bank):>6} words): per-room parse {old:10,.0f} rooms/s"
+                  f" | shared bank {new:10,.0f} rooms/s | {draw:12,.0f} words drawn/s")
+    finally:
+        os.unlink(large)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Minimal asyncio Socket.IO (Engine.IO v4, websocket transport) client
+
+Just enough protocol for benchmarks to hold thousands of connections from
+one process without a thread per client: handshake, namespace connect,
+ping/pong, text events and binary attachments.
+"""
+import asyncio
+import base64
+import json
+import os
+import struct
+import time
+
+
+class SocketIOClient:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.sid = None
+        self.handlers = {}
+        self.connected = asyncio.Event()
+        self._pending_binary = None  # (event, args, attachments_left, buffers)
+        self._task = None
+        self.closed = False  # the server closed the connection
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def connect(self, timeout: float = 10):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        await self.writer.drain()
+        head = await asyncio.wait_for(self.reader.readuntil(b'\r\n\r\n'), timeout)
+        if b' 101 ' not in head.split(b'\r\n', 1)[0]:
+            raise ConnectionError(head.split(b'\r\n', 1)[0].decode(errors='replace'))
+        self._task = asyncio.ensure_future(self._read_loop())
+        await asyncio.wait_for(self.connected.wait(), timeout)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self.writer:
+            self.writer.close()
+
+    # ========== FRAMING ==========
+    def _send_frame(self, opcode: int, payload: bytes):
+        mask = os.urandom(4)
+        n = len(payload)
+        header = bytearray([0x80 | opcode])
+        if n < 126:
+            header.append(0x80 | n)
+        elif n < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack('>H', n)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack('>Q', n)
+        m = int.from_bytes(mask, 'big')
+        padded = payload + b'\x00' * (-n % 4)
+        words = struct.unpack(f'>{len(padded) // 4}I', padded)
+        masked = struct.pack(f'>{len(words)}I', *(w ^ m for w in words))[:n]
+        self.writer.write(bytes(header) + mask + masked)
+
+    async def _recv_frame(self):
+        b1, b2 = await self.reader.readexactly(2)
+        n = b2 & 0x7F
+        if n == 126:
+            n, = struct.unpack('>H', await self.reader.readexactly(2))
+        elif n == 127:
+            n, = struct.unpack('>Q', await self.reader.readexactly(8))
+        return b1 & 0x0F, await self.reader.readexactly(n)
+
+    # ========== SOCKET.IO ==========
+    def emit(self, event, data=None, binary: bytes = None):
+        """Send an event; pass binary to attach one bytes payload as data['data']"""
+        if binary is None:
+            self._send_frame(0x1, ('42' + json.dumps([event, data])).encode())
+        else:
+            payload = dict(data or {})
+            payload['data'] = {'_placeholder': True, 'num': 0}
+            self._send_frame(0x1, ('451-' + json.dumps([event, payload])).encode())
+            self._send_frame(0x2, binary)
+
+    async def drain(self):
+        await self.writer.drain()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                opcode, data = await self._recv_frame()
+                if opcode == 0x8:
+                    break
+                if opcode == 0x2:
+                    self._on_binary(data)
+                elif opcode == 0x1:
+                    self._on_text(data.decode())
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.closed = True
+
+    def _on_text(self, text: str):
+        if text[0] == '0':  # engine.io open
+            self._send_frame(0x1, b'40')
+        elif text[0] == '2':  # ping
+            self._send_frame(0x1, b'3')
+        elif text == '1' or text.startswith('41'):  # engine.io close, socket.io disconnect
+            self.closed = True
+        elif text.startswith('40'):
+            self.sid = json.loads(text[2:] or '{}').get('sid')
+            self.connected.set()
+        elif text.startswith('42'):
+            event, *args = json.loads(text[2:])
+            self._dispatch(event, args)
+        elif text.startswith('45'):
+            count, _, body = text[2:].partition('-')
+            event, *args = json.loads(body)
+            self._pending_binary = [event, args, int(count), []]
+
+    def _on_binary(self, data: bytes):
+        pending = self._pending_binary
+        if pending is None:
+            return
+        pending[3].append(data)
+        if len(pending[3]) == pending[2]:
+            self._pending_binary = None
+            event, args, _, buffers = pending
+            args = [buffers[a['num']] if isinstance(a, dict) and a.get('_placeholder') else a
+                    for a in args]
+            self._dispatch(event, args)
+
+    def _dispatch(self, event, args):
+        handler = self.handlers.get(event)
+        if handler:
+            handler(time.perf_counter(), *args)
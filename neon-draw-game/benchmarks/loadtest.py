@@ -0,0 +1,561 @@
+"""
+Bot swarm load test
+
+Ramps up N rooms x M bots against a local server (started here unless
+--url is given). Every room is created through /create-room and filled
+through /join-room, then its bots connect over Socket.IO and play real
+games: the host starts the game, the drawer streams draw events, guessers
+chat wrong guesses and eventually try the words that fit the hint. When a
+game finishes the host starts another.
+
+Reports, and saves as JSON for comparing commits:
+  - stroke relay latency: drawer emit -> every other bot receiving it
+  - guess-to-scoreboard latency: correct guess -> the guesser seeing its
+    new score
+  - events sent and received per second
+  - server RSS and CPU (local server only)
+
+With --spectators N, N more clients per room watch it through the
+spectator feed; their stroke delay (drawer emit -> spectator receiving
+it) and the bytes and events they receive are reported separately.
+
+With --flooders N, N more players (one per room, from the first) send
+draw and chat events at --flood-rate per second whatever their role,
+like a broken or hostile client; compare server CPU with and without.
+
+    python benchmarks/loadtest.py --rooms 20 --players 6 --duration 60
+    python benchmarks/loadtest.py --rooms 4 --players 6 --spectators 125
+    python benchmarks/loadtest.py --rooms 4 --players 6 --flooders 1
+    python benchmarks/loadtest.py --compare old.json new.json
+
+Bots use python-socketio's AsyncClient when aiohttp is installed
+(--client python-socketio), otherwise the bundled asyncio client in
+eio_client.py (--client eio), which speaks the same protocol.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+import stroke_codec
+from bench_connections import cpu_seconds, free_port, rss_mb, start_server
+from eio_client import SocketIOClient
+from word_bank import WordBank, WORDS_PATH
+
+DRAW_RATE = 60  # draw events per second while drawing
+COLORS = ('#FF6B6B', '#4ECDC4', '#FFD166', '#06D6A0')
+
+
+# ========== CLIENTS ==========
+class EioBot:
+    """Bundled asyncio client; handlers get (receive_time, *args)"""
+
+    def __init__(self, host, port):
+        self.client = SocketIOClient(host, port)
+
+    def on(self, event, handler):
+        self.client.on(event, handler)
+
+    async def connect(self):
+        await self.client.connect()
+
+    @property
+    def closed(self):
+        return self.client.closed
+
+    async def emit(self, event, data, binary=None):
+        self.client.emit(event, data, binary)
+        await self.client.drain()
+
+    async def close(self):
+        await self.client.close()
+
+
+class PythonSocketIOBot:
+    """python-socketio AsyncClient (needs aiohttp); same interface as EioBot"""
+
+    def __init__(self, host, port):
+        import socketio
+        self.url = f'http://{host}:{port}'
+        self.sio = socketio.AsyncClient(reconnection=False)
+
+    def on(self, event, handler):
+        self.sio.on(event, lambda *args: handler(time.perf_counter(), *args))
+
+    async def connect(self):
+        await self.sio.connect(self.url, transports=['websocket'])
+
+    @property
+    def closed(self):
+        return not self.sio.connected
+
+    async def emit(self, event, data, binary=None):
+        payload = dict(data)
+        if binary is not None:
+            payload['data'] = binary
+        await self.sio.emit(event, payload)
+
+    async def close(self):
+        await self.sio.disconnect()
+
+
+def client_factory(kind):
+    if kind == 'auto':
+        try:
+            import aiohttp  # noqa: F401
+            kind = 'python-socketio'
+        except ImportError:
+            kind = 'eio'
+    return kind, (PythonSocketIOBot if kind == 'python-socketio' else EioBot)
+
+
+# ========== STATS ==========
+class Stats:
+    def __init__(self):
+        self.stroke_latency = []
+        self.guess_latency = []
+        self.sent = 0
+        self.received = 0
+        self.strokes_sent = 0
+        self.strokes_received = 0
+        self.turns = 0
+        self.errors = 0
+        self.spectator_latency = []
+        self.spectator_received = 0
+        self.spectator_bytes = 0
+        self.flood_sent = 0
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = sorted(values)
+    pick = lambda q: round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+    return {'count': len(values), 'p50_ms': pick(0.5), 'p99_ms': pick(0.99),
+            'max_ms': round(values[-1] * 1000, 2)}
+
+
+def stroke_chunk(seq):
+    """A one-segment stroke unique to seq; all chunks have the same length"""
+    x, y = 8 + seq % 4000, 8 + (seq // 4000) % 4000
+    return stroke_codec.encode_segments([{
+        'x0': x, 'y0': y, 'x1': x + 3, 'y1': y + 2,
+        'color': COLORS[seq % len(COLORS)], 'width': 4}])
+
+
+CHUNK_SIZE = len(stroke_chunk(0))
+
+
+# ========== BOTS ==========
+class Room:
+    """Shared state of one room's bots"""
+
+    def __init__(self, room_id, stats):
+        self.room_id = room_id
+        self.stats = stats
+        self.sent_at = {}  # stroke chunk -> perf_counter when emitted
+        self.seq = 0
+
+
+class Bot:
+    def __init__(self, room, client, username, player_id, token, is_host, bank, stop):
+        self.room = room
+        self.client = client
+        self.username = username
+        self.player_id = player_id
+        self.token = token  # the seat's secret, presented on join
+        self.is_host = is_host
+        self.bank = bank
+        self.stop = stop
+        self.drawer = None
+        self.game_state = 'waiting'
+        self.hint = ''
+        self.word_length = 0
+        self.turn = 0
+        self.score = 0
+        self.guessed_at = None
+        for event in ('room_update', 'game_started', 'turn_started'):
+            client.on(event, self.on_full_state)
+        client.on('room_delta', self.on_delta)
+        client.on('draw_batch', self.on_draw_batch)
+        client.on('round_ended', self.on_round_ended)
+        client.on('chat_message', self.on_message)
+        client.on('chat_batch', self.on_message)
+        client.on('canvas_snapshot', self.on_message)
+
+    # ---------- incoming ----------
+    def on_message(self, at, *args):
+        self.room.stats.received += 1
+
+    def on_full_state(self, at, data, *args):
+        self.room.stats.received += 1
+        if 'word_length' in data:  # a new turn
+            self.turn += 1
+            self.word_length = data['word_length']
+            self.guessed_at = None
+        self.apply(at, data)
+
+    def on_delta(self, at, delta, *args):
+        self.room.stats.received += 1
+        self.apply(at, delta.get('changes', {}))
+
+    def apply(self, at, changes):
+        if 'current_drawer' in changes:
+            self.drawer = changes['current_drawer']
+        if 'game_state' in changes:
+            self.game_state = changes['game_state']
+        if 'word_hint' in changes:
+            self.hint = changes['word_hint']
+        scores = changes.get('scores')
+        if scores and self.player_id in scores:
+            score = scores[self.player_id]
+            if score > self.score and self.guessed_at is not None and self.drawer != self.username:
+                self.room.stats.guess_latency.append(at - self.guessed_at)
+                self.guessed_at = None
+            self.score = score
+
+    def on_draw_batch(self, at, packet, *args):
+        stats = self.room.stats
+        stats.received += 1
+        sent_at = self.room.sent_at
+        for i in range(0, len(packet) - CHUNK_SIZE + 1, CHUNK_SIZE):
+            t = sent_at.get(bytes(packet[i:i + CHUNK_SIZE]))
+            if t is not None:
+                stats.stroke_latency.append(at - t)
+                stats.strokes_received += 1
+
+    def on_round_ended(self, at, data, *args):
+        self.room.stats.received += 1
+        self.game_state = 'between_rounds'
+        if self.is_host:
+            self.room.stats.turns += 1
+
+    # ---------- outgoing ----------
+    async def send(self, event, data, binary=None):
+        await self.client.emit(event, data, binary)
+        self.room.stats.sent += 1
+
+    def candidates(self):
+        """Words in the bank that fit the hint: first...last letter and length"""
+        hint, n = self.hint, self.word_length
+        words = [w for w in self.bank.words if len(w) == n]
+        if len(hint) > 3 and '...' in hint:
+            words = [w for w in words if w[0] == hint[0] and w[-1] == hint[-1]]
+        return words
+
+    async def play(self, chat_interval, think_time):
+        room_id = self.room.room_id
+        await self.send('join', {'room_id': room_id, 'player_id': self.player_id, 'token': self.token})
+        turn_seen, guesses, next_chat, guess_after = 0, [], 0.0, 0.0
+        while not self.stop.is_set():
+            now = time.perf_counter()
+            if self.game_state in ('waiting', 'finished') and self.is_host:
+                await self.send('start_game', {'room_id': room_id})
+                await asyncio.sleep(1.0)
+                continue
+            if self.game_state == 'drawing' and self.drawer == self.username:
+                await self.draw_burst(room_id)
+                continue
+            if self.game_state == 'drawing':
+                if self.turn != turn_seen:
+                    turn_seen = self.turn
+                    guesses = self.candidates()
+                    random.shuffle(guesses)
+                    guess_after = now + random.uniform(*think_time)
+                if now >= guess_after and guesses:
+                    self.guessed_at = now  # the latest guess is the one that can score
+                    await self.send('chat_message', {'room_id': room_id, 'player_id': self.player_id,
+                                                     'message': guesses.pop()})
+                    guess_after = now + 0.5
+                elif now >= next_chat:
+                    await self.send('chat_message', {'room_id': room_id, 'player_id': self.player_id,
+                                                     'message': random.choice(self.bank.words) + '؟'})
+                    next_chat = now + chat_interval * random.uniform(0.5, 1.5)
+            await asyncio.sleep(0.1)
+
+    async def draw_burst(self, room_id):
+        """Stream strokes for ~100ms at DRAW_RATE"""
+        room = self.room
+        next_at = time.perf_counter()
+        for _ in range(DRAW_RATE // 10):
+            chunk = stroke_chunk(room.seq)
+            room.seq += 1
+            room.sent_at[chunk] = time.perf_counter()
+            await self.send('draw', {'room_id': room_id}, chunk)
+            room.stats.strokes_sent += 1
+            next_at += 1 / DRAW_RATE
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if len(room.sent_at) > 50000:
+            room.sent_at.clear()
+
+
+class Flooder(Bot):
+    """A seated player that sends draw and chat events nonstop, drawer or not"""
+
+    async def play(self, rate):
+        room_id = self.room.room_id
+        await self.send('join', {'room_id': room_id, 'player_id': self.player_id, 'token': self.token})
+        next_at = time.perf_counter()
+        while not self.stop.is_set() and not self.client.closed:
+            # Ten events per wake-up, paced to `rate` per second overall
+            for i in range(10):
+                # Not counted in events sent: those are the honest bots'
+                if i == 0:
+                    await self.client.emit('chat_message', {'room_id': room_id, 'player_id': self.player_id,
+                                                            'message': random.choice(self.bank.words)})
+                else:
+                    chunk = stroke_chunk(self.room.seq)
+                    self.room.seq += 1
+                    await self.client.emit('draw', {'room_id': room_id}, chunk)
+                self.room.stats.flood_sent += 1
+            next_at += 10 / rate
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+class Spectator:
+    """Watches a room: what the spectator feed delivers, and how late"""
+
+    def __init__(self, room, client):
+        self.room = room
+        self.client = client
+        client.on('draw_batch', self.on_draw_batch)
+        for event in ('room_update', 'canvas_snapshot', 'canvas_cleared', 'round_ended', 'chat_message'):
+            client.on(event, self.on_message)
+
+    def on_message(self, at, data=None, *args):
+        stats = self.room.stats
+        stats.spectator_received += 1
+        stats.spectator_bytes += len(data) if isinstance(data, (bytes, bytearray)) else len(json.dumps(data))
+
+    def on_draw_batch(self, at, packet, *args):
+        stats = self.room.stats
+        stats.spectator_received += 1
+        stats.spectator_bytes += len(packet)
+        sent_at = self.room.sent_at
+        for i in range(0, len(packet) - CHUNK_SIZE + 1, CHUNK_SIZE):
+            t = sent_at.get(bytes(packet[i:i + CHUNK_SIZE]))
+            if t is not None:
+                stats.spectator_latency.append(at - t)
+
+
+def http_post(base, path, body):
+    req = urllib.request.Request(base + path, data=json.dumps(body).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as r:
+        return json.loads(r.read())
+
+
+async def start_room(index, args, base, host, port, make_client, bank, stats, stop, bots, watchers):
+    flooders = 1 if index < args.flooders else 0
+    created = await asyncio.to_thread(http_post, base, '/create-room',
+                                      {'username': f'bot{index}-0', 'max_players': args.players + flooders})
+    room = Room(created['room_id'], stats)
+    seats = [(f'bot{index}-0', created['player_id'], created['token'])]
+    for i in range(1, args.players + flooders):
+        joined = await asyncio.to_thread(http_post, base, '/join-room',
+                                         {'room_id': room.room_id, 'username': f'bot{index}-{i}'})
+        seats.append((f'bot{index}-{i}', joined['player_id'], joined['token']))
+    tasks = []
+    for i, (username, player_id, token) in enumerate(seats):
+        client = make_client(host, port)
+        await client.connect()
+        if i < args.players:
+            bot = Bot(room, client, username, player_id, token, i == 0, bank, stop)
+            play = bot.play(args.chat_interval, (args.think_min, args.think_max))
+        else:
+            bot = Flooder(room, client, username, player_id, token, False, bank, stop)
+            play = bot.play(args.flood_rate)
+        bots.append(bot)
+        tasks.append(asyncio.ensure_future(play))
+    for i in range(args.spectators):
+        client = make_client(host, port)
+        await client.connect()
+        watchers.append(Spectator(room, client))
+        await client.emit('spectate', {'room_id': room.room_id, 'username': f'watch{index}-{i}'})
+    return tasks
+
+
+async def swarm(args, host, port, server_pid):
+    kind, make_client = client_factory(args.client)
+    bank = WordBank.from_json(WORDS_PATH)
+    base = f'http://{host}:{port}'
+    stats, stop, bots, watchers, tasks = Stats(), asyncio.Event(), [], [], []
+    rss_samples = []
+
+    started = time.perf_counter()
+    for index in range(args.rooms):
+        try:
+            tasks += await start_room(index, args, base, host, port, make_client, bank, stats, stop,
+                                      bots, watchers)
+        except Exception as e:
+            stats.errors += 1
+            print(f"  room {index} failed to start: {e}")
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.rooms)
+    ramped = time.perf_counter()
+    print(f"  {len(bots)} bots and {len(watchers)} spectators in {args.rooms} rooms "
+          f"after {ramped - started:.1f}s ({kind} client)")
+
+    # Measure only the steady state
+    stats.stroke_latency.clear()
+    stats.guess_latency.clear()
+    stats.spectator_latency.clear()
+    counters = (stats.sent, stats.received, stats.strokes_sent, stats.turns,
+                stats.spectator_received, stats.spectator_bytes, stats.flood_sent)
+    cpu_before = cpu_seconds(server_pid) if server_pid else None
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        await asyncio.sleep(min(1.0, end - time.perf_counter()))
+        if server_pid:
+            rss_samples.append(rss_mb(server_pid))
+    elapsed = args.duration
+    cpu = (cpu_seconds(server_pid) - cpu_before) / elapsed if server_pid else None
+
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for client in [bot.client for bot in bots] + [w.client for w in watchers]:
+        await client.close()
+
+    sent, received, strokes, turns, watched, watched_bytes, flooded = (now - before for now, before in zip(
+        (stats.sent, stats.received, stats.strokes_sent, stats.turns,
+         stats.spectator_received, stats.spectator_bytes, stats.flood_sent), counters))
+    return {
+        'client': kind,
+        'bots': len(bots),
+        'ramp_seconds': round(ramped - started, 2),
+        'stroke_relay': percentiles(stats.stroke_latency),
+        'guess_to_scoreboard': percentiles(stats.guess_latency),
+        'throughput': {
+            'events_sent_per_sec': round(sent / elapsed, 1),
+            'events_received_per_sec': round(received / elapsed, 1),
+            'strokes_sent_per_sec': round(strokes / elapsed, 1),
+            'turns_completed': turns,
+        },
+        'server_rss_mb': {
+            'peak': round(max(rss_samples), 1) if rss_samples else None,
+            'end': round(rss_samples[-1], 1) if rss_samples else None,
+        },
+        'server_cpu_percent': round(cpu * 100, 1) if cpu is not None else None,
+        'spectators': {
+            'count': len(watchers),
+            'stroke_delay': percentiles(stats.spectator_latency),
+            'events_received_per_sec': round(watched / elapsed, 1),
+            'bytes_received_per_sec': round(watched_bytes / elapsed),
+        },
+        'flood': {
+            'flooders': sum(isinstance(bot, Flooder) for bot in bots),
+            'events_sent_per_sec': round(flooded / elapsed, 1),
+            'disconnected': sum(isinstance(bot, Flooder) and bot.client.closed for bot in bots),
+        },
+        'errors': stats.errors,
+    }
+
+
+# ========== RESULTS ==========
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path):
+    """Print the headline numbers of two result files side by side"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    rows = [
+        ('stroke p50 ms', ('results', 'stroke_relay', 'p50_ms')),
+        ('stroke p99 ms', ('results', 'stroke_relay', 'p99_ms')),
+        ('guess p50 ms', ('results', 'guess_to_scoreboard', 'p50_ms')),
+        ('guess p99 ms', ('results', 'guess_to_scoreboard', 'p99_ms')),
+        ('sent/s', ('results', 'throughput', 'events_sent_per_sec')),
+        ('received/s', ('results', 'throughput', 'events_received_per_sec')),
+        ('rss peak MB', ('results', 'server_rss_mb', 'peak')),
+        ('server cpu %', ('results', 'server_cpu_percent')),
+        ('spectator p50', ('results', 'spectators', 'stroke_delay', 'p50_ms')),
+    ]
+
+    def dig(doc, path):
+        for key in path:
+            doc = doc.get(key) if isinstance(doc, dict) else None
+        return doc
+
+    print(f"{'':16}{old.get('commit') or old_path:>14}{new.get('commit') or new_path:>14}{'change':>10}")
+    for label, path in rows:
+        a, b = dig(old, path), dig(new, path)
+        change = f"{(b / a - 1) * 100:+.1f}%" if a and b is not None else ''
+        print(f"{label:16}{a if a is not None else '-':>14}{b if b is not None else '-':>14}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--spectators', type=int, default=0, help='spectators per room')
+    parser.add_argument('--flooders', type=int, default=0, help='flooding players, one per room')
+    parser.add_argument('--flood-rate', type=float, default=2000, help='events per second per flooder')
+    parser.add_argument('--duration', type=float, default=30, help='seconds measured after the ramp')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which rooms are added')
+    parser.add_argument('--chat-interval', type=float, default=2.0, help='seconds between chat per guesser')
+    parser.add_argument('--think-min', type=float, default=3.0)
+    parser.add_argument('--think-max', type=float, default=10.0)
+    parser.add_argument('--client', choices=('auto', 'python-socketio', 'eio'), default='auto')
+    parser.add_argument('--mode', default='threading', help='NEON_ASYNC_MODE for the local server')
+    parser.add_argument('--url', help='target a running server instead, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--pid', type=int, help='with --url, the server process to sample RSS and CPU of')
+    parser.add_argument('--out', help='result file (default benchmarks/results/loadtest-<commit>-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    proc = None
+    if args.url:
+        host, port = args.url.split('//', 1)[-1].rstrip('/').rsplit(':', 1)
+        port = int(port)
+    else:
+        host, port = '127.0.0.1', free_port()
+        proc = start_server(args.mode, port)
+    try:
+        print(f"load test: {args.rooms} rooms x {args.players} bots"
+              f" (+{args.spectators} spectators each), {args.duration:.0f}s")
+        results = asyncio.run(swarm(args, host, port, proc.pid if proc else args.pid))
+    finally:
+        if proc:
+            proc.kill()
+            proc.wait()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        'results': results,
+    }
+    out = args.out or os.path.join(HERE, 'results', f"loadtest-{commit or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"saved {out}")
+
+
+if __name__ == '__main__':
+    main()
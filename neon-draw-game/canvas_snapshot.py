@@ -0,0 +1,91 @@
+from typing import Iterator, List
+
+from stroke_codec import Stroke, decode_strokes, encode_strokes, merge_strokes
+
+
+def thin_strokes(strokes: List[Stroke]) -> List[Stroke]:
+    """Drop every other interior point, keeping stroke endpoints"""
+    thinned = []
+    for stroke in strokes:
+        pts = stroke.points
+        if len(pts) > 2:
+            pts = pts[:-1:2] + [pts[-1]]
+        thinned.append(Stroke(stroke.color, stroke.width, pts))
+    return thinned
+
+
+class CanvasLog:
+    """Stroke log for the current turn: a compacted keyframe plus a short tail
+
+    Batches are appended to the tail as they are relayed. Once the tail holds
+    `max_tail` batches it is folded into the keyframe (adjacent strokes merged,
+    one record header per polyline), so a snapshot is always one buffer and
+    memory stays under `max_bytes` per room.
+    """
+
+    __slots__ = ('max_tail', 'max_bytes', 'keyframe', 'tail', 'tail_bytes', 'compactions')
+
+    def __init__(self, max_tail: int = 32, max_bytes: int = 256 * 1024):
+        self.max_tail = max_tail
+        self.max_bytes = max_bytes
+        self.keyframe = b''
+        self.tail: List[bytes] = []
+        self.tail_bytes = 0
+        self.compactions = 0
+
+    def append(self, chunk: bytes):
+        """Add an encoded stroke batch"""
+        if not chunk:
+            return
+        self.tail.append(chunk)
+        self.tail_bytes += len(chunk)
+        if len(self.tail) >= self.max_tail or self.nbytes > self.max_bytes:
+            self.compact()
+
+    def extend(self, chunks):
+        for chunk in chunks:
+            self.append(chunk)
+
+    def compact(self):
+        """Fold the tail into the keyframe, thinning it if over budget"""
+        if self.tail:
+            folded = encode_strokes(merge_strokes(decode_strokes(b''.join(self.tail))))
+            self.keyframe += folded
+            self.tail = []
+            self.tail_bytes = 0
+            self.compactions += 1
+
+        if len(self.keyframe) > self.max_bytes:
+            strokes = merge_strokes(decode_strokes(self.keyframe))
+            encoded = encode_strokes(strokes)
+            while len(encoded) > self.max_bytes and any(len(s.points) > 2 for s in strokes):
+                strokes = thin_strokes(strokes)
+                encoded = encode_strokes(strokes)
+            # Last resort for thousands of tiny strokes: forget the oldest ones
+            while len(encoded) > self.max_bytes and len(strokes) > 1:
+                strokes = strokes[len(strokes) // 4 or 1:]
+                encoded = encode_strokes(strokes)
+            self.keyframe = encoded
+
+    def snapshot(self) -> bytes:
+        """Current drawing as one encoded buffer"""
+        if not self.tail:
+            return self.keyframe
+        return self.keyframe + b''.join(self.tail)
+
+    def clear(self):
+        self.keyframe = b''
+        self.tail = []
+        self.tail_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.keyframe) + self.tail_bytes
+
+    def __len__(self) -> int:
+        return len(self.tail) + (1 if self.keyframe else 0)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.keyframe:
+            yield self.keyframe
+        yield from self.tail
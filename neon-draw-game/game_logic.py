@@ -1,38 +1,125 @@
-import json
+import hmac
 import random
+import secrets
 import time
-from datetime import datetime
+from array import array
+from contextlib import contextmanager
 from typing import Dict, List, Optional
 
+from canvas_snapshot import CanvasLog
+from guess_matcher import WordKey, match_guess
+from leaderboard import Leaderboard, SharedLeaderboard
+from lobby import LobbyIndex
+from room_store import InMemoryRoomStore
+from word_bank import WordBank, WordSampler, get_word_bank
+
+AVATAR_COLORS = (
+    '#FF6B6B', '#4ECDC4', '#FFD166', '#06D6A0',
+    '#118AB2', '#EF476F', '#073B4C', '#7209B7',
+    '#3A86FF', '#FB5607', '#8338EC', '#FF006E'
+)
+
 class GameRoom:
-    def __init__(self, room_id: str, host_id: str, max_players: int = 8):
+    """One game: seats, turn state, scores and the canvas
+
+    Slotted, and sharing the word bank and state/color strings, so 100k
+    rooms cost little beyond their players. Scores live in an array
+    parallel to `players`; `scores` builds the dict clients see.
+    """
+    MAX_SPECTATORS = 1000
+    CHAT_HISTORY = 50  # chat messages kept for players who join late
+
+    __slots__ = (
+        'room_id', 'host_id', 'max_players', 'category', 'difficulty', 'public',
+        'players', 'spectators', 'game_state', 'current_drawer', 'current_word',
+        'current_key', 'round_time', 'intermission', 'round_start_time', 'turn_id',
+        'round', 'max_rounds', 'word_sampler', 'chat_messages', 'canvas_data',
+        '_scores', 'leaderboard', 'global_leaderboard', 'lobby', '_leaderboard_cache',
+        'word_hint', 'version', '_dirty', 'last_activity', 'drawer_seat',
+    )
+    _NO_LEADERBOARD = (-1, [])  # shared until the first get_leaderboard()
+
+    def __init__(self, room_id: str, host_id: str, max_players: int = 8,
+                 category: Optional[str] = None, difficulty: Optional[str] = None,
+                 public: bool = False):
         self.room_id = room_id
         self.host_id = host_id
         self.max_players = max_players
+        self.category = category
+        self.difficulty = difficulty
+        self.public = public  # listed in the lobby and open to quick join
         self.players: Dict[str, Player] = {}
+        self.spectators: Dict[str, str] = {}  # spectator_id -> username; no seat, no score
         self.game_state = "waiting"  # waiting, drawing, guessing, finished
         self.current_drawer: Optional[str] = None
+        self.drawer_seat = 0  # current_drawer's index in players, kept if they leave
         self.current_word: str = ""
+        self.current_key: Optional[WordKey] = None
         self.round_time = 80  # seconds
+        self.intermission = 5  # seconds between turns
         self.round_start_time: Optional[float] = None
+        self.turn_id = 0  # bumped every turn so stale timers can be ignored
         self.round = 1
         self.max_rounds = 3
-        self.word_list: List[str] = []
-        self.chat_messages: List[Dict] = []
-        self.canvas_data: List[Dict] = []
-        self.scores: Dict[str, int] = {}
+        bank = get_word_bank()
+        self.word_sampler = WordSampler(bank, bank.select(category, difficulty))
+        self.chat_messages: List[Dict] = []  # the last CHAT_HISTORY, oldest first
+        self.canvas_data = CanvasLog()  # encoded stroke batches, see stroke_codec
+        self._scores = array('q')  # parallel to players
+        self.leaderboard = Leaderboard()
+        self.global_leaderboard: Optional[Leaderboard] = None  # set by GameManager
+        self.lobby: Optional[LobbyIndex] = None  # set by GameManager
+        self._leaderboard_cache = self._NO_LEADERBOARD
         self.word_hint: str = ""
-        self.load_arabic_words()
-        
-    def load_arabic_words(self):
-        """Load Arabic words from JSON file"""
-        try:
-            with open('data/arabic_words.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.word_list = data['words']
-        except:
-            # Fallback words if file not found
-            self.word_list = ["قلم", "كتاب", "شمس", "قمر", "بحر", "جبل", "زهرة", "بيت"]
+        self.version = 0  # bumped each time a delta is published
+        self._dirty = 0  # bit per DELTA_FIELDS entry changed since then
+        self.last_activity = time.time()  # wall clock, comparable across workers
+
+    @property
+    def word_bank(self) -> WordBank:
+        """The process-wide word bank (never copied per room)"""
+        return get_word_bank()
+
+    @property
+    def word_list(self) -> List[str]:
+        return get_word_bank().words
+
+    # Process-local references are dropped when a room is pickled into a
+    # shared store and reattached when it is loaded back
+    _LOCAL_ATTRS = ('global_leaderboard', 'lobby', '_leaderboard_cache')
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__ if attr not in self._LOCAL_ATTRS}
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+        self.global_leaderboard = None
+        self.lobby = None
+        self._leaderboard_cache = self._NO_LEADERBOARD
+
+    @property
+    def scores(self) -> Dict[str, int]:
+        """player_id -> score, in seat order"""
+        return dict(zip(self.players, self._scores))
+
+    def _seat(self, player_id: str) -> int:
+        """Index of a player in `players` (and `_scores`)"""
+        for i, pid in enumerate(self.players):
+            if pid == player_id:
+                return i
+        raise KeyError(player_id)
+
+    def add_chat(self, chat: Dict):
+        """Keep a chat message in the history, dropping the oldest past CHAT_HISTORY"""
+        self.chat_messages.append(chat)
+        if len(self.chat_messages) > self.CHAT_HISTORY:
+            del self.chat_messages[0]
+
+    def update_lobby(self):
+        """Refresh this room's lobby entry after players or state changed"""
+        if self.lobby is not None:
+            self.lobby.update(self)
     
     def add_player(self, player_id: str, username: str, avatar_color: str):
         """Add a new player to the room"""
@@ -40,16 +127,34 @@ class GameRoom:
             return False
         if player_id not in self.players:
             self.players[player_id] = Player(player_id, username, avatar_color)
-            self.scores[player_id] = 0
+            self._scores.append(0)
+            self.leaderboard.set(player_id, 0)
+            self.mark_dirty('players', 'scores', 'leaderboard')
+            self.update_lobby()
             return True
         return False
     
+    def add_spectator(self, spectator_id: str, username: str) -> bool:
+        """Let someone watch without a seat (doesn't count toward max_players)"""
+        if len(self.spectators) >= self.MAX_SPECTATORS or spectator_id in self.players:
+            return False
+        self.spectators[spectator_id] = username
+        return True
+
+    def remove_spectator(self, spectator_id: str):
+        self.spectators.pop(spectator_id, None)
+
     def remove_player(self, player_id: str):
         """Remove a player from the room"""
         if player_id in self.players:
+            seat = self._seat(player_id)
+            del self._scores[seat]
             del self.players[player_id]
-            if player_id in self.scores:
-                del self.scores[player_id]
+            # Later seats shift down; a departing drawer's seat passes to the player after them
+            if seat < self.drawer_seat:
+                self.drawer_seat -= 1
+            self.leaderboard.remove(player_id)
+            self.mark_dirty('players', 'scores', 'leaderboard')
             
             # If drawer leaves, end round
             if player_id == self.current_drawer:
@@ -58,6 +163,8 @@ class GameRoom:
             # If no players left or only one player, reset game
             if len(self.players) <= 1:
                 self.game_state = "waiting"
+                self.mark_dirty('game_state', 'word_hint')
+            self.update_lobby()
     
     def start_game(self):
         """Start the game"""
@@ -66,7 +173,11 @@ class GameRoom:
         
         self.game_state = "drawing"
         self.round = 1
-        self.scores = {pid: 0 for pid in self.players}
+        self._scores = array('q', bytes(8 * len(self.players)))
+        self.leaderboard.clear()
+        for pid in self.players:
+            self.leaderboard.set(pid, 0)
+        self.mark_dirty('round', 'scores', 'leaderboard')
         self.next_turn()
         return True
     
@@ -78,16 +189,18 @@ class GameRoom:
         player_ids = list(self.players.keys())
         
         # Choose next drawer
-        if self.current_drawer:
-            current_index = player_ids.index(self.current_drawer)
-            next_index = (current_index + 1) % len(player_ids)
+        if self.current_drawer in self.players:
+            next_index = (player_ids.index(self.current_drawer) + 1) % len(player_ids)
         else:
-            next_index = 0
+            # First turn, or the drawer left: whoever now holds their seat
+            next_index = self.drawer_seat % len(player_ids)
             
         self.current_drawer = player_ids[next_index]
+        self.drawer_seat = next_index
         
         # Select random word
-        self.current_word = random.choice(self.word_list)
+        self.current_word = self.word_sampler.next_word()
+        self.current_key = self.word_bank.key_of(self.current_word)
         
         # Generate hint (show first and last letter)
         if len(self.current_word) > 2:
@@ -96,8 +209,11 @@ class GameRoom:
             self.word_hint = ".."
         
         self.round_start_time = time.time()
+        self.turn_id += 1
         self.game_state = "drawing"
-        self.canvas_data = []
+        self.canvas_data.clear()
+        self.mark_dirty('game_state', 'current_drawer', 'word_hint', 'remaining_time')
+        self.update_lobby()
         
         # Notify players
         return {
@@ -109,27 +225,28 @@ class GameRoom:
     
     def submit_guess(self, player_id: str, guess: str) -> Dict:
         """Process a player's guess"""
-        guess_lower = guess.strip().lower()
-        word_lower = self.current_word.lower()
+        verdict = match_guess(self.current_key, guess) if self.current_key else None
         
         result = {
             'correct': False,
+            'close': verdict == 'close',
             'player': self.players[player_id].username,
             'guess': guess
         }
         
-        if guess_lower == word_lower and player_id != self.current_drawer:
+        # Only the first correct guess of a turn scores; it ends the turn
+        if verdict == 'correct' and self.game_state == "drawing" and player_id != self.current_drawer:
             # Calculate score based on speed
             elapsed = time.time() - self.round_start_time
             time_bonus = max(0, int((self.round_time - elapsed) * 10))
             base_score = 100
             total_score = base_score + time_bonus
             
-            self.scores[player_id] += total_score
+            self.add_score(player_id, total_score)
             
             # Give drawer some points too
-            if self.current_drawer in self.scores:
-                self.scores[self.current_drawer] += 50
+            if self.current_drawer in self.players:
+                self.add_score(self.current_drawer, 50)
             
             result['correct'] = True
             result['score'] = total_score
@@ -149,47 +266,124 @@ class GameRoom:
             self.game_state = "finished"
         else:
             self.round += 1
+        self.mark_dirty('game_state', 'round', 'word_hint')
+        self.update_lobby()
     
-    def get_remaining_time(self) -> int:
-        """Get remaining time in current round"""
+    def time_left(self) -> float:
+        """Seconds until the current round's deadline, unrounded"""
         if not self.round_start_time:
-            return self.round_time
-        elapsed = time.time() - self.round_start_time
-        return max(0, int(self.round_time - elapsed))
+            return float(self.round_time)
+        return max(0.0, self.round_start_time + self.round_time - time.time())
+
+    def get_remaining_time(self) -> int:
+        """Get remaining time in current round (whole seconds, for display)"""
+        return int(self.time_left())
     
-    def get_leaderboard(self) -> List[Dict]:
-        """Get sorted leaderboard"""
-        sorted_scores = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
-        return [
-            {
-                'username': self.players[pid].username,
-                'score': score,
-                'avatar_color': self.players[pid].avatar_color
-            }
-            for pid, score in sorted_scores
-        ]
+    def add_score(self, player_id: str, points: int):
+        """Award points, keeping the room and global leaderboards in step"""
+        seat = self._seat(player_id)
+        self._scores[seat] += points
+        self.leaderboard.set(player_id, self._scores[seat])
+        if self.global_leaderboard is not None:
+            player = self.players[player_id]
+            self.global_leaderboard.add(player_id, points, {
+                'username': player.username,
+                'avatar_color': player.avatar_color,
+                'room_id': self.room_id
+            })
+        self.mark_dirty('scores', 'leaderboard')
+
+    def get_leaderboard(self, k: Optional[int] = None) -> List[Dict]:
+        """Get sorted leaderboard (cached until the next score change)"""
+        version, cached = self._leaderboard_cache
+        if version != self.leaderboard.version:
+            cached = [
+                {
+                    'username': self.players[pid].username,
+                    'score': score,
+                    'avatar_color': self.players[pid].avatar_color
+                }
+                for pid, score in self.leaderboard.top()
+            ]
+            self._leaderboard_cache = (self.leaderboard.version, cached)
+        return cached if k is None else cached[:k]
+
+    def get_rank(self, player_id: str) -> Optional[int]:
+        """1-based rank of a player in this room"""
+        return self.leaderboard.rank(player_id)
     
     def get_room_data(self) -> Dict:
         """Get complete room data for clients"""
         return {
             'room_id': self.room_id,
-            'players': [p.to_dict() for p in self.players.values()],
+            'version': self.version,
+            'players': self._field_players(),
             'game_state': self.game_state,
-            'current_drawer': self.players[self.current_drawer].username if self.current_drawer else None,
+            'current_drawer': self._field_current_drawer(),
             'round': self.round,
             'max_rounds': self.max_rounds,
             'scores': self.scores,
-            'word_hint': self.word_hint if self.game_state == "drawing" else "",
+            'word_hint': self._field_word_hint(),
             'remaining_time': self.get_remaining_time(),
-            'leaderboard': self.get_leaderboard()
+            'leaderboard': self.get_leaderboard(),
+            'spectators': len(self.spectators)
+        }
+
+    # ========== VERSIONED DELTAS ==========
+    def _field_players(self) -> List[Dict]:
+        return [p.to_dict() for p in self.players.values()]
+
+    def _field_current_drawer(self) -> Optional[str]:
+        drawer = self.players.get(self.current_drawer) if self.current_drawer else None
+        return drawer.username if drawer else None
+
+    def _field_word_hint(self) -> str:
+        return self.word_hint if self.game_state == "drawing" else ""
+
+    DELTA_FIELDS = {
+        'players': _field_players,
+        'game_state': lambda self: self.game_state,
+        'current_drawer': _field_current_drawer,
+        'round': lambda self: self.round,
+        'scores': lambda self: self.scores,
+        'word_hint': _field_word_hint,
+        'remaining_time': lambda self: self.get_remaining_time(),
+        'leaderboard': lambda self: self.get_leaderboard(),
+    }
+
+    _DELTA_BITS = {field: 1 << i for i, field in enumerate(DELTA_FIELDS)}
+
+    def mark_dirty(self, *fields: str):
+        """Record fields that changed since the last published version"""
+        for field in fields:
+            self._dirty |= self._DELTA_BITS[field]
+
+    def pop_delta(self) -> Optional[Dict]:
+        """Bump the version and return only the fields that changed, if any"""
+        if not self._dirty:
+            return None
+        dirty, self._dirty = self._dirty, 0
+        self.version += 1
+        return {
+            'room_id': self.room_id,
+            'version': self.version,
+            'changes': {f: get(self) for f, get in self.DELTA_FIELDS.items() if dirty & self._DELTA_BITS[f]}
         }
 
 class Player:
+    __slots__ = ('id', 'username', 'avatar_color', 'joined_at', 'token')
+
     def __init__(self, player_id: str, username: str, avatar_color: str):
         self.id = player_id
         self.username = username
         self.avatar_color = avatar_color
-        self.joined_at = datetime.now()
+        self.joined_at = time.time()
+        # The id is public (room updates carry it); only the seat's owner has this
+        self.token = secrets.token_urlsafe(16)
+
+    def check_token(self, token) -> bool:
+        """Whether token is this seat's secret (constant-time compare)"""
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
     
     def to_dict(self):
         return {
@@ -199,36 +393,165 @@ class Player:
         }
 
 class GameManager:
-    def __init__(self):
-        self.rooms: Dict[str, GameRoom] = {}
-        self.room_codes = set()
+    def __init__(self, store=None):
+        # Any mapping of room_id -> GameRoom with save() and transaction(),
+        # see room_store.py; defaults to plain in-process dict storage
+        self.rooms = store if store is not None else InMemoryRoomStore()
+        self.global_leaderboard = SharedLeaderboard(max_size=10000)
+        self.lobby = LobbyIndex()
+        self.evicted = 0  # rooms reaped by this process since start
+        if getattr(self.rooms, 'on_load', False) is None:
+            self.rooms.on_load = self.attach_room
+
+    def attach_room(self, room: GameRoom):
+        """Reconnect a room loaded from a shared store to process-wide state"""
+        room.global_leaderboard = self.global_leaderboard
+        room.lobby = self.lobby
+
+    @contextmanager
+    def room_transaction(self, room_id: str):
+        """Context manager yielding the room (or None) for a read-modify-write
+
+        The room's lock is held for the whole block; transactions on the same
+        room nest. Socket handlers wrap the atomic operations below in their
+        own transaction so their emits stay ordered with the state change.
+        Every transaction counts as activity for the idle reaper.
+        """
+        with self.rooms.transaction(room_id) as room:
+            if room is not None:
+                room.last_activity = time.time()
+            yield room
     
-    def create_room(self, host_id: str, username: str, max_players: int = 8) -> str:
+    def create_room(self, host_id: str, username: str, max_players: int = 8,
+                    category: Optional[str] = None, difficulty: Optional[str] = None,
+                    public: bool = False) -> str:
         """Create a new game room"""
-        room_id = self.generate_room_code()
-        room = GameRoom(room_id, host_id, max_players)
+        room = GameRoom(self.generate_room_code(), host_id, max_players, category, difficulty, public)
+        room.global_leaderboard = self.global_leaderboard
         room.add_player(host_id, username, self.random_color())
-        self.rooms[room_id] = room
-        return room_id
+        # Claim the code and insert in one step; draw again on a collision
+        while not self.rooms.add(room):
+            room.room_id = self.generate_room_code()
+        # Index only once the code is final
+        with self.room_transaction(room.room_id) as room:
+            room.lobby = self.lobby
+            room.update_lobby()
+            return room.room_id
     
+    def seat_token(self, room_id: str, player_id: str) -> Optional[str]:
+        """The secret a socket must present on `join` to act as this seat"""
+        room = self.rooms.get(room_id)
+        player = room.players.get(player_id) if room is not None else None
+        return player.token if player is not None else None
+
     def join_room(self, room_id: str, player_id: str, username: str) -> bool:
         """Join an existing room"""
-        if room_id in self.rooms:
-            room = self.rooms[room_id]
-            if room.game_state == "waiting":
+        with self.room_transaction(room_id) as room:
+            if room is not None and room.game_state == "waiting":
                 return room.add_player(player_id, username, self.random_color())
         return False
     
     def leave_room(self, room_id: str, player_id: str):
         """Leave a room"""
-        if room_id in self.rooms:
-            room = self.rooms[room_id]
-            room.remove_player(player_id)
-            
-            # Clean up empty rooms
-            if not room.players:
-                del self.rooms[room_id]
+        with self.room_transaction(room_id) as room:
+            if room is not None:
+                room.remove_player(player_id)
+                
+                # Clean up empty rooms
+                if not room.players:
+                    del self.rooms[room_id]
+                    self.lobby.remove(room_id)
+
+    def quick_join(self, player_id: str, username: str, attempts: int = 8) -> Optional[str]:
+        """Seat a player in the best open public room; returns its id"""
+        tried = set()
+        for _ in range(attempts):
+            room_id = self.lobby.best("waiting", tried)
+            if room_id is None:
+                break
+            # The index may be a step behind; join_room re-checks under the lock
+            if self.join_room(room_id, player_id, username):
+                return room_id
+            if room_id not in self.rooms:
+                self.lobby.remove(room_id)
+            tried.add(room_id)
+        return None
+
+    def start_game(self, room_id: str) -> Optional[Dict]:
+        """Start the game and the first turn; returns the turn info"""
+        with self.room_transaction(room_id) as room:
+            if room is not None and room.game_state in ("waiting", "finished") and room.start_game():
+                return room.next_turn()
+        return None
+
+    def submit_guess(self, room_id: str, player_id: str, guess: str) -> Optional[Dict]:
+        """Check a guess against the current word; None if it isn't a guess"""
+        with self.room_transaction(room_id) as room:
+            if (room is None or player_id not in room.players
+                    or room.game_state != "drawing" or player_id == room.current_drawer):
+                return None
+            return room.submit_guess(player_id, guess)
+
+    def expire_turn(self, room_id: str, turn_id: int) -> Optional[str]:
+        """End turn `turn_id` if it is still running; returns its word"""
+        with self.room_transaction(room_id) as room:
+            if room is None or room.turn_id != turn_id or room.game_state != "drawing":
+                return None
+            word = room.current_word
+            room.end_round()
+            return word
+
+    def advance_turn(self, room_id: str, turn_id: int) -> Optional[Dict]:
+        """Start the turn after `turn_id` unless something already moved on"""
+        with self.room_transaction(room_id) as room:
+            if room is None or room.turn_id != turn_id or room.game_state != "between_rounds":
+                return None
+            return room.next_turn()
     
+    # ========== IDLE ROOM EVICTION ==========
+    def reap_rooms(self, idle_ttl: float, finished_ttl: float,
+                   now: Optional[float] = None) -> List[str]:
+        """Delete rooms idle for idle_ttl seconds (finished games after
+        finished_ttl); returns the evicted room ids"""
+        now = time.time() if now is None else now
+
+        def expired(room) -> bool:
+            ttl = finished_ttl if room.game_state == "finished" else idle_ttl
+            return now - room.last_activity >= ttl
+
+        evicted = []
+        for room_id in list(self.rooms):
+            # Cheap unlocked check first; confirm under the lock
+            room = self.rooms.get(room_id)
+            if room is None or not expired(room):
+                continue
+            with self.rooms.transaction(room_id) as room:
+                if room is not None and expired(room):
+                    del self.rooms[room_id]
+                    self.lobby.remove(room_id)
+                    evicted.append(room_id)
+        self.evicted += len(evicted)
+        return evicted
+
+    def room_stats(self, idle_after: float = 300) -> Dict[str, int]:
+        """Counts of live rooms, rooms idle for idle_after seconds, and rooms evicted"""
+        now = time.time()
+        rooms = [self.rooms.get(room_id) for room_id in list(self.rooms)]
+        idle = sum(1 for room in rooms if room is not None and now - room.last_activity >= idle_after)
+        live = sum(1 for room in rooms if room is not None) - idle
+        return {'live': live, 'idle': idle, 'evicted': self.evicted}
+
+    def occupancy(self) -> Dict[str, int]:
+        """Players and stored canvas across all rooms, for monitoring"""
+        players = batches = nbytes = 0
+        for room_id in list(self.rooms):
+            room = self.rooms.get(room_id)
+            if room is not None:
+                players += len(room.players)
+                batches += len(room.canvas_data)
+                nbytes += room.canvas_data.nbytes
+        return {'players': players, 'canvas_batches': batches, 'canvas_bytes': nbytes}
+
     def generate_room_code(self) -> str:
         """Generate a unique 6-character room code"""
         import string
@@ -238,10 +561,5 @@ class GameManager:
                 return code
     
     def random_color(self) -> str:
-        """Generate a random avatar color"""
-        colors = [
-            '#FF6B6B', '#4ECDC4', '#FFD166', '#06D6A0', 
-            '#118AB2', '#EF476F', '#073B4C', '#7209B7',
-            '#3A86FF', '#FB5607', '#8338EC', '#FF006E'
-        ]
-        return random.choice(colors)
\ No newline at end of file
+        """Pick a random avatar color"""
+        return random.choice(AVATAR_COLORS)
\ No newline at end of file
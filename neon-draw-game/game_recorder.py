@@ -0,0 +1,254 @@
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+# File layout: MAGIC, then records of RECORD header + payload. Stroke
+# payloads are the encoded batches from stroke_codec; everything else is JSON.
+MAGIC = b'NEONLOG1'
+RECORD = struct.Struct('<BII')  # kind, milliseconds since the game began, payload length
+SUFFIX = '.ngl'
+GAME_ID = re.compile(r'[A-Z0-9]+-\d+')
+
+# Record kinds
+GAME, STROKES, CLEAR, CHAT, TURN, ROUND_END, SCORES, GAME_END = range(8)
+KIND_NAMES = ('game', 'strokes', 'clear', 'chat', 'turn', 'round_end', 'scores', 'game_end')
+
+Game = Tuple[str, float]  # (game_id, wall clock start)
+
+
+class GameRecorder:
+    """Append-only log of every game, one file per game
+
+    Handlers only append to an in-memory queue; a writer thread drains it
+    every `interval` seconds and writes each game's records with a single
+    write, so nothing on the request path waits for the disk. Payloads must
+    not be mutated after they are recorded. A crash loses at most the last
+    interval, and a torn final record is skipped on replay.
+
+    The writer also prunes finished logs older than `max_age` seconds, then
+    the oldest ones past `max_bytes` in all (None: no limit).
+    """
+
+    PRUNE_INTERVAL = 60  # seconds between retention sweeps
+
+    def __init__(self, directory: Optional[str], interval: float = 0.25,
+                 max_age: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.directory = directory  # None disables recording
+        self.interval = interval
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.pruned = 0  # logs deleted by the retention sweep
+        self._active: Dict[str, Game] = {}  # room_id -> game being recorded
+        self._queue: Deque[Tuple[Game, int, float, Any]] = deque()
+        self._files: Dict[str, BinaryIO] = {}  # game_id -> open log (writer thread only)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.bytes_written = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def begin(self, room_id: str, meta: Dict) -> Optional[str]:
+        """Start a new log for the room's game (ending any previous one)"""
+        if not self.directory:
+            return None
+        self.end(room_id)
+        now = time.time()
+        game = (f'{room_id}-{int(now * 1000)}', now)
+        self._active[room_id] = game
+        self._queue.append((game, GAME, now, {**meta, 'room_id': room_id, 'started': now}))
+        return game[0]
+
+    def record(self, room_id: str, kind: int, payload: Any):
+        """Queue an event for the room's game; a no-op if none is being recorded"""
+        game = self._active.get(room_id)
+        if game is not None:
+            self._queue.append((game, kind, time.time(), payload))
+
+    def end(self, room_id: str, summary: Optional[Dict] = None):
+        """Close the room's log after its last queued event"""
+        game = self._active.pop(room_id, None)
+        if game is not None:
+            self._queue.append((game, GAME_END, time.time(), summary or {}))
+
+    def pending(self) -> int:
+        """Events waiting for the writer"""
+        return len(self._queue)
+
+    # ========== WRITER ==========
+    def drain(self) -> int:
+        """Write everything queued so far; returns bytes written"""
+        buffers: Dict[str, bytearray] = {}
+        finished = []
+        queue = self._queue
+        while queue:
+            (game_id, started), kind, at, payload = queue.popleft()
+            buffer = buffers.get(game_id)
+            if buffer is None:
+                if kind == GAME:
+                    try:
+                        self._files[game_id] = open(self.path_of(game_id), 'ab')
+                    except OSError as e:
+                        print(f"⚠️  Cannot record game {game_id}: {e}")
+                        continue
+                    buffer = buffers[game_id] = bytearray(MAGIC)
+                elif game_id in self._files:
+                    buffer = buffers[game_id] = bytearray()
+                else:
+                    continue  # its log failed to open, or closed already
+            if not isinstance(payload, (bytes, bytearray)):
+                payload = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            buffer += RECORD.pack(kind, max(0, int((at - started) * 1000)), len(payload))
+            buffer += payload
+            if kind == GAME_END:
+                finished.append(game_id)
+
+        written = 0
+        for game_id, buffer in buffers.items():
+            log = self._files[game_id]
+            try:
+                log.write(buffer)
+                log.flush()
+                written += len(buffer)
+            except OSError as e:
+                print(f"⚠️  Recording of game {game_id} stopped: {e}")
+                finished.append(game_id)
+        for game_id in finished:
+            log = self._files.pop(game_id, None)
+            if log is not None:
+                log.close()
+        self.bytes_written += written
+        return written
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        if self._thread is not None or not self.directory:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='game-recorder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer, write what is queued and close every log"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.drain()
+        for log in self._files.values():
+            log.close()
+        self._files.clear()
+
+    def _run(self):
+        next_prune = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            try:
+                self.drain()
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + self.PRUNE_INTERVAL
+                    self.prune()
+            except Exception as e:
+                print(f"⚠️  Game recording failed: {e}")
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete finished logs past max_age, then the oldest past max_bytes"""
+        if self.max_age is None and self.max_bytes is None:
+            return 0
+        now = time.time() if now is None else now
+        games = [g for g in self.games() if not g['recording']]
+        total = sum(g['bytes'] for g in games)
+        removed = 0
+        for game in reversed(games):  # oldest first
+            expired = self.max_age is not None and now - game['started'] > self.max_age
+            if not expired and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            try:
+                os.remove(self.path_of(game['game_id']))
+            except OSError:
+                continue
+            total -= game['bytes']
+            removed += 1
+        self.pruned += removed
+        return removed
+
+    # ========== STORED GAMES ==========
+    def recording(self, game_id: str) -> bool:
+        """Whether the game is still being played (and recorded)"""
+        return any(g[0] == game_id for g in list(self._active.values())) or game_id in self._files
+
+    def path_of(self, game_id: str) -> Optional[str]:
+        """Log path for a game id, or None if the id is malformed"""
+        if not self.directory or not GAME_ID.fullmatch(game_id or ''):
+            return None
+        return os.path.join(self.directory, game_id + SUFFIX)
+
+    def games(self) -> List[Dict]:
+        """Recorded games, newest first"""
+        if not self.directory:
+            return []
+        games = []
+        for entry in os.scandir(self.directory):
+            game_id = entry.name[:-len(SUFFIX)]
+            if entry.name.endswith(SUFFIX) and GAME_ID.fullmatch(game_id):
+                room_id, started = game_id.rsplit('-', 1)
+                games.append({
+                    'game_id': game_id,
+                    'room_id': room_id,
+                    'started': int(started) / 1000,
+                    'bytes': entry.stat().st_size,
+                    'recording': self.recording(game_id)
+                })
+        games.sort(key=lambda g: g['started'], reverse=True)
+        return games
+
+
+class GameLog:
+    """A recorded game read through mmap, one record at a time
+
+    Only the records being iterated are copied out of the mapping, so long
+    games replay without being loaded into memory. A log still being
+    written is read up to its size when it was opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f'{path} is empty')
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a game log')
+
+    def __iter__(self) -> Iterator[Tuple[float, int, bytes]]:
+        """(seconds since the game began, kind, raw payload) per record"""
+        data, offset, end = self._map, len(MAGIC), len(self._map)
+        while offset + RECORD.size <= end:
+            kind, at_ms, length = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            if start + length > end:
+                break  # torn write at the tail
+            yield at_ms / 1000, kind, data[start:start + length]
+            offset = start + length
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode(kind: int, payload: bytes) -> Any:
+    """Stroke payloads stay binary; every other kind is JSON"""
+    return payload if kind == STROKES else json.loads(payload)
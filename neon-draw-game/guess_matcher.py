@@ -0,0 +1,93 @@
+from typing import Dict, Iterable, NamedTuple, Optional
+
+# Characters that never matter when comparing guesses: Arabic diacritics
+# (harakat, tanween, shadda, sukun, dagger alef), tatweel and punctuation.
+_DROP = (
+    [chr(c) for c in range(0x064B, 0x0660)]
+    + ['\u0670', '\u0640', '\u200c', '\u200d', '\u200e', '\u200f']
+    + list('.,!?;:\'"-_()[]{}،؛؟')
+)
+
+# Letter variants people type interchangeably
+_FOLD = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ٲ': 'ا', 'ٳ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي', 'ئ': 'ي', 'ی': 'ي',
+    'ؤ': 'و',
+    'ک': 'ك',
+}
+
+_TABLE = str.maketrans({
+    **{ch: None for ch in _DROP},
+    **_FOLD,
+    **{chr(c): chr(c + 32) for c in range(ord('A'), ord('Z') + 1)},
+    '\t': ' ', '\n': ' ', '\r': ' ', '\u00a0': ' ',
+})
+
+MAX_GUESS_LENGTH = 64
+
+
+def normalize(text: str) -> str:
+    """Fold a word or guess to its comparison key"""
+    folded = text[:MAX_GUESS_LENGTH * 2].translate(_TABLE)
+    if '  ' in folded or folded[:1] == ' ' or folded[-1:] == ' ':
+        folded = ' '.join(folded.split())
+    return folded
+
+
+def within_distance(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance(a, b) <= limit, computed in a band of width 2*limit+1"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    big = limit + 1
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        lo = max(1, i - limit)
+        hi = min(len(b), i + limit)
+        cur = [big] * (len(b) + 1)
+        cur[0] = i if i <= limit else big
+        ca = a[i - 1]
+        row_min = cur[0]
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] + 1 < cost:
+                cost = prev[j] + 1
+            if cur[j - 1] + 1 < cost:
+                cost = cur[j - 1] + 1
+            cur[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return False
+        prev = cur
+    return prev[len(b)] <= limit
+
+
+class WordKey(NamedTuple):
+    word: str
+    key: str
+    close_limit: int  # edit distance still counted as "close"
+
+
+def compile_word(word: str) -> WordKey:
+    key = normalize(word)
+    return WordKey(word, key, 1 if len(key) <= 5 else 2)
+
+
+def compile_words(words: Iterable[str]) -> Dict[str, WordKey]:
+    """Precompute comparison keys for a word list"""
+    return {word: compile_word(word) for word in words}
+
+
+def match_guess(target: WordKey, guess: str) -> Optional[str]:
+    """'correct', 'close' or None for a raw chat guess"""
+    key = normalize(guess)
+    if key == target.key:
+        return 'correct'
+    if key and within_distance(key, target.key, target.close_limit):
+        return 'close'
+    return None
@@ -0,0 +1,126 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class Leaderboard:
+    """Scores kept in rank order and updated incrementally
+
+    Entries live in a list sorted by (-score, seq) where seq is the order a
+    key was first seen, so ties keep join order like the old sorted() did.
+    Updates locate the entry with a binary search (O(log n) comparisons; the
+    list shift is a memmove), rank lookups are a single bisect, and `version`
+    changes on every update so callers can cache serialized views.
+    """
+
+    __slots__ = ('max_size', 'version', '_order', '_entries', 'labels', '_next_seq')
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size  # drop the lowest entries beyond this
+        self.version = 0
+        self._order: List[Tuple[int, int, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[int, int, Hashable]] = {}
+        self.labels: Dict[Hashable, Dict] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def score(self, key: Hashable) -> int:
+        entry = self._entries.get(key)
+        return -entry[0] if entry else 0
+
+    def set(self, key: Hashable, score: int, label: Optional[Dict] = None):
+        """Set a key's score, inserting it if new"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if -entry[0] == score and label is None:
+                return
+            del self._order[bisect_left(self._order, entry)]
+            seq = entry[1]
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+        entry = (-score, seq, key)
+        insort(self._order, entry)
+        self._entries[key] = entry
+        if label is not None:
+            self.labels[key] = label
+        self.version += 1
+        if self.max_size is not None and len(self._order) > self.max_size:
+            self.remove(self._order[-1][2])
+
+    def add(self, key: Hashable, delta: int, label: Optional[Dict] = None):
+        """Add points to a key's score"""
+        self.set(key, self.score(key) + delta, label)
+
+    def remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        del self._order[bisect_left(self._order, entry)]
+        self.labels.pop(key, None)
+        self.version += 1
+
+    def clear(self):
+        self._order = []
+        self._entries = {}
+        self.labels = {}
+        self.version += 1
+
+    def rank(self, key: Hashable) -> Optional[int]:
+        """1-based rank of a key, or None if absent"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return bisect_left(self._order, entry) + 1
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """(key, score) pairs for the top k entries (all if k is None)"""
+        order = self._order if k is None else self._order[:k]
+        return [(key, -neg) for neg, _, key in order]
+
+    def to_list(self, k: Optional[int] = None) -> List[Dict]:
+        """Top k entries merged with their labels, for JSON"""
+        return [{**self.labels.get(key, {}), 'score': score} for key, score in self.top(k)]
+
+
+class SharedLeaderboard(Leaderboard):
+    """Leaderboard updated from many rooms at once (e.g. the global board)
+
+    Room boards are only touched under their room's lock; this one takes its
+    own short lock around every update and read.
+    """
+
+    __slots__ = ('_lock',)
+
+    def __init__(self, max_size: Optional[int] = None):
+        super().__init__(max_size)
+        self._lock = threading.RLock()
+
+    def set(self, key: Hashable, score: int, label: Optional[Dict] = None):
+        with self._lock:
+            super().set(key, score, label)
+
+    def add(self, key: Hashable, delta: int, label: Optional[Dict] = None):
+        with self._lock:
+            super().add(key, delta, label)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            super().remove(key)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+    def rank(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            return super().rank(key)
+
+    def to_list(self, k: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return super().to_list(k)
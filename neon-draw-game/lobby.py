@@ -0,0 +1,113 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+Entry = Tuple[str, int, int, str]  # (game_state, free_slots, seq, room_id)
+MAX_SLOTS = 1 << 30
+
+
+class LobbyIndex:
+    """Public rooms kept sorted by (game state, free slots, age)
+
+    Rooms update their own entry as players come and go and the game moves
+    on, so the index never scans rooms: the best open room is one bisect
+    and a page of the listing is a bisect plus a slice. Within a state,
+    fuller rooms sort first (their games start sooner), then older rooms.
+    Per process, like SessionIndex: with a shared room store each worker
+    indexes the rooms it has touched, and joins re-check the room itself.
+    """
+
+    def __init__(self, page_ttl: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.page_ttl = page_ttl  # seconds a listing page may be served stale
+        self.clock = clock
+        self.version = 0
+        self._order: List[Entry] = []
+        self._entries: Dict[str, Entry] = {}
+        self.info: Dict[str, Dict] = {}
+        self._pages: Dict[Tuple, Tuple[int, float, Dict]] = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, room_id: str) -> bool:
+        return room_id in self._entries
+
+    def update(self, room):
+        """Index a room's current state (private rooms are removed)"""
+        if not room.public:
+            if room.room_id in self._entries:
+                self.remove(room.room_id)
+            return
+        free = max(0, room.max_players - len(room.players))
+        host = next(iter(room.players.values()), None)
+        info = {
+            'room_id': room.room_id,
+            'host': host.username if host else None,
+            'players': len(room.players),
+            'max_players': room.max_players,
+            'game_state': room.game_state,
+            'category': room.category,
+            'difficulty': room.difficulty
+        }
+        with self._lock:
+            entry = self._entries.get(room.room_id)
+            if entry is not None:
+                if entry[:2] == (room.game_state, free) and self.info[room.room_id] == info:
+                    return
+                del self._order[bisect_left(self._order, entry)]
+                seq = entry[2]
+            else:
+                seq = self._next_seq
+                self._next_seq += 1
+            entry = (room.game_state, free, seq, room.room_id)
+            insort(self._order, entry)
+            self._entries[room.room_id] = entry
+            self.info[room.room_id] = info
+            self.version += 1
+
+    def remove(self, room_id: str):
+        with self._lock:
+            entry = self._entries.pop(room_id, None)
+            if entry is None:
+                return
+            del self._order[bisect_left(self._order, entry)]
+            del self.info[room_id]
+            self.version += 1
+
+    def _span(self, state: str, min_free: int) -> Tuple[int, int]:
+        return (bisect_left(self._order, (state, min_free)),
+                bisect_left(self._order, (state, MAX_SLOTS)))
+
+    def best(self, state: str = "waiting", exclude=()) -> Optional[str]:
+        """Fullest room in `state` with a free slot, skipping `exclude`"""
+        with self._lock:
+            start, end = self._span(state, 1)
+            for entry in self._order[start:min(end, start + len(exclude) + 1)]:
+                if entry[3] not in exclude:
+                    return entry[3]
+        return None
+
+    def page(self, state: str = "waiting", offset: int = 0, limit: int = 20,
+             min_free: int = 0) -> Dict:
+        """One page of rooms in `state`, reused while nothing changed or for page_ttl"""
+        key = (state, offset, limit, min_free)
+        now = self.clock()
+        cached = self._pages.get(key)
+        if cached is not None and (cached[0] == self.version or now - cached[1] < self.page_ttl):
+            return cached[2]
+        with self._lock:
+            version = self.version
+            start, end = self._span(state, min_free)
+            entries = self._order[start + offset:min(start + offset + limit, end)]
+            result = {
+                'total': end - start,
+                'offset': offset,
+                'rooms': [self.info[room_id] for _, _, _, room_id in entries]
+            }
+        if len(self._pages) >= 1024:
+            self._pages = {}
+        self._pages[key] = (version, now, result)
+        return result
@@ -0,0 +1,307 @@
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FANOUT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for metrics with optional labels
+
+    Updates are plain in-place increments with no lock. `x += 1` is a
+    read, an add and a store, so it is not atomic: under eventlet, whose
+    greenlets only switch at I/O, no update is ever interrupted and counts
+    are exact; with real threads (async_mode threading) a switch between
+    the read and the store can drop an increment, so counts are approximate
+    there. That is the trade for keeping a lock off every event. The lock
+    only guards creating a child for a new label combination.
+    """
+
+    kind = ''
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """The child for one combination of label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic total; rates come from the scraper (PromQL rate())"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def total(self) -> float:
+        return sum(child.value for child in list(self._children.values()))
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield '_total', _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is one bisect and two increments"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def count(self) -> int:
+        return sum(sum(child.counts) for child in list(self._children.values()))
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, n in zip(self.bounds + (math.inf,), counts):
+                cumulative += n
+                le = 'le="' + _format_value(bound if bound == math.inf else float(bound)) + '"'
+                yield '_bucket', _format_labels(self.labelnames, values, le), cumulative
+            yield '_sum', _format_labels(self.labelnames, values), total
+            yield '_count', _format_labels(self.labelnames, values), cumulative
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time
+
+    The callback returns a number, or a {label values tuple: number} dict
+    for labelled gauges.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, doc: str, read: Callable[[], object],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self.read = read
+
+    def samples(self):
+        value = self.read()
+        if isinstance(value, dict):
+            for values, v in value.items():
+                yield '', _format_labels(self.labelnames, values), v
+        else:
+            yield '', '', value
+
+
+class Registry:
+    """Metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, doc, labelnames))
+
+    def histogram(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, doc, labelnames, buckets))
+
+    def gauge(self, name: str, doc: str, read: Callable[[], object],
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, doc, read, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f'# {metric.name} unavailable: {_escape(e)}')
+        return '\n'.join(lines) + '\n'
+
+
+class RateMeter:
+    """Per-second rate of a total between two consecutive reads"""
+
+    def __init__(self, total: Callable[[], float], clock: Callable[[], float] = time.monotonic):
+        self.total = total
+        self.clock = clock
+        self._last = (clock(), total())
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        now, total = self.clock(), self.total()
+        with self._lock:
+            then, before = self._last
+            self._last = (now, total)
+        return (total - before) / (now - then) if now > then else 0.0
+
+
+def timed(histogram: Histogram, *label_values: str):
+    """Decorator observing the wrapped call's duration (errors included)"""
+    child = histogram.labels(*label_values)
+    perf_counter = time.perf_counter
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def encoded_size(encoded) -> int:
+    """Size of an encoded Socket.IO packet (text, or text plus binary attachments)"""
+    if isinstance(encoded, str):
+        return len(encoded) if encoded.isascii() else len(encoded.encode('utf-8'))
+    if isinstance(encoded, list):
+        return sum(encoded_size(part) for part in encoded)
+    return len(encoded)
+
+
+class BroadcastMeter:
+    """Counts bytes and recipients of everything a Socket.IO server sends
+
+    An emit to a room encodes its packet once and sends it to every member,
+    so the meter hooks the server's packet class to measure each encoding
+    and its manager's `emit` to count recipients from the room's size (no
+    per-recipient work). Packets sent outside an emit are counted once.
+    With a message queue, emits are relayed through the queue and only
+    their encoded size is seen, not their fan-out.
+    """
+
+    def __init__(self, emitted_bytes: Counter, fanout: Histogram):
+        self.emitted_bytes = emitted_bytes.labels()
+        self.fanout = fanout.labels()
+        self._local = threading.local()
+        self._originals = None
+
+    def install(self, server) -> bool:
+        if self._originals is not None:
+            return True
+        manager = getattr(server, 'manager', None)
+        if manager is None or not isinstance(getattr(manager, 'rooms', None), dict):
+            return False
+        base_packet, emit = server.packet_class, manager.emit
+        local = self._local
+        local.size = None  # bytes encoded by the emit in progress on this thread
+        emitted_bytes, fanout = self.emitted_bytes, self.fanout
+
+        class MeteredPacket(base_packet):
+            def encode(self):
+                encoded = base_packet.encode(self)
+                pending = getattr(local, 'size', None)
+                if pending is None:
+                    emitted_bytes.inc(encoded_size(encoded))
+                else:
+                    local.size = pending + encoded_size(encoded)
+                return encoded
+
+        def manager_emit(event, data, namespace, room=None, skip_sid=None, callback=None, **kwargs):
+            rooms = manager.rooms.get(namespace)
+            members = rooms.get(room) if rooms else None
+            recipients = len(members) if members else 0
+            if skip_sid is not None and members:
+                for sid in (skip_sid if isinstance(skip_sid, list) else (skip_sid,)):
+                    if sid in members:
+                        recipients -= 1
+            local.size = 0
+            try:
+                return emit(event, data, namespace, room, skip_sid, callback, **kwargs)
+            finally:
+                size, local.size = local.size, None
+                emitted_bytes.inc(size * recipients)
+                fanout.observe(recipients)
+
+        self._originals = (base_packet, emit)
+        server.packet_class = MeteredPacket
+        manager.emit = manager_emit
+        return True
+
+    def uninstall(self, server):
+        """Put the server's own packet class and emit back"""
+        if self._originals is not None:
+            server.packet_class, server.manager.emit = self._originals
+            self._originals = None
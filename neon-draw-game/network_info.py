@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+import urllib.request
+from typing import Callable, Optional
+
+IPIFY_URL = 'https://api.ipify.org?format=json'
+
+
+def fetch_public_ip(timeout: float = 3) -> Optional[str]:
+    """Ask ipify for our public IP (blocking)"""
+    try:
+        with urllib.request.urlopen(IPIFY_URL, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))['ip']
+    except Exception:
+        return None
+
+
+class PublicIPCache:
+    """Public IP looked up in the background and served from memory
+
+    `get()` never blocks a request: it returns the last known address (None
+    until the first lookup finishes) and wakes the refresher when the value
+    is older than `ttl`. Failed lookups are retried after `retry` seconds.
+    """
+
+    def __init__(self, ttl: float = 600, retry: float = 60,
+                 fetch: Callable[[], Optional[str]] = fetch_public_ip):
+        self.ttl = ttl
+        self.retry = retry
+        self.fetch = fetch
+        self.value: Optional[str] = None
+        self.updated = 0.0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[str]:
+        self.start()
+        if time.monotonic() - self.updated > self.ttl:
+            self._wake.set()
+        return self.value
+
+    def refresh(self) -> Optional[str]:
+        """Look the address up now (blocking) and cache it"""
+        ip = self.fetch()
+        if ip:
+            self.value = ip
+            self.updated = time.monotonic()
+        return self.value
+
+    def start(self):
+        """Start the refresher thread (idempotent)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='public-ip', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            before = self.updated
+            self.refresh()
+            self._wake.wait(self.ttl if self.updated != before else self.retry)
+            self._wake.clear()
@@ -0,0 +1,199 @@
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, MutableMapping, Optional, Tuple
+from zlib import crc32
+
+
+class LockTable:
+    """Fixed table of reentrant locks striped by room id
+
+    Rooms never contend on a global lock: two rooms only share a lock when
+    their ids hash to the same stripe. Locks are reentrant, so a thread may
+    nest transactions on one room (or on rooms that share a stripe). Never
+    take one room's lock while holding another's.
+    """
+
+    def __init__(self, stripes: int = 256):
+        self._locks = tuple(threading.RLock() for _ in range(stripes))
+
+    def __call__(self, room_id: str) -> threading.RLock:
+        return self._locks[crc32(room_id.encode('utf-8')) % len(self._locks)]
+
+
+class InMemoryRoomStore(dict):
+    """Rooms held as live objects in this process (the default backend)"""
+
+    shared = False
+
+    def __init__(self, stripes: int = 256):
+        super().__init__()
+        self.lock_for = LockTable(stripes)
+
+    def save(self, room):
+        self[room.room_id] = room
+
+    def add(self, room) -> bool:
+        """Insert the room unless its id is taken (atomic)"""
+        return self.setdefault(room.room_id, room) is room
+
+    @contextmanager
+    def transaction(self, room_id: str):
+        """Yield the live room (or None) with its lock held"""
+        if not isinstance(room_id, str):
+            yield None
+            return
+        with self.lock_for(room_id):
+            yield self.get(room_id)
+
+
+class SQLiteRoomStore(MutableMapping):
+    """Rooms pickled into a SQLite database shared by every worker on a host
+
+    Each worker keeps a decoded copy of the rooms it has touched and only
+    re-reads a room's state when its revision in the database has moved on.
+    `transaction(room_id)` holds the database write lock while a handler
+    reads, mutates and saves a room, so workers never overwrite each
+    other's changes. Transactions nest within a thread.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, on_load: Optional[Callable] = None):
+        self.path = path
+        self.on_load = on_load  # called with every room unpickled from the database
+        self._local = threading.local()
+        self._cache: Dict[str, Tuple[int, object]] = {}
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS rooms ('
+            ' room_id TEXT PRIMARY KEY,'
+            ' rev INTEGER NOT NULL,'
+            ' state BLOB NOT NULL,'
+            ' updated REAL NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.active = {}
+        return conn
+
+    def _active(self) -> Dict[str, object]:
+        self._conn()
+        return self._local.active
+
+    # ========== MAPPING API ==========
+    def __getitem__(self, room_id: str):
+        active = self._active()
+        if room_id in active:
+            return active[room_id]
+        conn = self._conn()
+        row = conn.execute('SELECT rev FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        if row is None:
+            raise KeyError(room_id)
+        cached = self._cache.get(room_id)
+        if cached is not None and cached[0] == row[0]:
+            return cached[1]
+        row = conn.execute('SELECT rev, state FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        if row is None:
+            raise KeyError(room_id)
+        room = pickle.loads(row[1])
+        if self.on_load is not None:
+            self.on_load(room)
+        self._cache[room_id] = (row[0], room)
+        return room
+
+    def __setitem__(self, room_id: str, room):
+        state = pickle.dumps(room, protocol=pickle.HIGHEST_PROTOCOL)
+        row = self._conn().execute(
+            'INSERT INTO rooms (room_id, rev, state, updated) VALUES (?, 1, ?, ?) '
+            'ON CONFLICT(room_id) DO UPDATE SET rev = rev + 1, state = excluded.state, '
+            'updated = excluded.updated RETURNING rev',
+            (room_id, state, time.time())
+        ).fetchone()
+        self._cache[room_id] = (row[0], room)
+
+    def __delitem__(self, room_id: str):
+        cur = self._conn().execute('DELETE FROM rooms WHERE room_id = ?', (room_id,))
+        self._cache.pop(room_id, None)
+        self._active().pop(room_id, None)
+        if cur.rowcount == 0:
+            raise KeyError(room_id)
+
+    def __contains__(self, room_id) -> bool:
+        if room_id in self._active():
+            return True
+        return self._conn().execute(
+            'SELECT 1 FROM rooms WHERE room_id = ?', (room_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._conn().execute('SELECT room_id FROM rooms').fetchall()
+        return iter([r[0] for r in rows])
+
+    def __len__(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM rooms').fetchone()[0]
+
+    def save(self, room):
+        self[room.room_id] = room
+
+    def add(self, room) -> bool:
+        """Insert the room unless its id is taken (atomic across workers)"""
+        state = pickle.dumps(room, protocol=pickle.HIGHEST_PROTOCOL)
+        cur = self._conn().execute(
+            'INSERT INTO rooms (room_id, rev, state, updated) VALUES (?, 1, ?, ?) '
+            'ON CONFLICT(room_id) DO NOTHING',
+            (room.room_id, state, time.time())
+        )
+        if cur.rowcount != 1:
+            return False
+        self._cache[room.room_id] = (1, room)
+        return True
+
+    @contextmanager
+    def transaction(self, room_id: str):
+        """Load the latest room under the write lock and save it on exit"""
+        conn = self._conn()
+        active = self._local.active
+        if room_id in active:
+            yield active[room_id]
+            return
+
+        outermost = self._local.depth == 0
+        if outermost:
+            conn.execute('BEGIN IMMEDIATE')
+        self._local.depth += 1
+        try:
+            room = self.get(room_id)
+            if room is not None:
+                active[room_id] = room
+            yield room
+            # Skip the save if the room was deleted inside the transaction
+            if room is not None and room_id in active:
+                self.save(room)
+            if outermost:
+                conn.execute('COMMIT')
+        except BaseException:
+            if outermost:
+                conn.execute('ROLLBACK')
+                self._cache.clear()
+            raise
+        finally:
+            self._local.depth -= 1
+            active.pop(room_id, None)
+
+
+def create_room_store(url: Optional[str], on_load: Optional[Callable] = None):
+    """Build a room store from a URL: 'memory' (default) or 'sqlite:///path/to/rooms.db'"""
+    if not url or url == 'memory':
+        return InMemoryRoomStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteRoomStore(url[len('sqlite:///'):], on_load)
+    raise ValueError(f"Unknown room store: {url}")
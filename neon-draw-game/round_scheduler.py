@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+
+class TimerWheel:
+    """Hashed timer wheel owning every room deadline on one thread
+
+    Timers are hashed by their absolute expiry tick, so scheduling and
+    cancelling are O(1) and each tick pops exactly one bucket: the cost of a
+    tick depends on how many timers are due, not on how many rooms are live.
+    Keys are unique: scheduling a key again replaces its timer.
+    """
+
+    def __init__(self, tick: float = 0.25, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self._buckets: Dict[int, Dict[Hashable, Callable]] = {}
+        self._where: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._origin = clock()
+        self._current = 0  # last processed tick
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _tick_at(self, now: float) -> int:
+        return int((now - self._origin) / self.tick)
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], None]):
+        """Run callback after delay seconds, replacing any timer for key"""
+        with self._lock:
+            self._remove(key)
+            # Never fire earlier than asked: round up to the next whole tick
+            target = max(self._tick_at(self.clock() + delay) + 1, self._current + 1)
+            bucket = self._buckets.get(target)
+            if bucket is None:
+                bucket = self._buckets[target] = {}
+            bucket[key] = callback
+            self._where[key] = target
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key: Hashable) -> bool:
+        target = self._where.pop(key, None)
+        if target is None:
+            return False
+        bucket = self._buckets[target]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[target]
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Fire every timer due by now; returns how many fired"""
+        due = []
+        with self._lock:
+            target = self._tick_at(self.clock() if now is None else now)
+            if target - self._current <= len(self._buckets):
+                ticks = range(self._current + 1, target + 1)
+            else:
+                # Large jump (fake clocks, a stalled thread): visit only live buckets
+                ticks = sorted(t for t in self._buckets if t <= target)
+            for t in ticks:
+                bucket = self._buckets.pop(t, None)
+                if bucket:
+                    for key, callback in bucket.items():
+                        del self._where[key]
+                        due.append(callback)
+            self._current = max(self._current, target)
+
+        for callback in due:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️  Timer callback failed: {e}")
+        return len(due)
+
+    # ========== BACKGROUND THREAD ==========
+    def start(self):
+        """Start the single scheduler thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='round-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            time.sleep(self.tick)
+            self.advance()
@@ -0,0 +1,59 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+Session = Tuple[str, str]  # (room_id, player_id)
+
+
+class SessionIndex:
+    """Which player in which room each connected socket belongs to
+
+    Bound when a socket joins a room and unbound when it leaves or
+    disconnects, so handlers can trust the server's view of who is talking
+    instead of ids sent by the client. Also answers the reverse question
+    (is this player connected right now?) for reconnect grace periods.
+    Per process: a socket only ever talks to the worker it connected to.
+    """
+
+    def __init__(self):
+        self._by_sid: Dict[str, Session] = {}
+        self._by_player: Dict[Session, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_sid)
+
+    def get(self, sid: str) -> Optional[Session]:
+        return self._by_sid.get(sid)
+
+    def sid_of(self, room_id: str, player_id: str) -> Optional[str]:
+        return self._by_player.get((room_id, player_id))
+
+    def bind(self, sid: str, room_id: str, player_id: str) -> Optional[str]:
+        """Attach a socket to a player; returns the player's previous sid, if any"""
+        session = (room_id, player_id)
+        with self._lock:
+            old = self._by_sid.pop(sid, None)
+            if old is not None and self._by_player.get(old) == sid:
+                del self._by_player[old]
+            previous = self._by_player.get(session)
+            if previous is not None:
+                self._by_sid.pop(previous, None)
+            self._by_sid[sid] = session
+            self._by_player[session] = sid
+        return previous
+
+    def unbind(self, sid: str) -> Optional[Session]:
+        """Detach a socket; returns the session it was bound to"""
+        with self._lock:
+            session = self._by_sid.pop(sid, None)
+            if session is not None and self._by_player.get(session) == sid:
+                del self._by_player[session]
+        return session
+
+    def drop_room(self, room_id: str) -> List[str]:
+        """Forget every socket bound to a room; returns their sids"""
+        with self._lock:
+            sids = [sid for sid, (rid, _) in self._by_sid.items() if rid == room_id]
+            for sid in sids:
+                del self._by_player[self._by_sid.pop(sid)]
+        return sids
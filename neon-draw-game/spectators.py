@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# send(room_id, events, strokes, state_changed): events are (name, data) pairs
+SendCallback = Callable[[str, List[Tuple[str, Any]], List[bytes], bool], None]
+
+
+class _Pending:
+    __slots__ = ('events', 'strokes', 'state')
+
+    def __init__(self):
+        self.events: List[Tuple[str, Any]] = []
+        self.strokes: List[bytes] = []
+        self.state = False
+
+
+class SpectatorFeed:
+    """What spectators of each room have yet to see, sent a few times a second
+
+    Players get every stroke batch and delta as it happens; spectators get
+    the same room coalesced: one stroke batch, the latest room state and
+    any announcements per interval. Recording an update is an append under
+    a short lock, so the drawer's path costs the same with no spectators or
+    with hundreds; the fan-out happens on the feed thread.
+    """
+
+    def __init__(self, send: SendCallback, interval: float = 0.5):
+        self.send = send
+        self.interval = interval
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _room(self, room_id: str) -> _Pending:
+        pending = self._pending.get(room_id)
+        if pending is None:
+            pending = self._pending[room_id] = _Pending()
+        return pending
+
+    def strokes(self, room_id: str, packet: bytes):
+        with self._lock:
+            self._room(room_id).strokes.append(packet)
+
+    def state_changed(self, room_id: str):
+        with self._lock:
+            self._room(room_id).state = True
+
+    def event(self, room_id: str, name: str, data: Any):
+        """Queue an announcement (e.g. round_ended) for the next send"""
+        with self._lock:
+            self._room(room_id).events.append((name, data))
+
+    def cleared(self, room_id: str):
+        """The canvas was wiped: strokes still queued are stale"""
+        with self._lock:
+            pending = self._room(room_id)
+            pending.strokes.clear()
+            pending.events.append(('canvas_cleared', {}))
+
+    def discard(self, room_id: str):
+        with self._lock:
+            self._pending.pop(room_id, None)
+
+    def flush_all(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+        for room_id, p in pending.items():
+            # One room's failure must not drop the other rooms' updates
+            try:
+                self.send(room_id, p.events, p.strokes, p.state)
+            except Exception as e:
+                print(f"⚠️  Spectator update for {room_id} failed: {e}")
+
+    # ========== BACKGROUND SENDER ==========
+    def start(self):
+        """Start the send thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='spectator-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush_all()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            time.sleep(self.interval)
+            try:
+                self.flush_all()
+            except Exception as e:
+                print(f"⚠️  Spectator feed failed: {e}")
@@ -9,6 +9,7 @@ class Game {
         this.socket = null;
         this.roomId = null;
         this.playerId = null;
+        this.seatToken = null;  // proves the seat is ours on join; never shared
         this.username = null;
         this.isDrawer = false;
         this.gameState = 'waiting';
@@ -18,6 +19,8 @@ class Game {
         this.scores = {};
         this.round = 1;
         this.maxRounds = 3;
+        this.roomState = null;
+        this.roomVersion = -1;
         this.timerInterval = null;
         this.remainingTime = 80;
         this.canvas = null;
@@ -273,16 +276,44 @@ async getLocalIpForSharing() {
             this.handleRoomUpdate(data);
         });
 
+        this.socket.on('room_delta', (delta) => {
+            this.handleRoomDelta(delta);
+        });
+
         this.socket.on('game_started', (data) => {
             this.handleGameStarted(data);
         });
 
+        this.socket.on('turn_started', (data) => {
+            this.handleGameStarted(data);
+        });
+
+        this.socket.on('round_ended', (data) => {
+            this.handleRoundEnded(data);
+        });
+
         this.socket.on('draw_update', (data) => {
             if (this.canvas && !this.isDrawer) {
                 this.canvas.drawFromData(data);
             }
         });
 
+        this.socket.on('draw_batch', (batch) => {
+            if (this.canvas && !this.isDrawer) {
+                StrokeCodec.decode(batch).forEach(data => this.canvas.drawFromData(data));
+            }
+        });
+
+        this.socket.on('canvas_snapshot', (snapshot) => {
+            if (!this.canvas) {
+                this.initCanvas();
+            }
+            if (this.canvas && !this.isDrawer) {
+                this.canvas.clear();
+                StrokeCodec.decode(snapshot).forEach(data => this.canvas.drawFromData(data));
+            }
+        });
+
         this.socket.on('canvas_cleared', () => {
             if (this.canvas && !this.isDrawer) {
                 this.canvas.clear();
@@ -293,6 +324,28 @@ async getLocalIpForSharing() {
             this.addChatMessage(data);
         });
 
+        this.socket.on('chat_batch', (messages) => {
+            messages.forEach(data => this.addChatMessage(data));
+        });
+
+        // Recent chat, sent on (re)joining: replaces what is shown
+        this.socket.on('chat_history', (messages) => {
+            const container = document.getElementById('chat-messages');
+            if (container) {
+                container.innerHTML = '';
+            }
+            messages.forEach(data => this.addChatMessage(data));
+        });
+
+        // The server closed the room (e.g. it sat idle too long)
+        this.socket.on('room_closed', () => {
+            if (this.roomId) {
+                this.cleanupGame();
+                this.showLobbyScreen();
+                this.showNotification('The room was closed', 'info');
+            }
+        });
+
         this.socket.on('error', (error) => {
             this.showNotification(error.message || 'An error occurred', 'error');
         });
@@ -370,6 +423,7 @@ async getLocalIpForSharing() {
             if (data.success) {
                 this.roomId = data.room_id;
                 this.playerId = data.player_id;
+                this.seatToken = data.token;
                 this.username = data.username;
                 
                 this.showGameScreen();
@@ -418,6 +472,7 @@ async getLocalIpForSharing() {
             if (data.success) {
                 this.roomId = data.room_id;
                 this.playerId = data.player_id;
+                this.seatToken = data.token;
                 this.username = data.username;
                 
                 this.showGameScreen();
@@ -439,7 +494,8 @@ async getLocalIpForSharing() {
         if (this.socket && this.roomId && this.playerId) {
             this.socket.emit('join', {
                 room_id: this.roomId,
-                player_id: this.playerId
+                player_id: this.playerId,
+                token: this.seatToken
             });
         }
     }
@@ -492,6 +548,18 @@ async getLocalIpForSharing() {
         }
     }
 
+    /**
+     * Send drawing segments as a binary stroke buffer
+     */
+    sendDrawData(segments) {
+        if (this.isDrawer && this.socket && this.roomId) {
+            this.socket.emit('draw', {
+                room_id: this.roomId,
+                data: StrokeCodec.encode(Array.isArray(segments) ? segments : [segments])
+            });
+        }
+    }
+
     /**
      * Clear canvas
      */
@@ -525,6 +593,8 @@ async getLocalIpForSharing() {
      * Handle room update from server
      */
     handleRoomUpdate(data) {
+        this.roomState = data;
+        this.roomVersion = data.version;
         this.gameState = data.game_state;
         this.players = data.players;
         this.scores = data.scores;
@@ -540,10 +610,40 @@ async getLocalIpForSharing() {
         this.updateGameState();
     }
 
+    /**
+     * Apply a versioned room delta, resyncing if one was missed
+     */
+    handleRoomDelta(delta) {
+        if (delta.version <= this.roomVersion) {
+            return;
+        }
+        if (!this.roomState || delta.version !== this.roomVersion + 1) {
+            this.requestRoomResync();
+            return;
+        }
+        this.handleRoomUpdate({
+            ...this.roomState,
+            ...delta.changes,
+            version: delta.version
+        });
+    }
+
+    /**
+     * Ask the server for a full room snapshot
+     */
+    requestRoomResync() {
+        if (this.socket && this.roomId) {
+            this.socket.emit('get_room_data', {
+                room_id: this.roomId
+            });
+        }
+    }
+
     /**
      * Handle game start
      */
     handleGameStarted(data) {
+        this.handleRoomUpdate(data);
         this.gameState = data.game_state;
         this.isDrawer = data.drawer === this.username;
         this.wordHint = data.word_hint;
@@ -571,6 +671,28 @@ async getLocalIpForSharing() {
         this.showNotification('Game started!', 'success');
     }
 
+    /**
+     * Handle end of a turn (word guessed, time up or drawer left)
+     */
+    handleRoundEnded(data) {
+        this.stopTimer();
+        this.isDrawer = false;
+
+        if (this.canvas) {
+            this.canvas.setDrawMode(false);
+            this.canvas.clear();
+        }
+
+        this.addChatMessage({
+            type: 'system',
+            message: `The word was: ${data.word}`
+        });
+
+        if (data.reason === 'timeout') {
+            this.showNotification('Time\'s up!', 'warning');
+        }
+    }
+
     /**
      * Initialize canvas
      */
@@ -594,9 +716,9 @@ async getLocalIpForSharing() {
             this.remainingTime--;
             this.updateTimerDisplay();
             
+            // Display only: the server ends the round and sends round_ended
             if (this.remainingTime <= 0) {
                 this.stopTimer();
-                this.showNotification('Time\'s up!', 'warning');
             }
             
             // Blink timer when time is running out
@@ -948,11 +1070,14 @@ async getLocalIpForSharing() {
         
         this.roomId = null;
         this.playerId = null;
+        this.seatToken = null;
         this.username = null;
         this.isDrawer = false;
         this.gameState = 'waiting';
         this.players = [];
         this.scores = {};
+        this.roomState = null;
+        this.roomVersion = -1;
     }
 
     /**
@@ -1062,5 +1187,153 @@ async getLocalIpForSharing() {
     }
 }
 
+/**
+ * Compact binary stroke format (mirrors stroke_codec.py)
+ * Buffers are concatenated stroke records:
+ * color u8 [r g b], width u8, count u16 (bit 15 = int8 deltas), x i16, y i16, deltas
+ */
+const StrokeCodec = {
+    SCALE: 4,
+    COORD_LIMIT: 16383,
+    CUSTOM_COLOR: 255,
+    SMALL_DELTAS: 0x8000,
+    MAX_POINTS: 0x7FFF,
+    PALETTE: [
+        '#000000', '#FFFFFF', '#808080', '#FF0000', '#00FF00', '#0000FF',
+        '#FFFF00', '#FF00FF', '#00FFFF', '#FFA500', '#800080', '#A52A2A',
+        '#FF6B6B', '#4ECDC4', '#FFD166', '#06D6A0', '#118AB2', '#EF476F',
+        '#073B4C', '#7209B7', '#3A86FF', '#FB5607', '#8338EC', '#FF006E'
+    ],
+
+    quantize(value) {
+        const q = Math.round(value * this.SCALE);
+        return Math.max(-this.COORD_LIMIT, Math.min(this.COORD_LIMIT, q));
+    },
+
+    /**
+     * Join consecutive segments that continue the same line into polylines
+     */
+    mergeSegments(segments) {
+        const strokes = [];
+        let last = null;
+        segments.forEach(seg => {
+            const color = String(seg.color || '#000000').toUpperCase();
+            const width = Math.max(1, Math.min(255, Math.round(seg.width || seg.size || 4)));
+            const x0 = this.quantize(seg.x0), y0 = this.quantize(seg.y0);
+            const x1 = this.quantize(seg.x1), y1 = this.quantize(seg.y1);
+            if (last && last.color === color && last.width === width &&
+                last.xs[last.xs.length - 1] === x0 && last.ys[last.ys.length - 1] === y0 &&
+                last.xs.length < this.MAX_POINTS) {
+                last.xs.push(x1);
+                last.ys.push(y1);
+            } else {
+                last = { color, width, xs: [x0, x1], ys: [y0, y1] };
+                strokes.push(last);
+            }
+        });
+        return strokes;
+    },
+
+    /**
+     * Encode draw segments into an ArrayBuffer
+     */
+    encode(segments) {
+        const strokes = this.mergeSegments(segments);
+        const records = strokes.map(stroke => {
+            let small = true;
+            for (let i = 1; i < stroke.xs.length && small; i++) {
+                const dx = stroke.xs[i] - stroke.xs[i - 1];
+                const dy = stroke.ys[i] - stroke.ys[i - 1];
+                small = dx >= -128 && dx <= 127 && dy >= -128 && dy <= 127;
+            }
+            const index = this.PALETTE.indexOf(stroke.color);
+            const size = (index < 0 ? 4 : 1) + 3 + 4 + (stroke.xs.length - 1) * (small ? 2 : 4);
+            return { stroke, small, index, size };
+        });
+
+        const total = records.reduce((sum, r) => sum + r.size, 0);
+        const view = new DataView(new ArrayBuffer(total));
+        let pos = 0;
+        records.forEach(({ stroke, small, index }) => {
+            if (index < 0) {
+                const rgb = parseInt(stroke.color.replace('#', '').padEnd(6, '0').slice(0, 6), 16) || 0;
+                view.setUint8(pos++, this.CUSTOM_COLOR);
+                view.setUint8(pos++, (rgb >> 16) & 0xFF);
+                view.setUint8(pos++, (rgb >> 8) & 0xFF);
+                view.setUint8(pos++, rgb & 0xFF);
+            } else {
+                view.setUint8(pos++, index);
+            }
+            view.setUint8(pos++, stroke.width);
+            view.setUint16(pos, stroke.xs.length | (small ? this.SMALL_DELTAS : 0), true);
+            view.setInt16(pos + 2, stroke.xs[0], true);
+            view.setInt16(pos + 4, stroke.ys[0], true);
+            pos += 6;
+            for (let i = 1; i < stroke.xs.length; i++) {
+                const dx = stroke.xs[i] - stroke.xs[i - 1];
+                const dy = stroke.ys[i] - stroke.ys[i - 1];
+                if (small) {
+                    view.setInt8(pos++, dx);
+                    view.setInt8(pos++, dy);
+                } else {
+                    view.setInt16(pos, dx, true);
+                    view.setInt16(pos + 2, dy, true);
+                    pos += 4;
+                }
+            }
+        });
+        return view.buffer;
+    },
+
+    /**
+     * Decode an ArrayBuffer into draw segments
+     */
+    decode(buffer) {
+        const view = buffer instanceof DataView ? buffer :
+            ArrayBuffer.isView(buffer) ? new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength) :
+            new DataView(buffer);
+        const segments = [];
+        let pos = 0;
+        while (pos < view.byteLength) {
+            let color;
+            const index = view.getUint8(pos++);
+            if (index === this.CUSTOM_COLOR) {
+                const rgb = (view.getUint8(pos) << 16) | (view.getUint8(pos + 1) << 8) | view.getUint8(pos + 2);
+                color = '#' + rgb.toString(16).toUpperCase().padStart(6, '0');
+                pos += 3;
+            } else {
+                color = this.PALETTE[index] || '#000000';
+            }
+            const width = view.getUint8(pos++);
+            const header = view.getUint16(pos, true);
+            const count = header & this.MAX_POINTS;
+            const small = (header & this.SMALL_DELTAS) !== 0;
+            let x = view.getInt16(pos + 2, true);
+            let y = view.getInt16(pos + 4, true);
+            pos += 6;
+            for (let i = 1; i < count; i++) {
+                let dx, dy;
+                if (small) {
+                    dx = view.getInt8(pos++);
+                    dy = view.getInt8(pos++);
+                } else {
+                    dx = view.getInt16(pos, true);
+                    dy = view.getInt16(pos + 2, true);
+                    pos += 4;
+                }
+                segments.push({
+                    x0: x / this.SCALE, y0: y / this.SCALE,
+                    x1: (x + dx) / this.SCALE, y1: (y + dy) / this.SCALE,
+                    color, width
+                });
+                x += dx;
+                y += dy;
+            }
+        }
+        return segments;
+    }
+};
+
 // Export for global access
-window.Game = Game;
\ No newline at end of file
+window.Game = Game;
+window.StrokeCodec = StrokeCodec;
\ No newline at end of file
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# flush(room_id, segments, sender_sid)
+FlushCallback = Callable[[str, List[Any], Optional[str]], None]
+
+
+class StrokeBatcher:
+    """Buffer draw segments per room and relay them as one batch
+
+    Nothing here is stroke-specific; `name` labels the thread and log lines
+    when it batches something else (chat).
+    """
+
+    def __init__(self, flush: FlushCallback, interval: float = 0.033, max_batch: int = 64,
+                 name: str = 'stroke'):
+        self.flush = flush
+        self.name = name
+        self.interval = interval  # seconds between timed flushes
+        self.max_batch = max_batch  # flush early once a room has this many segments
+        self._buffers: Dict[str, List[Any]] = {}
+        self._senders: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def add(self, room_id: str, segment: Any, sender: Optional[str] = None):
+        """Queue a segment for the room, flushing if the batch is full"""
+        with self._lock:
+            buffer = self._buffers.get(room_id)
+            if buffer is None:
+                buffer = self._buffers[room_id] = []
+            buffer.append(segment)
+            self._senders[room_id] = sender
+            if len(buffer) < self.max_batch:
+                return
+            del self._buffers[room_id]
+            sender = self._senders.pop(room_id, None)
+        self._emit(room_id, buffer, sender)
+
+    def flush_room(self, room_id: str):
+        """Flush whatever is pending for one room"""
+        with self._lock:
+            buffer = self._buffers.pop(room_id, None)
+            sender = self._senders.pop(room_id, None)
+        if buffer:
+            self._emit(room_id, buffer, sender)
+
+    def flush_all(self):
+        """Flush every room with pending segments"""
+        with self._lock:
+            if not self._buffers:
+                return
+            pending, self._buffers = self._buffers, {}
+            senders, self._senders = self._senders, {}
+        for room_id, buffer in pending.items():
+            self._emit(room_id, buffer, senders.get(room_id))
+
+    def discard(self, room_id: str):
+        """Drop pending segments for a room (e.g. when the canvas is cleared)"""
+        with self._lock:
+            self._buffers.pop(room_id, None)
+            self._senders.pop(room_id, None)
+
+    def pending(self) -> int:
+        """Number of buffered segments across all rooms"""
+        with self._lock:
+            return sum(len(b) for b in self._buffers.values())
+
+    def _emit(self, room_id: str, buffer: List[Any], sender: Optional[str]):
+        # Serialize flushes so a size-triggered flush can't overtake a timed one
+        with self._flush_lock:
+            self.flush(room_id, buffer, sender)
+
+    # ========== BACKGROUND FLUSHER ==========
+    def start(self):
+        """Start the periodic flush thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=f'{self.name}-batcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and flush anything left"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.flush_all()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            time.sleep(self.interval)
+            try:
+                self.flush_all()
+            except Exception as e:
+                print(f"⚠️  {self.name.capitalize()} flush failed: {e}")
@@ -0,0 +1,203 @@
+import math
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+# Binary stroke format (little-endian), shared with StrokeCodec in static/js/game.js.
+# A buffer is a plain concatenation of stroke records, so batches can be joined
+# without re-encoding:
+#
+#   u8   color index into PALETTE (CUSTOM_COLOR -> followed by r, g, b bytes)
+#   u8   line width in pixels
+#   u16  point count; bit 15 set when deltas fit in int8
+#   i16  x, i16 y of the first point (pixels * SCALE)
+#   ...  (count - 1) delta pairs, int8 or int16
+
+SCALE = 4  # quarter-pixel precision
+COORD_LIMIT = 16383  # keeps every delta inside int16
+CUSTOM_COLOR = 255
+SMALL_DELTAS = 0x8000
+MAX_POINTS = 0x7FFF
+
+PALETTE = (
+    '#000000', '#FFFFFF', '#808080', '#FF0000', '#00FF00', '#0000FF',
+    '#FFFF00', '#FF00FF', '#00FFFF', '#FFA500', '#800080', '#A52A2A',
+    '#FF6B6B', '#4ECDC4', '#FFD166', '#06D6A0', '#118AB2', '#EF476F',
+    '#073B4C', '#7209B7', '#3A86FF', '#FB5607', '#8338EC', '#FF006E',
+)
+_PALETTE_INDEX = {c: i for i, c in enumerate(PALETTE)}
+
+_COUNT = struct.Struct('<H')
+_POINT = struct.Struct('<hh')
+_SWAP = sys.byteorder == 'big'
+
+
+class Stroke(NamedTuple):
+    color: str
+    width: int
+    points: List[Tuple[int, int]]  # quantized (x * SCALE, y * SCALE)
+
+
+def round_half_up(value) -> int:
+    """Round like JavaScript's Math.round (round() rounds halves to even)"""
+    return math.floor(float(value) + 0.5)
+
+
+def quantize(value) -> int:
+    q = round_half_up(float(value) * SCALE)
+    return -COORD_LIMIT if q < -COORD_LIMIT else COORD_LIMIT if q > COORD_LIMIT else q
+
+
+def merge_segments(segments: Iterable[Dict]) -> List[Stroke]:
+    """Join consecutive segments that continue the same line into polylines"""
+    strokes: List[Stroke] = []
+    last = None
+    for seg in segments:
+        color = str(seg.get('color', '#000000')).upper()
+        width = max(1, min(255, round_half_up(seg.get('width', seg.get('size', 4)))))
+        start = (quantize(seg['x0']), quantize(seg['y0']))
+        end = (quantize(seg['x1']), quantize(seg['y1']))
+        if (last is not None and last.color == color and last.width == width
+                and last.points[-1] == start and len(last.points) < MAX_POINTS):
+            last.points.append(end)
+        else:
+            last = Stroke(color, width, [start, end])
+            strokes.append(last)
+    return strokes
+
+
+def merge_strokes(strokes: Iterable[Stroke]) -> List[Stroke]:
+    """Join consecutive strokes where one ends exactly where the next begins"""
+    merged: List[Stroke] = []
+    for stroke in strokes:
+        last = merged[-1] if merged else None
+        if (last is not None and last.color == stroke.color and last.width == stroke.width
+                and last.points[-1] == stroke.points[0]):
+            last.points.extend(stroke.points[1:])
+        else:
+            merged.append(Stroke(stroke.color, stroke.width, list(stroke.points)))
+    return merged
+
+
+def _pack_color(out: bytearray, color: str):
+    index = _PALETTE_INDEX.get(color)
+    if index is not None:
+        out.append(index)
+        return
+    out.append(CUSTOM_COLOR)
+    try:
+        out += bytes.fromhex(color.lstrip('#')[:6].ljust(6, '0'))
+    except ValueError:
+        out += b'\x00\x00\x00'
+
+
+def encode_strokes(strokes: Iterable[Stroke]) -> bytes:
+    """Encode quantized strokes into the binary stroke format"""
+    out = bytearray()
+    for stroke in strokes:
+        points = stroke.points
+        for offset in range(0, max(len(points) - 1, 1), MAX_POINTS - 1):
+            chunk = points[offset:offset + MAX_POINTS]
+            deltas = array('h')
+            px, py = chunk[0]
+            for x, y in chunk[1:]:
+                deltas.append(x - px)
+                deltas.append(y - py)
+                px, py = x, y
+            small = all(-128 <= d <= 127 for d in deltas)
+            _pack_color(out, stroke.color)
+            out.append(stroke.width)
+            out += _COUNT.pack(len(chunk) | (SMALL_DELTAS if small else 0))
+            out += _POINT.pack(*chunk[0])
+            if small:
+                out += array('b', deltas).tobytes()
+            else:
+                if _SWAP:
+                    deltas.byteswap()
+                out += deltas.tobytes()
+    return bytes(out)
+
+
+def encode_segments(segments: Iterable[Dict]) -> bytes:
+    """Encode draw segments ({x0, y0, x1, y1, color, width}) as binary strokes"""
+    return encode_strokes(merge_segments(segments))
+
+
+def _read_header(buf, pos: int):
+    index = buf[pos]
+    pos += 1
+    if index == CUSTOM_COLOR:
+        color = '#' + bytes(buf[pos:pos + 3]).hex().upper()
+        pos += 3
+    elif index < len(PALETTE):
+        color = PALETTE[index]
+    else:
+        raise ValueError(f"unknown palette index {index}")
+    width = buf[pos]
+    count, = _COUNT.unpack_from(buf, pos + 1)
+    return color, width, count & MAX_POINTS, bool(count & SMALL_DELTAS), pos + 3
+
+
+def iter_records(buf: bytes):
+    """Yield (color, width, count, small, points_offset) without decoding points"""
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        color, width, count, small, pos = _read_header(buf, pos)
+        if count < 1:
+            raise ValueError("empty stroke record")
+        size = 4 + (count - 1) * (2 if small else 4)
+        if pos + size > end:
+            raise ValueError("truncated stroke record")
+        yield color, width, count, small, pos
+        pos += size
+
+
+def is_valid(buf: bytes) -> bool:
+    """Cheap structural check of an encoded buffer"""
+    try:
+        for _ in iter_records(buf):
+            pass
+        return True
+    except (ValueError, IndexError, struct.error):
+        return False
+
+
+def decode_strokes(buf: bytes) -> List[Stroke]:
+    """Decode a binary buffer into quantized strokes"""
+    strokes = []
+    for color, width, count, small, pos in iter_records(buf):
+        x, y = _POINT.unpack_from(buf, pos)
+        pos += 4
+        if small:
+            deltas = array('b', buf[pos:pos + (count - 1) * 2])
+        else:
+            deltas = array('h', buf[pos:pos + (count - 1) * 4])
+            if _SWAP:
+                deltas.byteswap()
+        points = [(x, y)]
+        for i in range(0, len(deltas), 2):
+            x += deltas[i]
+            y += deltas[i + 1]
+            points.append((x, y))
+        strokes.append(Stroke(color, width, points))
+    return strokes
+
+
+def strokes_to_segments(strokes: Sequence[Stroke]) -> List[Dict]:
+    """Expand polylines back into pixel-space draw segments"""
+    segments = []
+    for stroke in strokes:
+        pts = stroke.points
+        for (x0, y0), (x1, y1) in zip(pts, pts[1:]):
+            segments.append({
+                'x0': x0 / SCALE, 'y0': y0 / SCALE, 'x1': x1 / SCALE, 'y1': y1 / SCALE,
+                'color': stroke.color, 'width': stroke.width
+            })
+    return segments
+
+
+def decode_segments(buf: bytes) -> List[Dict]:
+    """Decode a binary buffer into draw segment dicts"""
+    return strokes_to_segments(decode_strokes(buf))
@@ -0,0 +1,190 @@
+from typing import List, Sequence, Tuple
+
+import stroke_codec
+from stroke_codec import _COUNT, _POINT, MAX_POINTS, SCALE, SMALL_DELTAS, Stroke
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure Python path gives the same result
+    np = None
+
+Point = Tuple[int, int]
+
+# Batches smaller than this (encoded bytes) take the pure Python path even
+# with NumPy installed: below it NumPy's per-call overhead costs more than
+# it saves (see benchmarks/bench_simplify.py)
+NUMPY_MIN_BYTES = 2048
+
+
+def simplify_points(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """Ramer-Douglas-Peucker: drop points within tolerance of the simplified line
+
+    Endpoints are always kept, and every dropped point lies within
+    `tolerance` (in the points' units) of the polyline that replaces it.
+    """
+    n = len(points)
+    if n < 3:
+        return list(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = points[first]
+        dx, dy = points[last][0] - x0, points[last][1] - y0
+        norm = dx * dx + dy * dy
+        worst, split = -1.0, 0
+        for i in range(first + 1, last):
+            px, py = points[i][0] - x0, points[i][1] - y0
+            if norm:
+                cross = dx * py - dy * px
+                d = cross * cross / norm
+            else:
+                d = px * px + py * py
+            if d > worst:
+                worst, split = d, i
+        if worst > limit:
+            keep[split] = True
+            if split - first > 1:
+                stack.append((first, split))
+            if last - split > 1:
+                stack.append((split, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_strokes(strokes: Sequence[Stroke], tolerance: float) -> List[Stroke]:
+    """Simplify each stroke's polyline (tolerance in quantized units)"""
+    return [Stroke(s.color, s.width, simplify_points(s.points, tolerance)) for s in strokes]
+
+
+def simplify_buffer(buf: bytes, tolerance: float) -> bytes:
+    """Simplify an encoded stroke batch; tolerance is in pixels
+
+    Strokes split across draw events are joined first so the batch is
+    simplified as whole polylines. The input is returned untouched unless
+    the result is smaller (dropping points can push deltas out of the
+    one-byte range).
+    """
+    if np is not None and len(buf) >= NUMPY_MIN_BYTES:
+        out = _simplify_buffer_numpy(buf, tolerance * SCALE)
+    else:
+        strokes = stroke_codec.merge_strokes(stroke_codec.decode_strokes(buf))
+        out = stroke_codec.encode_strokes(simplify_strokes(strokes, tolerance * SCALE))
+    return out if len(out) < len(buf) else buf
+
+
+# ========== NUMPY ==========
+# The same pipeline on flat coordinate arrays: every record of the batch is
+# decoded, merged, simplified and re-encoded with a fixed number of array
+# operations per RDP level instead of per point.
+
+def _decode_numpy(buf: bytes):
+    """Every record as (style bytes, count) plus all points laid end to end"""
+    styles, counts, firsts, deltas = [], [], [], []
+    record_start = 0
+    for _, _, count, small, pos in stroke_codec.iter_records(buf):
+        styles.append(buf[record_start:pos - 2])  # color and width bytes
+        counts.append(count)
+        firsts.append(_POINT.unpack_from(buf, pos))
+        if count > 1:
+            deltas.append(np.frombuffer(buf, dtype='<i1' if small else '<i2',
+                                        count=(count - 1) * 2, offset=pos + 4))
+        record_start = pos + 4 + (count - 1) * (2 if small else 4)
+    counts = np.array(counts, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+
+    # Absolute first points and deltas in one array, summed per record
+    steps = np.zeros((int(counts.sum()), 2), dtype=np.int64)
+    is_delta = np.ones(len(steps), dtype=bool)
+    is_delta[starts] = False
+    if deltas:
+        steps[is_delta] = np.concatenate(deltas).reshape(-1, 2)
+    steps[starts] = firsts
+    total = np.cumsum(steps, axis=0)
+    before = total[starts] - steps[starts]
+    return styles, counts, starts, total - np.repeat(before, counts, axis=0)
+
+
+def _rdp_numpy(xs, ys, starts, ends, limit):
+    """Keep mask for RDP over every polyline [start, end) at once
+
+    The open spans of all polylines are refined together, so the number of
+    NumPy calls grows with the depth of the recursion, not with the number
+    of strokes or points.
+    """
+    keep = np.zeros(len(xs), dtype=bool)
+    keep[starts] = True
+    keep[ends - 1] = True
+    wide = ends - starts > 2
+    first, last = starts[wide], ends[wide] - 1
+    while len(first):
+        # Interior indices of every open span, laid out span after span
+        inner = last - first - 1
+        offsets = np.cumsum(inner) - inner
+        span = np.repeat(np.arange(len(first)), inner)
+        idx = np.arange(len(span)) + np.repeat(first + 1 - offsets, inner)
+
+        x0, y0 = xs[first][span], ys[first][span]
+        dx, dy = xs[last][span] - x0, ys[last][span] - y0
+        px, py = xs[idx] - x0, ys[idx] - y0
+        norm = dx * dx + dy * dy
+        cross = dx * py - dy * px
+        flat = norm == 0
+        dist = np.where(flat, px * px + py * py, cross * cross / np.where(flat, 1, norm))
+
+        worst = np.maximum.reduceat(dist, offsets)
+        refine = worst > limit
+        # First interior point reaching its span's maximum
+        hits = np.where(dist == worst[span], idx, len(xs))
+        split = np.minimum.reduceat(hits, offsets)[refine]
+        keep[split] = True
+        first = np.concatenate((first[refine], split))
+        last = np.concatenate((split, last[refine]))
+        wide = last - first > 1
+        first, last = first[wide], last[wide]
+    return keep
+
+
+def _simplify_buffer_numpy(buf: bytes, tolerance: float) -> bytes:
+    styles, counts, starts, points = _decode_numpy(buf)
+    ends = starts + counts
+
+    # A record continues the previous one when the style matches and it
+    # starts where that one ended; its repeated first point goes
+    joins = np.zeros(len(counts), dtype=bool)
+    if len(counts) > 1:
+        same_style = np.fromiter((a == b for a, b in zip(styles, styles[1:])), dtype=bool,
+                                 count=len(styles) - 1)
+        joins[1:] = same_style & (points[starts[1:]] == points[ends[:-1] - 1]).all(axis=1)
+    alive = np.ones(len(points), dtype=bool)
+    alive[starts[joins]] = False
+    stroke_of = np.repeat(np.cumsum(~joins) - 1, counts)[alive]
+    points = points[alive]
+    heads = np.flatnonzero(~joins)
+    lengths = np.bincount(stroke_of, minlength=len(heads))
+    line_ends = np.cumsum(lengths)
+    line_starts = line_ends - lengths
+
+    keep = _rdp_numpy(points[:, 0].astype(np.float64), points[:, 1].astype(np.float64),
+                      line_starts, line_ends, tolerance * tolerance)
+    if keep.all() and not joins.any():
+        return buf
+
+    out = bytearray()
+    kept_counts = np.add.reduceat(keep.astype(np.int64), line_starts)
+    kept = points[keep]
+    offset = 0
+    for head, n in zip(heads.tolist(), kept_counts.tolist()):
+        line = kept[offset:offset + n]
+        offset += n
+        # Over-long lines become several records sharing their end points
+        for begin in range(0, max(n - 1, 1), MAX_POINTS - 1):
+            chunk = line[begin:begin + MAX_POINTS]
+            deltas = np.diff(chunk, axis=0).ravel()
+            small = not len(deltas) or (deltas.min() >= -128 and deltas.max() <= 127)
+            out += styles[head]
+            out += _COUNT.pack(len(chunk) | (SMALL_DELTAS if small else 0))
+            out += _POINT.pack(int(chunk[0, 0]), int(chunk[0, 1]))
+            out += deltas.astype('<i1' if small else '<i2').tobytes()
+    return bytes(out)
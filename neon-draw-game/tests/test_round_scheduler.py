@@ -0,0 +1,95 @@
+"""
+Turn scheduling in app.py when the drawer leaves mid-turn
+
+Drives app's timer callbacks on a TimerWheel with a fake clock instead of
+the background one, so the intermission passes instantly.
+
+    python -m pytest tests      (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+os.environ.setdefault('NEON_RECORDINGS', '0')
+
+import app
+from round_scheduler import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DrawerLeaves(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.wheel = TimerWheel(tick=0.25, clock=self.clock)
+        self.real_scheduler, app.round_scheduler = app.round_scheduler, self.wheel
+        self.room_id = None
+
+    def tearDown(self):
+        app.round_scheduler = self.real_scheduler
+        if self.room_id in app.game_manager.rooms:
+            for player_id in list(app.game_manager.rooms[self.room_id].players):
+                app.remove_player(self.room_id, player_id)
+
+    def start(self, players):
+        manager = app.game_manager
+        self.room_id = manager.create_room('p0', 'p0')
+        for i in range(1, players):
+            manager.join_room(self.room_id, f'p{i}', f'p{i}')
+        manager.start_game(self.room_id)
+        return manager.rooms[self.room_id]
+
+    def run_timers(self, seconds):
+        self.clock.now += seconds
+        self.wheel.advance()
+
+    def test_next_seat_draws_after_intermission(self):
+        room = self.start(4)
+        seats = list(room.players)
+        drawer = room.current_drawer
+        after = seats[(seats.index(drawer) + 1) % len(seats)]
+
+        app.remove_player(self.room_id, drawer)
+        self.assertEqual(room.game_state, "between_rounds")
+        self.assertIn(self.room_id, self.wheel)
+
+        self.run_timers(room.intermission + 1)
+        self.assertEqual(room.game_state, "drawing")
+        self.assertEqual(room.current_drawer, after)
+        self.assertIn(self.room_id, self.wheel)  # the new turn's round end
+
+    def test_last_seat_drawer_wraps_around(self):
+        room = self.start(3)
+        seats = list(room.players)
+        while room.current_drawer != seats[-1]:
+            room.end_round()
+            room.next_turn()
+
+        app.remove_player(self.room_id, seats[-1])
+        self.run_timers(room.intermission + 1)
+        self.assertEqual(room.game_state, "drawing")
+        self.assertEqual(room.current_drawer, seats[0])
+
+    def test_restart_after_drawer_left_a_pair(self):
+        room = self.start(2)
+        drawer = room.current_drawer
+        app.remove_player(self.room_id, drawer)
+        self.assertEqual(room.game_state, "waiting")
+
+        app.game_manager.join_room(self.room_id, 'late', 'late')
+        self.assertIsNotNone(app.game_manager.start_game(self.room_id))
+        self.assertEqual(room.game_state, "drawing")
+        self.assertIn(room.current_drawer, room.players)
+
+
+if __name__ == '__main__':
+    unittest.main()
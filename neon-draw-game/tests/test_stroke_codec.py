@@ -0,0 +1,72 @@
+"""
+Round trip between stroke_codec.py and StrokeCodec in static/js/game.js
+
+Both ends must quantize a segment the same way, halves included: the
+drawer's canvas shows what game.js encoded, everyone else what the server
+relays and stores.
+
+    python -m pytest tests      (or python -m unittest discover tests)
+"""
+import base64
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import stroke_codec
+
+GAME_JS = os.path.join(HERE, '..', 'static', 'js', 'game.js')
+
+# Half-pixel widths, and coordinates that land on a half quarter-pixel
+SEGMENTS = [
+    {'x0': 10.125, 'y0': 20.375, 'x1': 30.5, 'y1': 40.625, 'color': '#ff0000', 'width': 4.5},
+    {'x0': 30.5, 'y0': 40.625, 'x1': 31.875, 'y1': 42.125, 'color': '#ff0000', 'width': 4.5},
+    {'x0': -0.125, 'y0': 0.375, 'x1': 5.0, 'y1': 5.0, 'color': '#123456', 'width': 2.5},
+    {'x0': 1.0, 'y0': 2.0, 'x1': 3.0, 'y1': 4.0, 'color': '#000000', 'width': 0.5},
+]
+
+
+def js_encode(segments):
+    """Encode with game.js's StrokeCodec under node; bytes, or None without node"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with open(GAME_JS, encoding='utf-8') as f:
+        codec = re.search(r'^const StrokeCodec = \{.*?^\};', f.read(), re.M | re.S).group(0)
+    script = codec + """
+const out = StrokeCodec.encode(JSON.parse(process.argv[1]));
+process.stdout.write(Buffer.from(out).toString('base64'));
+"""
+    result = subprocess.run([node, '-e', script, json.dumps(segments)],
+                            capture_output=True, text=True, check=True)
+    return base64.b64decode(result.stdout)
+
+
+class StrokeCodecRoundTrip(unittest.TestCase):
+
+    def test_half_widths_round_up(self):
+        strokes = stroke_codec.decode_strokes(stroke_codec.encode_segments(SEGMENTS))
+        self.assertEqual([s.width for s in strokes], [5, 3, 1])
+
+    def test_half_coordinates_round_up(self):
+        strokes = stroke_codec.decode_strokes(stroke_codec.encode_segments(SEGMENTS))
+        self.assertEqual(strokes[0].points, [(41, 82), (122, 163), (128, 169)])
+        self.assertEqual(strokes[1].points, [(0, 2), (20, 20)])
+
+    def test_decode_reencode(self):
+        buf = stroke_codec.encode_segments(SEGMENTS)
+        self.assertEqual(stroke_codec.encode_segments(stroke_codec.decode_segments(buf)), buf)
+
+    @unittest.skipUnless(shutil.which('node'), 'node is not installed')
+    def test_matches_game_js(self):
+        self.assertEqual(js_encode(SEGMENTS), stroke_codec.encode_segments(SEGMENTS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,331 @@
+import atexit
+import math
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import stroke_codec
+from stroke_codec import CUSTOM_COLOR, PALETTE, SCALE
+
+try:
+    import numpy as np
+    from stroke_simplify import _decode_numpy
+except ImportError:  # optional: the pure Python path draws the same pixels
+    np = None
+
+WIDTH, HEIGHT = 240, 180
+BACKGROUND = '#1F2937'  # the game canvas's bg-gray-800
+# Drawings smaller than this (canvas pixels) aren't blown up to fill the
+# thumbnail, so a doodle in the corner stays a doodle in the corner
+MIN_EXTENT = (400, 300)
+STEP = 0.5  # thumbnail pixels between samples along a line
+
+
+# ========== RASTERIZER ==========
+# Lines are drawn by stamping a disc of the line's radius at samples every
+# STEP pixels along each segment. Both paths visit the samples in the same
+# order and later samples win, so they draw identical images.
+
+def _rgb(color: str) -> Tuple[int, int, int]:
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+@lru_cache(maxsize=64)
+def _disc(radius: float) -> Tuple[Tuple[int, int], ...]:
+    """Pixel offsets covered by a disc of this radius"""
+    r = math.ceil(radius)
+    return tuple((dx, dy) for dy in range(-r, r + 1) for dx in range(-r, r + 1)
+                 if dx * dx + dy * dy <= radius * radius)
+
+
+def _palette(colors: Sequence[str]):
+    """PNG palette (background first) and each record's index into it
+
+    Past 256 colors, further custom colors take the nearest entry.
+    """
+    rgb = [_rgb(BACKGROUND)]
+    index_of: Dict[str, int] = {}
+    indices = []
+    for color in colors:
+        i = index_of.get(color)
+        if i is None:
+            c = _rgb(color)
+            if len(rgb) < 256:
+                i = len(rgb)
+                rgb.append(c)
+            else:
+                i = min(range(1, 256), key=lambda j: sum((a - b) ** 2 for a, b in zip(rgb[j], c)))
+            index_of[color] = i
+        indices.append(i)
+    return rgb, indices
+
+
+def _scale(max_x: float, max_y: float, width: int, height: int) -> float:
+    """Thumbnail pixels per canvas pixel, keeping the canvas origin in the corner"""
+    return min(width / max(max_x, MIN_EXTENT[0]), height / max(max_y, MIN_EXTENT[1]))
+
+
+def rasterize(buf: bytes, width: int = WIDTH, height: int = HEIGHT):
+    """Palette indices (row-major bytes) and the palette for an encoded drawing"""
+    if np is not None and buf:
+        return _rasterize_numpy(buf, width, height)
+    strokes = stroke_codec.decode_strokes(buf)
+    rgb, indices = _palette([s.color for s in strokes])
+    pixels = bytearray(width * height)
+    if not strokes:
+        return bytes(pixels), rgb
+    scale = _scale(max(x for s in strokes for x, _ in s.points) / SCALE,
+                   max(y for s in strokes for _, y in s.points) / SCALE, width, height) / SCALE
+    for stroke, index in zip(strokes, indices):
+        disc = _disc(max(0.5, stroke.width * scale * SCALE / 2))
+        pts = [(x * scale, y * scale) for x, y in stroke.points]
+        for i, (x0, y0) in enumerate(pts):
+            x1, y1 = pts[i + 1] if i + 1 < len(pts) else (x0, y0)
+            n = max(1, math.ceil(math.hypot(x1 - x0, y1 - y0) / STEP))
+            for k in range(n):
+                cx = math.floor(x0 + (x1 - x0) * k / n)
+                cy = math.floor(y0 + (y1 - y0) * k / n)
+                for dx, dy in disc:
+                    px, py = cx + dx, cy + dy
+                    if 0 <= px < width and 0 <= py < height:
+                        pixels[py * width + px] = index
+    return bytes(pixels), rgb
+
+
+def _rasterize_numpy(buf: bytes, width: int, height: int):
+    styles, counts, starts, points = _decode_numpy(buf)
+    # Style bytes are the color index (or CUSTOM_COLOR and r, g, b) and the width
+    records = [(PALETTE[s[0]] if s[0] != CUSTOM_COLOR else '#' + s[1:4].hex().upper(), s[-1])
+               for s in styles]
+    rgb, indices = _palette([color for color, _ in records])
+    scale = _scale(points[:, 0].max() / SCALE, points[:, 1].max() / SCALE, width, height) / SCALE
+    xs = points[:, 0] * scale
+    ys = points[:, 1] * scale
+
+    # Each point samples the segment to the next point of its record; the
+    # last point of a record samples only itself
+    nxt = np.arange(1, len(xs) + 1)
+    nxt[starts + counts - 1] -= 1
+    dx, dy = xs[nxt] - xs, ys[nxt] - ys
+    n = np.maximum(1, np.ceil(np.hypot(dx, dy) / STEP)).astype(np.int64)
+    k = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+    of = np.repeat(np.arange(len(xs)), n)
+    cx = np.floor(xs[of] + dx[of] * k / n[of]).astype(np.int64)
+    cy = np.floor(ys[of] + dy[of] * k / n[of]).astype(np.int64)
+
+    record_of = np.repeat(np.arange(len(counts)), counts)[of]
+    radii = np.array([max(0.5, w * scale * SCALE / 2) for _, w in records])[record_of]
+    order = np.arange(len(cx))
+    winner = np.full(width * height, -1, dtype=np.int64)
+    for radius in np.unique(radii).tolist():
+        group = radii == radius
+        offsets = np.array(_disc(radius), dtype=np.int64)
+        px = (cx[group][:, None] + offsets[:, 0]).ravel()
+        py = (cy[group][:, None] + offsets[:, 1]).ravel()
+        seq = np.repeat(order[group], len(offsets))
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        np.maximum.at(winner, py[inside] * width + px[inside], seq[inside])
+    colors = np.array(indices, dtype=np.uint8)[record_of]
+    pixels = np.where(winner >= 0, colors[np.maximum(winner, 0)], 0).astype(np.uint8)
+    return pixels.tobytes(), rgb
+
+
+# ========== PNG ==========
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def encode_png(pixels: bytes, palette: List[Tuple[int, int, int]], width: int, height: int) -> bytes:
+    """8-bit indexed-color PNG; every row unfiltered"""
+    rows = b''.join(b'\x00' + pixels[y * width:(y + 1) * width] for y in range(height))
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)),
+        _chunk(b'PLTE', bytes(c for color in palette for c in color)),
+        _chunk(b'IDAT', zlib.compress(rows, 6)),
+        _chunk(b'IEND', b''),
+    ))
+
+
+def render_png(buf: bytes, width: int = WIDTH, height: int = HEIGHT) -> bytes:
+    """PNG thumbnail of an encoded drawing (runs in the worker processes)"""
+    pixels, palette = rasterize(buf, width, height)
+    return encode_png(pixels, palette, width, height)
+
+
+def _watch_parent(ppid: int):
+    """Worker initializer: exit once the server is gone, however it died"""
+    def watch():
+        while os.getppid() == ppid:
+            time.sleep(1)
+        os._exit(0)
+    threading.Thread(target=watch, name='parent-watch', daemon=True).start()
+
+
+# ========== CACHE ==========
+class ThumbnailCache:
+    """PNGs by key, least recently used evicted past a byte budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.evictions = 0
+        self._images: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key: Hashable, png: bytes):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._images[key] = png
+            self.nbytes += len(png)
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= len(evicted)
+                self.evictions += 1
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            png = self._images.pop(key, None)
+            if png is not None:
+                self.nbytes -= len(png)
+
+
+class Thumbnailer:
+    """Renders finished drawings to PNG off the request path
+
+    Rendering runs in `workers` processes, so a burst of turns ending at
+    once never competes with socket handlers for the GIL; `workers=0`
+    renders on a single background thread instead. Results land in a
+    ThumbnailCache of `max_bytes`.
+
+    The pool is created on the first submit() (or by start()) and shut down
+    at exit; workers also exit on their own if the server dies. A pool that
+    breaks (a worker was killed) is replaced, and the drawings it was
+    rendering get no thumbnail.
+    """
+
+    def __init__(self, workers: int = 1, max_bytes: int = 16 * 1024 * 1024,
+                 width: int = WIDTH, height: int = HEIGHT):
+        self.workers = workers
+        self.width = width
+        self.height = height
+        self.cache = ThumbnailCache(max_bytes)
+        self.rendered = 0
+        self.failed = 0
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _pool(self):
+        """The executor, created on first use"""
+        with self._lock:
+            if self._executor is None:
+                if self.workers:
+                    # Forked rather than spawned: spawn would re-run app.py in every worker
+                    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, multiprocessing.get_context(method),
+                        initializer=_watch_parent, initargs=(os.getpid(),))
+                else:
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix='thumbnailer')
+                atexit.register(self.stop)
+            return self._executor
+
+    def start(self):
+        """Create the pool now and wait until its workers are up"""
+        self._pool().submit(render_png, b'', 1, 1).result()
+
+    def stop(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            atexit.unregister(self.stop)
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _reset(self, broken):
+        """Drop a broken pool; the next submit() creates a new one"""
+        with self._lock:
+            if self._executor is not broken:
+                return  # already replaced
+            self._executor = None
+        print("⚠️  Thumbnail workers died; starting new ones")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, key: Hashable, buf: bytes):
+        """Queue a drawing; its PNG is cached under key when done"""
+        if not buf:
+            return
+        executor = self._pool()
+        try:
+            future = executor.submit(render_png, buf, self.width, self.height)
+        except (BrokenExecutor, RuntimeError) as e:  # broken, or shut down meanwhile
+            self.failed += 1
+            print(f"⚠️  Thumbnail {key} skipped: {e}")
+            self._reset(executor)
+            return
+        with self._lock:
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._done(key, f, executor))
+
+    def _done(self, key: Hashable, future: Future, executor=None):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            else:
+                return  # discarded, or superseded by a newer drawing
+        if future.cancelled():
+            return
+        try:
+            self.cache.put(key, future.result())
+            self.rendered += 1
+        except BrokenExecutor:
+            self.failed += 1
+            self._reset(executor)
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️  Thumbnail {key} failed: {e}")
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def get(self, key: Hashable, timeout: float = 0) -> Optional[bytes]:
+        """Cached PNG, waiting up to timeout seconds if it is still rendering"""
+        png = self.cache.get(key)
+        if png is None and timeout > 0:
+            future = self._pending.get(key)
+            if future is not None:
+                try:
+                    png = future.result(timeout)
+                except Exception:
+                    return None
+        return png
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                future = self._pending.pop(key, None)
+                if future is not None:
+                    future.cancel()
+        for key in keys:
+            self.cache.discard(key)
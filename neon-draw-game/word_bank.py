@@ -0,0 +1,176 @@
+import json
+import os
+import secrets
+import threading
+from hashlib import blake2b
+from typing import Dict, Optional, Sequence, Tuple
+
+from guess_matcher import WordKey, compile_word
+
+WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arabic_words.json')
+FALLBACK_WORDS = ["قلم", "كتاب", "شمس", "قمر", "بحر", "جبل", "زهرة", "بيت"]
+
+
+def default_difficulty(word: str) -> str:
+    letters = len(word.replace(' ', ''))
+    if letters <= 3:
+        return 'easy'
+    if letters <= 5:
+        return 'medium'
+    return 'hard'
+
+
+class WordBank:
+    """Immutable word list shared by every room, with lookup indexes
+
+    Words are stored once as a tuple alongside their precompiled guess keys.
+    Indexes map category, difficulty and length to tuples of word positions,
+    so rooms sample by position without ever copying the list.
+    """
+
+    def __init__(self, entries: Sequence[Tuple[str, str, str]]):
+        seen = set()
+        words, keys, categories, difficulties = [], [], [], []
+        for word, category, difficulty in entries:
+            if not word or word in seen:
+                continue
+            seen.add(word)
+            words.append(word)
+            keys.append(compile_word(word))
+            categories.append(category)
+            difficulties.append(difficulty)
+
+        self.words: Tuple[str, ...] = tuple(words)
+        self.keys: Tuple[WordKey, ...] = tuple(keys)
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self.difficulties: Tuple[str, ...] = tuple(difficulties)
+        self.all = tuple(range(len(words)))
+        self.by_category = self._index(categories)
+        self.by_difficulty = self._index(difficulties)
+        self.by_length = self._index(len(w) for w in words)
+        self._position = {w: i for i, w in enumerate(words)}
+        self._selections: Dict[Tuple, Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(values) -> Dict:
+        index: Dict = {}
+        for i, value in enumerate(values):
+            index.setdefault(value, []).append(i)
+        return {k: tuple(v) for k, v in index.items()}
+
+    @classmethod
+    def from_json(cls, path: str) -> 'WordBank':
+        """Load {"words": [...]} where entries are strings or
+        {"word", "category", "difficulty"} objects"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = []
+        for item in data['words']:
+            if isinstance(item, str):
+                entries.append((item, 'general', default_difficulty(item)))
+            else:
+                word = item['word']
+                entries.append((word, item.get('category', 'general'),
+                                item.get('difficulty', default_difficulty(word))))
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def key_of(self, word: str) -> WordKey:
+        pos = self._position.get(word)
+        return self.keys[pos] if pos is not None else compile_word(word)
+
+    def select(self, category: Optional[str] = None, difficulty: Optional[str] = None,
+               max_length: Optional[int] = None) -> Tuple[int, ...]:
+        """Positions of words matching every given filter (memoized)"""
+        cache_key = (category, difficulty, max_length)
+        selection = self._selections.get(cache_key)
+        if selection is not None:
+            return selection
+
+        positions = set(self.all)
+        if category is not None:
+            positions &= set(self.by_category.get(category, ()))
+        if difficulty is not None:
+            positions &= set(self.by_difficulty.get(difficulty, ()))
+        if max_length is not None:
+            positions = {i for i in positions if len(self.words[i]) <= max_length}
+        selection = tuple(sorted(positions)) or self.all
+        with self._lock:
+            self._selections[cache_key] = selection
+        return selection
+
+
+class WordSampler:
+    """Per-room no-repeat sampling over a shared selection of positions
+
+    Walks a keyed permutation of 0..n-1: a 4-round Feistel network over the
+    smallest even-bit domain holding n, cycle-walking past values >= n. Every
+    word comes up once per cycle using O(1) memory, and with a random key
+    per cycle the words seen so far say nothing about the next one. A fresh
+    key is drawn when the cycle is exhausted.
+    """
+
+    __slots__ = ('bank', 'selection', 'key', 'drawn')
+    ROUNDS = 4
+
+    def __init__(self, bank: WordBank, selection: Optional[Sequence[int]] = None):
+        self.bank = bank
+        self.selection = bank.all if selection is None else selection
+        self._reshuffle()
+
+    def _reshuffle(self):
+        self.key = secrets.token_bytes(16)
+        self.drawn = 0
+
+    def _permute(self, i: int, n: int) -> int:
+        half = ((n - 1).bit_length() + 1) // 2 or 1
+        mask = (1 << half) - 1
+        while True:
+            left, right = i >> half, i & mask
+            for r in range(self.ROUNDS):
+                digest = blake2b(bytes((r,)) + right.to_bytes(4, 'little'), key=self.key, digest_size=4).digest()
+                left, right = right, left ^ (int.from_bytes(digest, 'little') & mask)
+            i = (left << half) | right
+            if i < n:
+                return i
+
+    def __getstate__(self):
+        selection = None if self.selection is self.bank.all else self.selection
+        return selection, self.key, self.drawn
+
+    def __setstate__(self, state):
+        selection, self.key, self.drawn = state
+        self.bank = get_word_bank()
+        self.selection = self.bank.all if selection is None else selection
+
+    def next_word(self) -> str:
+        n = len(self.selection)
+        if self.drawn >= n:
+            self._reshuffle()
+        pos = self.selection[self._permute(self.drawn, n)]
+        self.drawn += 1
+        return self.bank.words[pos]
+
+
+_bank: Optional[WordBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_word_bank() -> WordBank:
+    """The process-wide word bank, loaded on first use"""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                try:
+                    bank = WordBank.from_json(WORDS_PATH)
+                    if not len(bank):
+                        raise ValueError("word list is empty")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️  Could not load {WORDS_PATH}: {e}; using fallback words")
+                    bank = WordBank([(w, 'general', default_difficulty(w)) for w in FALLBACK_WORDS])
+                _bank = bank
+    return _bank